@@ -26,6 +26,10 @@ import app.models.group
 import app.models.chunk
 import app.models.audit_log
 import app.models.project_member
+import app.models.embedding_cache
+import app.models.corpus_generation
+import app.models.chunk_embedding
+import app.models.answer_cache
 
 # this is the Alembic Config object
 config = context.config
@@ -4,6 +4,7 @@ import pg8000
 import google.auth
 from google.auth.transport.requests import Request as GoogleRequest
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # 환경 변수 로드
@@ -99,3 +100,72 @@ SessionLocal = sessionmaker(
 )
 
 Base = declarative_base()
+
+
+# ---------------------------------------------------------
+# Async engine (psycopg3 async driver) — /query async 경로 전용
+# ---------------------------------------------------------
+# - Cloud Run: Unix socket + IAM token 으로 psycopg.AsyncConnection 생성
+# - 로컬: DATABASE_URL(postgresql) 의 드라이버만 postgresql+psycopg 로 바꿔 사용
+# - Cloud SQL Connector(로컬 개발) / DB 미설정이면 None → 호출 쪽이 sync 세션으로 대체
+# pool 크기는 app/services/limits.py 의 "db" 슬롯 수와 맞춘다.
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "10"))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "5"))
+
+
+def _iam_token() -> str:
+    scopes = ['https://www.googleapis.com/auth/sqlservice.login']
+    credentials, _ = google.auth.default(scopes=scopes)
+    credentials.refresh(GoogleRequest())
+    return credentials.token
+
+
+def get_async_engine():
+    try:
+        from sqlalchemy.ext.asyncio import create_async_engine
+    except ImportError:
+        return None
+
+    pool_kwargs = dict(
+        pool_pre_ping=True,
+        pool_size=ASYNC_DB_POOL_SIZE,
+        max_overflow=ASYNC_DB_MAX_OVERFLOW,
+    )
+
+    if CLOUD_SQL_CONNECTION_NAME:
+        socket_dir = f"/cloudsql/{CLOUD_SQL_CONNECTION_NAME}"
+        if not os.path.exists(socket_dir):
+            # Connector 의 async 연결은 asyncpg 전용이라 여기서는 지원하지 않는다
+            return None
+
+        async def get_conn():
+            import asyncio
+            import psycopg
+            # token 발급은 blocking HTTP 호출 → 커넥션 생성 시에만 thread 로
+            token = await asyncio.to_thread(_iam_token)
+            return await psycopg.AsyncConnection.connect(
+                host=socket_dir,  # 디렉터리 경로 → libpq 가 .s.PGSQL.5432 socket 사용
+                user=DB_IAM_USER,
+                dbname=DB_NAME,
+                password=token,
+            )
+
+        return create_async_engine("postgresql+psycopg://", async_creator=get_conn, **pool_kwargs)
+
+    if not DATABASE_URL or not DATABASE_URL.startswith("postgresql"):
+        return None
+    url = make_url(DATABASE_URL).set(drivername="postgresql+psycopg")
+    return create_async_engine(url, **pool_kwargs)
+
+
+async_engine = get_async_engine()
+
+AsyncSessionLocal = None
+if async_engine is not None:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
@@ -24,8 +24,10 @@ from app.routes.query import router as query_router
 from app.routes.groups import router as groups_router
 from app.routes.answers import router as answers_router
 from app.routes.chats import router as chats_router
-from app.db import engine
+from app.db import engine, async_engine
 from app.models.db import Base
+from app.services.vector_index import INDEX_DDL_ON_STARTUP, ensure_vector_indexes, ensure_text_indexes
+from app.services.vertex_client import warm_up_clients
 # Import all models to ensure they are registered with Base.metadata
 from app.models.project import Project
 from app.models.rfp_requirement import RFPRequirement
@@ -34,6 +36,10 @@ from app.models.answer import AnswerCard
 from app.models.guardrail import GuardrailPolicy
 from app.models.user import AppUser
 from app.models.project_member import ProjectMember
+from app.models.embedding_cache import EmbeddingCacheEntry
+from app.models.corpus_generation import CorpusGeneration
+from app.models.chunk_embedding import ChunkEmbedding
+from app.models.answer_cache import SemanticAnswerCache
 
 # ---------------------------------------------------------
 # 로거 설정
@@ -159,6 +165,38 @@ def run_safe_migration():
                 if result.fetchone() is None:
                     logger.info("Migration: Adding 'group_id' column to document")
                     conn.execute(text("ALTER TABLE document ADD COLUMN group_id UUID"))
+
+            # Check Chunk Table
+            result = conn.execute(text("SELECT to_regclass('public.chunk')"))
+            if result.scalar() is not None:
+                # Check for 'embedding_key' column (chunk_embedding 참조)
+                result = conn.execute(text(
+                    "SELECT column_name FROM information_schema.columns "
+                    "WHERE table_name='chunk' AND column_name='embedding_key'"
+                ))
+                if result.fetchone() is None:
+                    logger.info("Migration: Adding 'embedding_key' column to chunk")
+                    conn.execute(text("ALTER TABLE chunk ADD COLUMN embedding_key VARCHAR"))
+                    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chunk_embedding_key ON chunk (embedding_key)"))
+
+                # Check for 'char_start' / 'char_end' columns (chunker offsets)
+                for column in ("char_start", "char_end"):
+                    result = conn.execute(text(
+                        "SELECT column_name FROM information_schema.columns "
+                        f"WHERE table_name='chunk' AND column_name='{column}'"
+                    ))
+                    if result.fetchone() is None:
+                        logger.info(f"Migration: Adding '{column}' column to chunk")
+                        conn.execute(text(f"ALTER TABLE chunk ADD COLUMN {column} INTEGER"))
+
+                # Check for 'content_hash' column (incremental reindex)
+                result = conn.execute(text(
+                    "SELECT column_name FROM information_schema.columns "
+                    "WHERE table_name='chunk' AND column_name='content_hash'"
+                ))
+                if result.fetchone() is None:
+                    logger.info("Migration: Adding 'content_hash' column to chunk")
+                    conn.execute(text("ALTER TABLE chunk ADD COLUMN content_hash VARCHAR"))
             
             conn.commit()
     except Exception as e:
@@ -182,11 +220,31 @@ async def lifespan(app: FastAPI):
         # We might want to let it fail or continue depending on severity
         # raising here will prevent the app from starting if migration fails
         raise e
+
+    # ANN / trigram 인덱스 점검 (검색 distance 와 opclass 일치). 실패해도 기동은 계속한다.
+    # 기본은 점검만: 생성 / 재생성은 verify_vector_index.py (VECTOR_INDEX_DDL_ON_STARTUP=1 이면 여기서도, lock 하에)
+    try:
+        report = ensure_vector_indexes(engine, apply=INDEX_DDL_ON_STARTUP)
+        report["text"] = ensure_text_indexes(engine, apply=INDEX_DDL_ON_STARTUP)
+        if not INDEX_DDL_ON_STARTUP and (report["created"] or report["dropped"] or report["text"]["created"]):
+            logger.warning(f"Lifespan: Search indexes need changes, run verify_vector_index.py: {report}")
+        else:
+            logger.info(f"Lifespan: Search indexes {report}")
+    except Exception as e:
+        logger.error(f"Lifespan: Vector index check failed - {e}")
+
+    # Vertex AI Search 클라이언트(gRPC 채널) 선생성
+    try:
+        warm_up_clients()
+    except Exception as e:
+        logger.error(f"Lifespan: Vertex client warm-up failed - {e}")
     
     yield
     
     # Shutdown logic (if any)
     logger.info("Lifespan: Shutting down...")
+    if async_engine is not None:
+        await async_engine.dispose()
 
 # ---------------------------------------------------------
 # CORS ORIGINS 설정 (A-5)
@@ -2,7 +2,7 @@
 import uuid
 from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, text, TIMESTAMP
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from pgvector.sqlalchemy import Vector
 from .db import Base
 
@@ -35,7 +35,7 @@ class AnswerChunk(Base):
     answer_id = Column(UUID(as_uuid=True), ForeignKey("answer_card.id", ondelete="CASCADE"), nullable=False)
     page = Column(Integer, nullable=False, default=0)
     text = Column(Text, nullable=False)
-    embedding = Column(Vector(1536), nullable=False)
+    embedding = deferred(Column(Vector(1536), nullable=False))
     
     answer_card = relationship("AnswerCard", backref="chunks")
 
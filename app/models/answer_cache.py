@@ -0,0 +1,30 @@
+# app/models/answer_cache.py
+import uuid
+from sqlalchemy import Column, String, Integer, Text, TIMESTAMP, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import deferred
+from pgvector.sqlalchemy import Vector
+from .db import Base
+
+class SemanticAnswerCache(Base):
+    """
+    /query 답변 semantic cache (그룹 단위).
+    질문 임베딩이 충분히 가깝고 근거 passage 가 그대로면 LLM 호출 없이 저장된 답변을 돌려준다.
+    scope = group_id 문자열, Knowledge Hub(글로벌)는 'global'
+    sources = [{"kind": "chunk" | "answer_card" | "vertex", "id", "version"}]
+    """
+    __tablename__ = "semantic_answer_cache"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    scope = Column(String, nullable=False, index=True)
+    # 검색 파라미터 / 모델 / 시스템 프롬프트가 같은 entry 끼리만 재사용
+    settings_key = Column(String, nullable=False)
+    question = Column(Text, nullable=False)
+    embedding = deferred(Column(Vector(1536), nullable=False))
+    sources = Column(JSONB, nullable=False)
+    answer = Column(Text, nullable=False)
+    citations = Column(JSONB, nullable=False)
+    tokens = Column(JSONB, nullable=True)  # 원래 LLM 호출 사용량 (hit 마다 절약한 token)
+    hit_count = Column(Integer, nullable=False, server_default=text("0"))
+    created_at = Column(TIMESTAMP, server_default=text("now()"))
+    last_hit_at = Column(TIMESTAMP, nullable=True)
@@ -1,5 +1,6 @@
 from sqlalchemy import Column, String, Integer, Text, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import deferred
 from pgvector.sqlalchemy import Vector
 from .db import Base
 
@@ -9,4 +10,13 @@ class Chunk(Base):
     document_id = Column(UUID(as_uuid=True), ForeignKey("document.id"), nullable=False)
     page = Column(Integer, nullable=False)
     text = Column(Text, nullable=False)
-    embedding = Column(Vector(1536), nullable=False)
\ No newline at end of file
+    # 검색 결과/ORM 로드 시 1536-float 벡터를 끌어오지 않도록 deferred
+    embedding = deferred(Column(Vector(1536), nullable=False))
+    # chunk_embedding.key (sha256(model, text)). ANN 검색용 벡터는 위 컬럼에 그대로 두고,
+    # 임베딩 재사용 / ref count 는 이 key 로 관리한다.
+    embedding_key = Column(String, nullable=True, index=True)
+    # 페이지 텍스트 안의 위치 [char_start, char_end) (citation 하이라이트용, 예전 chunk 는 NULL)
+    char_start = Column(Integer, nullable=True)
+    char_end = Column(Integer, nullable=True)
+    # sha256(page + text). 재인덱스 시 새 chunking 과 비교해 바뀐 chunk 만 지우고 / 임베딩한다 (예전 chunk 는 NULL)
+    content_hash = Column(String, nullable=True)
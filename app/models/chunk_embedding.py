@@ -0,0 +1,20 @@
+# app/models/chunk_embedding.py
+from sqlalchemy import Column, String, Integer, TIMESTAMP, text
+from sqlalchemy.orm import deferred
+from pgvector.sqlalchemy import Vector
+from .db import Base
+
+class ChunkEmbedding(Base):
+    """
+    문서 chunk 임베딩 content-addressed 저장소.
+    key = sha256(model + '\\x00' + chunk_text) → 같은 텍스트는 프로젝트/재인덱스와 무관하게 1번만 임베딩.
+    ref_count = 이 key 를 참조하는 chunk row 수 (0 이 되면 GC 대상)
+    """
+    __tablename__ = "chunk_embedding"
+
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=False)
+    embedding = deferred(Column(Vector(1536), nullable=False))
+    ref_count = Column(Integer, nullable=False, server_default=text("0"))
+    created_at = Column(TIMESTAMP, server_default=text("now()"))
+    updated_at = Column(TIMESTAMP, server_default=text("now()"))
@@ -0,0 +1,15 @@
+# app/models/corpus_generation.py
+from sqlalchemy import Column, String, BigInteger, TIMESTAMP, text
+from .db import Base
+
+class CorpusGeneration(Base):
+    """
+    검색 corpus(그룹 단위) 세대 번호.
+    chunk / answer card 가 바뀔 때마다 +1 → 검색 결과 캐시가 이전 세대를 무효로 본다.
+    scope = group_id 문자열, Knowledge Hub(글로벌)는 'global'
+    """
+    __tablename__ = "corpus_generation"
+
+    scope = Column(String, primary_key=True)
+    generation = Column(BigInteger, nullable=False, server_default=text("0"))
+    updated_at = Column(TIMESTAMP, server_default=text("now()"))
@@ -2,50 +2,46 @@
 import os
 from sqlalchemy import event
 # Import from the single source of truth
-from app.db import engine, SessionLocal, Base
+from app.db import engine, SessionLocal, Base, async_engine, AsyncSessionLocal
+from app.utils.vector_codec import register_vector_codecs
+from app.services.vector_index import apply_session_tunables
 
 # ---------------------------------------------------------
-# A-3 성능 튜닝: ivfflat.probes 기본값 설정
+# A-3 성능 튜닝: pgvector 검색 tunable 세션 기본값
 # ---------------------------------------------------------
-# ❗주의 사항 (매우 중요)
-# 현재 우리가 사용하는 pgvector Docker 이미지(pgvector/pgvector:pg16)는
-# "ivfflat.probes" 라는 세션 수준 GUC(Global User Configuration)을
-# 아직 지원하지 않는 버전이다.
-#
-# 그래서 아래 쿼리를 직접 실행해보면:
-#   SHOW ivfflat.probes;
-# → ERROR: unrecognized configuration parameter "ivfflat.probes"
-#
-# 즉, 현 시점에서는 SET ivfflat.probes=10 이 실제로 적용되지는 않는다.
-#
-# ✔ 하지만 이 코드를 남겨두는 이유:
-#   - 향후 pgvector 버전을 업그레이드하면
-#     이 GUC가 지원되며, 그 즉시 probes 튜닝이 자동 활성화된다.
-#   - FastAPI/SQLAlchemy 코드는 바꾸지 않고도
-#     DB 버전 업만으로 성능 개선 효과(probes↑ recall↑)를 얻을 수 있게 된다.
-#
-# ✔ 또한 try/except로 안전하게 감싸두었기 때문에
-#   - 지금 버전에서는 쿼리가 에러를 내더라도 서비스에는 영향 없음
-#   - 프로덕션에서도 커넥션이 죽지 않고 정상적으로 실행됨
-#
-# ✔ 지금은 “비활성화된 미래 대비용 코드”라고 이해하면 된다.
-#
-# 따라서 이 훅은 현재 효과는 없지만,
-# pgvector 최신 버전에서는 정상적으로 동작하며 튜닝 옵션이 된다.
+# hnsw.ef_search / ivfflat.probes 를 커넥션 생성 시 설정한다.
+# 값과 인덱스 생성 파라미터(m, ef_construction, lists)는
+# app/services/vector_index.py 에서 ENV 로 관리한다.
+# (GUC 를 모르는 pgvector 버전이면 해당 SET 만 건너뛴다.)
 # ---------------------------------------------------------
 @event.listens_for(engine, "connect")
-def set_ivfflat_probes(dbapi_connection, connection_record):
+def set_vector_search_tunables(dbapi_connection, connection_record):
     """
     PostgreSQL 커넥션이 열릴 때 실행되는 이벤트 훅.
-    - 향후 pgvector가 ivfflat.probes GUC를 지원하게 되면 즉시 활성화됨.
-    - 현재 버전에서는 쿼리가 에러나지만 try/except로 안전하게 무시한다.
+    - 트랜잭션 단위 override 는 vector_index.set_search_tunables() 를 사용한다.
     """
-    cursor = dbapi_connection.cursor()
+    apply_session_tunables(dbapi_connection)
+
+
+# async engine 커넥션도 같은 세션 기본값을 쓴다 (adapted connection 의 sync API 로 실행)
+if async_engine is not None:
+    event.listen(async_engine.sync_engine, "connect", set_vector_search_tunables)
+
+# ---------------------------------------------------------
+# pgvector binary codec 등록 (psycopg 드라이버 한정)
+# ---------------------------------------------------------
+# psycopg3 커넥션이면 numpy ndarray bind / binary vector load 를 활성화한다.
+# pg8000(Cloud SQL) 에서는 아무것도 하지 않으며, 벡터가 필요한 경로는
+# app/utils/vector_codec.py 의 vector_send() 기반 decode 를 사용한다.
+@event.listens_for(engine, "connect")
+def register_pgvector_codecs(dbapi_connection, connection_record):
     try:
-        cursor.execute("SET ivfflat.probes = 10;")
+        register_vector_codecs(dbapi_connection)
     except Exception:
-        # 현재 pgvector 버전에서는 지원되지 않아도
-        # 전체 커넥션에 영향을 주지 않도록 silent pass
+        # vector extension 이 아직 없는 DB(초기 마이그레이션 전)에서도 커넥션은 살린다.
         pass
-    finally:
-        cursor.close()
+
+
+# async engine 커넥션에도 등록 (adapted connection → register_vector_async)
+if async_engine is not None:
+    event.listen(async_engine.sync_engine, "connect", register_pgvector_codecs)
@@ -0,0 +1,17 @@
+# app/models/embedding_cache.py
+from sqlalchemy import Column, String, TIMESTAMP, text
+from sqlalchemy.orm import deferred
+from pgvector.sqlalchemy import Vector
+from .db import Base
+
+class EmbeddingCacheEntry(Base):
+    """
+    질문/요구사항 임베딩 공유 캐시 (Cloud Run 인스턴스 간 공유 tier).
+    key = sha256(model + normalize_text(text))
+    """
+    __tablename__ = "embedding_cache"
+
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=False)
+    embedding = deferred(Column(Vector(1536), nullable=False))
+    created_at = Column(TIMESTAMP, server_default=text("now()"))
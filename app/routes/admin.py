@@ -7,6 +7,12 @@ from app.models.db import SessionLocal
 from app.models.audit_log import AuditLog
 from app.models.answer import AnswerCard
 from app.services.auth import verify_manager_role
+from app.services.embed_cache import cache_stats as embed_cache_stats
+from app.services.search_cache import cache_stats as search_cache_stats
+from app.services.embed_coalescer import coalescer_stats
+from app.services.limits import limiter_stats
+from app.services.answer_cache import answer_cache_stats
+from app.services.embedding_store import gc_chunk_embeddings
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -147,6 +153,26 @@ def get_system_status(db: Session = Depends(get_db)):
         "memoryUsage": 60
     }
 
+@router.get("/cache/stats")
+def get_cache_stats():
+    """
+    검색 경로 캐시 hit/miss 통계 (프로세스 단위).
+    """
+    return {
+        "embedding": embed_cache_stats(),
+        "search": search_cache_stats(),
+        "embed_coalescer": coalescer_stats(),
+        "limits": limiter_stats(),
+        "answer": answer_cache_stats(),
+    }
+
+@router.post("/embeddings/gc")
+def run_embedding_gc(reconcile: bool = True, db: Session = Depends(get_db)):
+    """
+    chunk_embedding 저장소 GC: ref_count 재계산(reconcile) 후 참조 없는 임베딩 삭제.
+    """
+    return gc_chunk_embeddings(db, reconcile=reconcile)
+
 class GuardrailsBody(BaseModel):
     prohibited_words: List[dict]
     risk_policy: dict
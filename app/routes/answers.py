@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.models.db import SessionLocal
 from app.models.answer import AnswerCard
 from app.services.answers import create_answer_card, approve_answer_card, add_variant
+from app.services.search_cache import bump_generation
 
 router = APIRouter(prefix="/answers", tags=["answers"])
 
@@ -159,6 +160,7 @@ def update_answer(answer_id: UUID, body: AnswerUpdateBody, db: Session = Depends
         card.question = body.question
     if body.status is not None:
         card.status = body.status
+    bump_generation(db, card.group_id)
         
     db.commit()
     db.refresh(card)
@@ -8,6 +8,8 @@ from app.models.document import Document
 from app.models.chunk import Chunk
 from app.services.indexer import index_document
 from app.services.ingest import upload_file_to_gcs, GCS_BUCKET_NAME
+from app.services.search_cache import bump_generation
+from app.services.embedding_store import release_document_chunks
 # from app.services.s3 import put_pdf, presign # Removed legacy S3
 import os, uuid, hashlib
 
@@ -169,7 +171,8 @@ def reindex_document(
     if not doc:
         raise HTTPException(status_code=404, detail="document not found")
 
-    # 재인덱스 실행 (S3에서 원본 읽어옴)
+    # 재인덱스 실행 (S3에서 원본 읽어옴, 바뀐 chunk 만 임베딩)
+    index_stats = {}
     try:
         created_chunks = index_document(
             db=db,
@@ -177,6 +180,7 @@ def reindex_document(
             s3_key=doc.s3_key_raw,
             title=doc.title,
             pdf_bytes=None,  # 재인덱스는 굳이 바이트 전달할 필요 없음
+            stats=index_stats,
         )
     except Exception as e:
         raise HTTPException(
@@ -190,6 +194,7 @@ def reindex_document(
         "workspace": doc.workspace,
         "group_id": str(doc.group_id) if doc.group_id else None,
         "chunks": created_chunks,
+        "index": index_stats,  # kept / added / removed / moved / backfilled / embedded / insert_ms
     }
 
 
@@ -281,9 +286,12 @@ def delete_document(document_id: str, db: Session = Depends(get_db)):
     if doc.is_folder:
         children = db.query(Document).filter(Document.parent_id == doc.id).all()
         for child in children:
+            release_document_chunks(db, child.id)
             db.delete(child)
             
+    release_document_chunks(db, doc.id)
     db.delete(doc)
+    bump_generation(db, doc.group_id)
     db.commit()
     return {"status": "deleted", "id": document_id}
 
@@ -7,6 +7,7 @@ from app.models.rfp_requirement import RFPRequirement
 from app.models.answer import AnswerCard
 from app.models.document import Document
 from app.services.auth import verify_manager_role
+from app.services.search_cache import bump_generation
 import uuid
 import os
 from typing import List, Optional
@@ -409,6 +410,7 @@ def update_requirement_response(
         if card:
             card.answer = body.response
             # card.updated_at = ... (auto)
+            bump_generation(db, card.group_id)
             db.commit()
     else:
         # Create new AnswerCard
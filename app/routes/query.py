@@ -2,24 +2,45 @@
 import os
 import json
 import time
+import asyncio
 import logging
 from uuid import UUID
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 
 from fastapi import APIRouter, Query, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from openai import OpenAI
+from openai import AsyncOpenAI
 
-from app.models.db import SessionLocal
+from app.models.db import SessionLocal, AsyncSessionLocal
 from app.models.group import GroupInstruction
-from app.services.embed import embed_texts
+from app.models.answer import AnswerCard
+from app.services import answer_cache, limits
+from app.services.context import pack_context, to_passage, CONTEXT_MAX_TOKENS
+from app.services.embed import EMBED_MODEL
+from app.services.embed_cache import aembed_texts_cached
+from app.services.embed_coalescer import aembed_texts_coalesced
+from app.services.limits import LimitExceeded
 from app.services.search import (
     search_chunks,
+    asearch_chunks,
     W_VEC_DEFAULT,
     W_LEX_DEFAULT,
     DIVERSITY_PENALTY_DEFAULT,
+    MIN_SIMILARITY,
+)
+from app.services.cite import (
+    attach_citations,
+    attach_citations_detailed,
+    load_passage_vectors,
+    CitationBuilder,
+    CITE_MODE,
+    CITE_MODES,
+    pop_complete_sentences,
+    split_sentences,
 )
-from app.services.cite import attach_citations
 
 router = APIRouter(prefix="/query", tags=["query"])
 
@@ -27,17 +48,34 @@ router = APIRouter(prefix="/query", tags=["query"])
 logger = logging.getLogger("rag_proto")
 
 # OPENAI_API_KEY는 .env/환경변수로 주입
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# async client: 동시 요청 수는 threadpool 이 아니라 limits("chat") 슬롯으로 제한된다
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4o-mini")
 WORKSPACE = os.getenv("WORKSPACE", "personal")
 
-
-def get_db():
-    db = SessionLocal()
-    try:
+# ---------------------------------------------------------
+# Answer card fast path
+# top hit 이 승인된 answer card 이고 similarity 가 충분히 높을 때
+# - off:    항상 LLM 으로 답변
+# - direct: 카드 답변을 그대로 반환 (LLM 호출 없음)
+# - refine: /query/stream 에서 카드 답변을 먼저 보내고 LLM 다듬은 답변을 이어서 stream
+#           (/query 는 stream 이 없으므로 일반 경로)
+# ---------------------------------------------------------
+FAST_PATH_MODES = ("off", "direct", "refine")
+ANSWER_CARD_FAST_PATH = os.getenv("ANSWER_CARD_FAST_PATH", "direct")
+ANSWER_CARD_FAST_PATH_MIN_SIMILARITY = float(os.getenv("ANSWER_CARD_FAST_PATH_MIN_SIMILARITY", "0.9"))
+
+
+async def get_async_db():
+    """
+    async 세션. async driver 를 구성할 수 없는 환경(Cloud SQL Connector 로컬 개발 등)이면 None 을 주고,
+    DB 단계만 sync 세션 + threadpool 로 대체한다.
+    """
+    if AsyncSessionLocal is None:
+        yield None
+        return
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def _get_group_instruction(db: Session, group_id: Optional[UUID]) -> str:
@@ -47,6 +85,47 @@ def _get_group_instruction(db: Session, group_id: Optional[UUID]) -> str:
     return gi.instruction if gi and gi.instruction else ""
 
 
+def _run_sync_session(fn: Callable[..., Any], *args: Any) -> Any:
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def _run_db(adb: Optional[AsyncSession], fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    fn(db, *args) 실행. async 세션이면 run_sync(greenlet, thread 사용 없음),
+    없으면 sync 세션 + threadpool 로 대체한다.
+    """
+    if adb is None:
+        return await run_in_threadpool(_run_sync_session, fn, *args)
+    async with limits.limit("db"):
+        return await adb.run_sync(fn, *args)
+
+
+async def _run_db_short(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    요청 세션과 별개의 짧은 세션에서 fn(db, *args).
+    요청 세션은 LLM 호출 전에 반납하므로 그 뒤의 DB 작업(인용 vector 조회, answer cache 저장)은 이걸로.
+    """
+    if AsyncSessionLocal is None:
+        return await _run_db(None, fn, *args)
+    async with AsyncSessionLocal() as adb:
+        return await _run_db(adb, fn, *args)
+
+
+async def _release_db(adb: Optional[AsyncSession]) -> None:
+    """
+    요청 세션의 transaction 을 끝내고 connection 을 pool 에 돌려준다.
+    LLM 호출 / SSE stream 동안 connection 이 idle in transaction 으로 잡혀 있지 않게 한다.
+    """
+    if adb is None:
+        return
+    await adb.commit()
+    await adb.close()
+
+
 def _build_system_prompt(group_instruction: str) -> str:
     base = (
         "너는 팀 내부 문서와 승인된 팀 정답(Answer Card)을 사용하는 지식 어시스턴트이다. "
@@ -61,9 +140,10 @@ def _build_system_prompt(group_instruction: str) -> str:
     return base
 
 
-@router.get("")
-def query(
-    request: Request,
+NO_RESULTS_ANSWER = "관련된 문서나 팀 정답을 찾지 못했습니다."
+
+
+async def query_params(
     q: str = Query(..., description="질문"),
     k: int = Query(6, description="최종 상위 passage 개수"),
     # A-4: 기본값을 search.py와 통일 + ENV override 지원
@@ -77,17 +157,29 @@ def query(
     ),
     diversity_penalty: float = Query(
         DIVERSITY_PENALTY_DEFAULT,
-        description="다양성 페널티 계수 (기본: SEARCH_DIVERSITY_PENALTY 또는 0.9)",
+        description="MMR λ: relevance 비중 (1.0=다양성 미적용, 낮을수록 다양성↑. 기본: SEARCH_DIVERSITY_PENALTY 또는 0.9)",
     ),
     per_doc_limit: int = Query(3, description="문서/정답 카드당 최대 passage 수"),
+    min_similarity: float = Query(
+        MIN_SIMILARITY,
+        description="vector hit 최소 cosine similarity (낮출수록 검색 범위↑. 기본: SEARCH_MIN_SIMILARITY 또는 0.3)",
+    ),
     document_id: Optional[str] = Query(None, description="특정 document_id로 제한"),
     group_id: Optional[str] = Query(None, description="그룹 UUID (optional)"),
     prefer_team_answer: bool = Query(
         False,
         description="승인된 팀 AnswerCard를 더 강하게 부스트할지 여부",
     ),
-    db: Session = Depends(get_db),
-):
+    fast_path: Optional[str] = Query(
+        None,
+        description="승인된 AnswerCard 강한 매칭 시 처리: off | direct | refine (기본: ANSWER_CARD_FAST_PATH 또는 direct)",
+    ),
+    cite_mode: Optional[str] = Query(
+        None,
+        description="인용 방식: lexical | embedding (기본: CITE_MODE 또는 lexical)",
+    ),
+) -> Dict[str, Any]:
+    """/query 와 /query/stream 이 공유하는 query parameter"""
     # group_id 파싱
     gid: Optional[UUID] = None
     if group_id:
@@ -98,177 +190,577 @@ def query(
                 status_code=422,
                 detail="group_id는 UUID 형식이어야 합니다.",
             )
+    fast_path = fast_path or ANSWER_CARD_FAST_PATH
+    if fast_path not in FAST_PATH_MODES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"fast_path는 {', '.join(FAST_PATH_MODES)} 중 하나여야 합니다.",
+        )
+    cite_mode = cite_mode or CITE_MODE
+    if cite_mode not in CITE_MODES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"cite_mode는 {', '.join(CITE_MODES)} 중 하나여야 합니다.",
+        )
+    return {
+        "q": q,
+        "k": k,
+        "w_vec": w_vec,
+        "w_lex": w_lex,
+        "diversity_penalty": diversity_penalty,
+        "per_doc_limit": per_doc_limit,
+        "min_similarity": min_similarity,
+        "document_id": document_id,
+        "gid": gid,
+        "prefer_team_answer": prefer_team_answer,
+        "fast_path": fast_path,
+        "cite_mode": cite_mode,
+    }
+
+
+# ---------------------------------------------------------
+# 공통 단계: 검색 → context 구성 → 프롬프트 → 로그
+# ---------------------------------------------------------
+def _search_kwargs(p: Dict[str, Any]) -> Dict[str, Any]:
+    gid = p["gid"]
+    return dict(
+        qtext=p["q"],
+        top_k=p["k"],
+        w_vec=p["w_vec"],
+        w_lex=p["w_lex"],
+        diversity_penalty=p["diversity_penalty"],
+        per_doc_limit=p["per_doc_limit"],
+        min_similarity=p["min_similarity"],
+        document_id=p["document_id"],
+        workspace=WORKSPACE,
+        group_id=str(gid) if gid else None,
+        prefer_team_answer=p["prefer_team_answer"],
+    )
 
-    # 질문 임베딩
+
+async def _embed_question(q: str) -> List[float]:
+    # 질문 임베딩 (LRU → embedding_cache 테이블 → provider 순, miss 는 동시 요청과 묶어서 전송)
     try:
-        qvec_list = embed_texts([q])
+        async with limits.limit("embed"):
+            qvec_list = await aembed_texts_cached([q], aembed_fn=aembed_texts_coalesced)
+    except LimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"embedding 실패: {e}")
     if not qvec_list:
         raise HTTPException(status_code=500, detail="embedding 결과가 비어 있습니다.")
-    qvec = qvec_list[0]
+    return qvec_list[0]
+
 
+async def _search(
+    adb: Optional[AsyncSession],
+    qvec: List[float],
+    p: Dict[str, Any],
+    search_debug: Dict[str, Any],
+) -> List[Dict[str, Any]]:
     # 검색 (문서 chunk + AnswerCard chunk)
-    rows = search_chunks(
-        db=db,
-        qvec=qvec,
-        qtext=q,
-        top_k=k,
-        w_vec=w_vec,
-        w_lex=w_lex,
-        diversity_penalty=diversity_penalty,
-        per_doc_limit=per_doc_limit,
-        document_id=document_id,
-        workspace=WORKSPACE,
-        group_id=str(gid) if gid else None,
-        prefer_team_answer=prefer_team_answer,
-    )
+    kwargs = _search_kwargs(p)
+    if adb is None:
+        return await run_in_threadpool(
+            _run_sync_session, lambda db: search_chunks(db=db, qvec=qvec, debug=search_debug, **kwargs)
+        )
+    return await asearch_chunks(adb, qvec, debug=search_debug, **kwargs)
 
-    used_k = len(rows)
 
-    if not rows:
-        # 빈 결과도 최소한의 로그는 남겨 두는 것이 좋다.
-        req_id = getattr(request.state, "request_id", None)
-        log_data = {
-            "ts": int(time.time() * 1000),
-            "level": "INFO",
-            "request_id": req_id,
-            "route": "query",
-            "workspace": WORKSPACE,
-            "group_id": str(gid) if gid else None,
-            "used_k": 0,
-            "model": CHAT_MODEL,
-            "w_vec": w_vec,
-            "w_lex": w_lex,
-            "diversity_penalty": diversity_penalty,
-            "prefer_team_answer": prefer_team_answer,
-            "tokens": None,
-            "note": "no_results",
-        }
-        logger.info(json.dumps(log_data, ensure_ascii=False))
+def _answer_cache_key(p: Dict[str, Any], system_prompt: str, generation: int) -> str:
+    # 답변을 바꿀 수 있는 모든 입력 (질문 자체는 임베딩 similarity 로 비교)
+    params = _search_kwargs(p)
+    params.pop("qtext")
+    return answer_cache.settings_key(
+        chat_model=CHAT_MODEL, embed_model=EMBED_MODEL, system_prompt=system_prompt,
+        context_budget=CONTEXT_MAX_TOKENS, cite_mode=p["cite_mode"], corpus_generation=generation, **params
+    )
 
-        return {
-            "answer": "관련된 문서나 팀 정답을 찾지 못했습니다.",
-            "citations": [],
-            "debug": {
-                "weights": {"vec": w_vec, "lex": w_lex},
-                "diversity_penalty": diversity_penalty,
-                "per_doc_limit": per_doc_limit,
-                "used_k": 0,
-                "workspace": WORKSPACE,
-                "group_id": str(gid) if gid else None,
-                "prefer_team_answer": prefer_team_answer,
-            },
-        }
 
-    # GPT에 줄 context 구성
-    context_parts: List[str] = []
-    passages: List[Dict[str, Any]] = []
-
-    for r in rows:
-        src_type = r["source_type"]
-        doc_id = r["document_id"]
-        answer_id = r["answer_id"]
-        title = r["title"]
-        page = r["page"]
-        text = r["text"]
-
-        # context 텍스트
-        if src_type == "answer":
-            header = f"[팀 정답 카드] {title}"
-        else:
-            header = f"[문서] {title} (page {page})"
-
-        context_parts.append(f"{header}\n{text}\n")
-
-        # cite용 passage
-        pseudo_doc_id = str(doc_id or answer_id) if (doc_id or answer_id) else None
-        passages.append(
-            {
-                "document_id": pseudo_doc_id,
-                "page": page,
-                "text": text,
-                "title": title,
-                "source_type": src_type,
-                "raw_document_id": str(doc_id) if doc_id else None,
-                "answer_id": str(answer_id) if answer_id else None,
-                "score": float(r["final_score"]),
-            }
-        )
+async def _prepare(adb: Optional[AsyncSession], p: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    질문 임베딩 → 시스템 프롬프트 → semantic answer cache 조회.
+    반환: {"qvec", "system_prompt", "cache_key"(캐시를 쓰지 않으면 None), "cached"(hit 이면 entry, 아니면 None)}
+    """
+    qvec = await _embed_question(p["q"])
+    group_instruction = await _run_db(adb, _get_group_instruction, p["gid"]) if p["gid"] else ""
+    system_prompt = _build_system_prompt(group_instruction)
+    cache_key = None
+    cached = None
+    if answer_cache.ANSWER_CACHE_ENABLED:
+        generation = await _run_db(adb, answer_cache.corpus_generation, p["gid"])
+        if generation is not None:
+            cache_key = _answer_cache_key(p, system_prompt, generation)
+            cached = await _run_db(adb, answer_cache.lookup, qvec, p["gid"], cache_key)
+    return {"qvec": qvec, "system_prompt": system_prompt, "cache_key": cache_key, "cached": cached}
+
+
+async def _store_answer(
+    p: Dict[str, Any],
+    prep: Dict[str, Any],
+    rows: List[Dict[str, Any]],
+    search_debug: Dict[str, Any],
+    answer: str,
+    citations: List[Dict[str, Any]],
+    tokens: Optional[Dict[str, Any]],
+) -> None:
+    # 일부 backend 가 빠진(degraded) 검색 결과로 만든 답변은 저장하지 않는다
+    if prep["cache_key"] is None or (search_debug.get("fanout") or {}).get("degraded"):
+        return
+    args = (prep["qvec"], p["q"], p["gid"], prep["cache_key"], rows, answer, citations, tokens)
+    try:
+        # 요청 세션 수명과 무관하게 (streaming generator 에서도) 쓸 수 있도록 별도 세션
+        await _run_db_short(answer_cache.store, *args)
+    except LimitExceeded:
+        pass
+
+
+def _cache_hit_debug(p: Dict[str, Any], cached: Dict[str, Any]) -> Dict[str, Any]:
+    return _debug_block(p, 0, {"answer_cache": {
+        "status": "hit",
+        "similarity": cached["similarity"],
+        "question": cached["question"],
+        "saved_tokens": cached["saved_tokens"],
+    }})
+
+
+def _cache_status() -> Dict[str, Any]:
+    return {"status": "miss" if answer_cache.ANSWER_CACHE_ENABLED else "disabled"}
+
+
+def _fast_path_hit(rows: List[Dict[str, Any]], mode: str) -> Optional[Dict[str, Any]]:
+    """top hit 이 fast path 조건(승인된 answer card + 높은 similarity)을 만족하면 그 row"""
+    if mode == "off" or not rows:
+        return None
+    top = rows[0]
+    if top["source_type"] != "answer_card" or (top.get("metadata") or {}).get("status") != "approved":
+        return None
+    if float(top.get("similarity") or 0.0) < ANSWER_CARD_FAST_PATH_MIN_SIMILARITY:
+        return None
+    return top
+
+
+def _load_card_answer(db: Session, answer_id: str) -> Optional[str]:
+    card = db.get(AnswerCard, UUID(answer_id))
+    if card is None or card.status != "approved":
+        return None
+    return card.answer_plain or card.answer
+
+
+async def _card_answer(adb: Optional[AsyncSession], row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """승인된 카드 전체 답변 + 카드 citation. 카드가 그사이 바뀌었으면 None (일반 경로)"""
+    text = await _run_db(adb, _load_card_answer, row["answer_id"])
+    if not text:
+        return None
+    answered, citations = attach_citations(text.strip(), [to_passage(row)])
+    return {
+        "answer": answered or text,
+        "citations": citations,
+        "debug": {"answer_id": row["answer_id"], "similarity": round(float(row["similarity"]), 4)},
+    }
 
-    context = "\n".join(context_parts)
 
-    # 시스템 프롬프트
-    group_instruction = _get_group_instruction(db, gid)
-    system_prompt = _build_system_prompt(group_instruction)
+# ---------------------------------------------------------
+# Embedding 인용 (cite_mode=embedding)
+# passage embedding 은 검색 때 저장된 vector 를 그대로 읽고, 답변 문장만 한 번에 임베딩한다.
+# 어느 쪽이든 실패하면 None → lexical 인용으로 대체 (답변 자체는 막지 않는다)
+# ---------------------------------------------------------
+async def _passage_vectors(p: Dict[str, Any], passages: List[Dict[str, Any]]):
+    if p["cite_mode"] != "embedding" or not passages:
+        return None
+    try:
+        return await _run_db_short(load_passage_vectors, passages)
+    except Exception as e:
+        logger.error(f"[query] passage embedding 조회 실패, lexical 인용으로 대체: {e}")
+        return None
 
-    # GPT 호출
+
+async def _sentence_vectors(sentences: List[str]) -> Optional[List[List[float]]]:
+    if not sentences:
+        return None
     try:
-        completion = client.chat.completions.create(
-            model=CHAT_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": (
-                        f"질문: {q}\n\n"
-                        "아래는 관련 문서와 팀 정답 카드에서 추출한 발췌문이다. "
-                        "이 정보만을 근거로 질문에 답변해라.\n\n"
-                        f"{context}"
-                    ),
-                },
-            ],
-        )
+        async with limits.limit("embed"):
+            return await aembed_texts_coalesced(sentences)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"OpenAI 호출 실패: {e}")
+        logger.error(f"[query] 답변 문장 embedding 실패, lexical 인용으로 대체: {e}")
+        return None
 
-    draft = completion.choices[0].message.content.strip()
 
-    # 인용 [n] 붙이기
-    answered, citations = attach_citations(draft, passages)
+def _cite_debug(mode: str, methods: List[str]) -> Dict[str, Any]:
+    return {"mode": mode, "embedding": methods.count("embedding"), "lexical": methods.count("lexical")}
+
+
+def _build_messages(system_prompt: str, q: str, context: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": system_prompt},
+        {
+            "role": "user",
+            "content": (
+                f"질문: {q}\n\n"
+                "아래는 관련 문서와 팀 정답 카드에서 추출한 발췌문이다. "
+                "이 정보만을 근거로 질문에 답변해라.\n\n"
+                f"{context}"
+            ),
+        },
+    ]
+
+
+def _usage_tokens(usage) -> Optional[Dict[str, Any]]:
+    if usage is None:
+        return None
+    # openai>=1.x 기준 usage 객체: prompt_tokens, completion_tokens, total_tokens
+    return {
+        "prompt": getattr(usage, "prompt_tokens", None),
+        "completion": getattr(usage, "completion_tokens", None),
+        "total": getattr(usage, "total_tokens", None),
+    }
+
+
+def _debug_block(p: Dict[str, Any], used_k: int, search_debug: Dict[str, Any]) -> Dict[str, Any]:
+    gid = p["gid"]
+    return {
+        "weights": {"vec": p["w_vec"], "lex": p["w_lex"]},
+        "diversity_penalty": p["diversity_penalty"],
+        "per_doc_limit": p["per_doc_limit"],
+        "used_k": used_k,
+        "workspace": WORKSPACE,
+        "group_id": str(gid) if gid else None,
+        "prefer_team_answer": p["prefer_team_answer"],
+        "rerank": search_debug.get("rerank"),
+        "result_cache": search_debug.get("result_cache"),
+        "fanout": search_debug.get("fanout"),
+        "vector_scan": search_debug.get("vector_scan"),
+        "answer_cache": search_debug.get("answer_cache"),
+        "context": search_debug.get("context"),
+        "fast_path": search_debug.get("fast_path"),
+        "cite": search_debug.get("cite"),
+    }
 
+
+def _log_usage(
+    request_id: Optional[str],
+    route: str,
+    p: Dict[str, Any],
+    used_k: int,
+    tokens: Optional[Dict[str, Any]],
+    **extra,
+) -> None:
     # -----------------------------------------------------
     # A-7: /query 전용 사용량 로그 (토큰/used_k/가중치 등)
     # -----------------------------------------------------
-    usage = getattr(completion, "usage", None)
-    tokens = None
-    if usage is not None:
-        # openai>=1.x 기준 usage 객체: prompt_tokens, completion_tokens, total_tokens
-        tokens = {
-            "prompt": getattr(usage, "prompt_tokens", None),
-            "completion": getattr(usage, "completion_tokens", None),
-            "total": getattr(usage, "total_tokens", None),
-        }
-
-    req_id = getattr(request.state, "request_id", None)
-
+    gid = p["gid"]
     log_data = {
         "ts": int(time.time() * 1000),
         "level": "INFO",
-        "request_id": req_id,
-        "route": "query",
+        "request_id": request_id,
+        "route": route,
         "workspace": WORKSPACE,
         "group_id": str(gid) if gid else None,
         "used_k": used_k,
         "model": CHAT_MODEL,
-        "w_vec": w_vec,
-        "w_lex": w_lex,
-        "diversity_penalty": diversity_penalty,
-        "prefer_team_answer": prefer_team_answer,
+        "w_vec": p["w_vec"],
+        "w_lex": p["w_lex"],
+        "diversity_penalty": p["diversity_penalty"],
+        "prefer_team_answer": p["prefer_team_answer"],
         "tokens": tokens,
     }
+    log_data.update(extra)
     logger.info(json.dumps(log_data, ensure_ascii=False))
 
+
+def _busy(e: LimitExceeded) -> HTTPException:
+    # upstream 슬롯 포화 → 재시도 가능한 503
+    logger.error(f"[query] {e}")
+    return HTTPException(status_code=503, detail=f"서버가 혼잡합니다. 잠시 후 다시 시도해 주세요. ({e.name})")
+
+
+@router.get("")
+async def query(
+    request: Request,
+    p: Dict[str, Any] = Depends(query_params),
+    adb: Optional[AsyncSession] = Depends(get_async_db),
+):
+    req_id = getattr(request.state, "request_id", None)
+
+    search_debug: Dict[str, Any] = {}
+    try:
+        prep = await _prepare(adb, p)
+        cached = prep["cached"]
+        if cached is not None:
+            # 같은 그룹의 거의 같은 질문 + 근거 passage 그대로 → 검색 / LLM 생략
+            _log_usage(req_id, "query", p, 0, None, note="answer_cache_hit", saved_tokens=cached["saved_tokens"])
+            return {
+                "answer": cached["answer"],
+                "citations": cached["citations"],
+                "debug": _cache_hit_debug(p, cached),
+            }
+        search_debug["answer_cache"] = _cache_status()
+        rows = await _search(adb, prep["qvec"], p, search_debug)
+    except LimitExceeded as e:
+        raise _busy(e)
+    used_k = len(rows)
+
+    if not rows:
+        # 빈 결과도 최소한의 로그는 남겨 두는 것이 좋다.
+        _log_usage(req_id, "query", p, 0, None, note="no_results")
+        return {
+            "answer": NO_RESULTS_ANSWER,
+            "citations": [],
+            "debug": _debug_block(p, 0, search_debug),
+        }
+
+    # 승인된 팀 정답 카드가 강하게 매칭되면 LLM 없이 카드 답변 ("refine" 은 stream 전용)
+    card_row = _fast_path_hit(rows, "direct" if p["fast_path"] == "direct" else "off")
+    try:
+        card = await _card_answer(adb, card_row) if card_row else None
+    except LimitExceeded as e:
+        raise _busy(e)
+    if card is not None:
+        search_debug["fast_path"] = {"mode": "direct", **card["debug"]}
+        _log_usage(req_id, "query", p, used_k, None, note="answer_card_fast_path")
+        return {
+            "answer": card["answer"],
+            "citations": card["citations"],
+            "debug": _debug_block(p, used_k, search_debug),
+        }
+
+    # DB 단계는 여기까지: LLM 을 기다리는 동안 요청 세션을 잡고 있지 않는다
+    await _release_db(adb)
+
+    # GPT에 줄 context 구성 (token 예산 / dedupe / trim)
+    context, passages, search_debug["context"] = pack_context(rows, p["q"], model=CHAT_MODEL)
+
+    # GPT 호출
+    try:
+        async with limits.limit("chat"):
+            completion = await client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=_build_messages(prep["system_prompt"], p["q"], context),
+            )
+    except LimitExceeded as e:
+        raise _busy(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"OpenAI 호출 실패: {e}")
+
+    draft = completion.choices[0].message.content.strip()
+
+    # 인용 [n] 붙이기
+    sentence_texts = split_sentences(draft)
+    passage_vectors, sentence_vectors = None, None
+    if p["cite_mode"] == "embedding":
+        passage_vectors, sentence_vectors = await asyncio.gather(
+            _passage_vectors(p, passages), _sentence_vectors(sentence_texts)
+        )
+    answered, citations, sentences = attach_citations_detailed(
+        draft, passages, sentence_texts, passage_vectors, sentence_vectors
+    )
+    search_debug["cite"] = _cite_debug(p["cite_mode"], [s["method"] for s in sentences])
+
+    tokens = _usage_tokens(getattr(completion, "usage", None))
+    _log_usage(req_id, "query", p, used_k, tokens, prompt_tokens_saved=search_debug["context"]["tokens_saved"])
+    await _store_answer(p, prep, rows, search_debug, answered or draft, citations, tokens)
+
     return {
         "answer": answered or draft,
         "citations": citations,
-        "debug": {
-            "weights": {"vec": w_vec, "lex": w_lex},
-            "diversity_penalty": diversity_penalty,
-            "per_doc_limit": per_doc_limit,
-            "used_k": used_k,
-            "workspace": WORKSPACE,
-            "group_id": str(gid) if gid else None,
-            "prefer_team_answer": prefer_team_answer,
-        },
+        "sentences": sentences,  # 문장별 citation 번호 + confidence(0~1)
+        "debug": _debug_block(p, used_k, search_debug),
     }
+
+
+# ---------------------------------------------------------
+# Streaming (SSE)
+# - event: retrieval → 검색이 끝나는 즉시 passages / debug 전송 (생성 시작 전)
+# - event: card      → (fast_path=refine) 승인된 answer card 답변, LLM 답변 전에 먼저
+# - event: token     → chat completion delta
+# - event: citation  → 문장이 끝날 때마다 그 문장에 붙는 [n] 과 출처
+# - event: done      → [n] 이 붙은 전체 답변 + citations + token 사용량
+# - event: error     → 생성 도중 실패 (이미 보낸 이벤트는 유효)
+# ---------------------------------------------------------
+# proxy(nginx 등) buffering 을 끄고 캐시하지 않게
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _passage_meta(passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # 본문은 citation snippet 으로 따로 가므로 retrieval 이벤트에는 메타만 싣는다
+    return [{k: v for k, v in ps.items() if k != "text"} for ps in passages]
+
+
+@router.get("/stream")
+async def query_stream(
+    request: Request,
+    p: Dict[str, Any] = Depends(query_params),
+    adb: Optional[AsyncSession] = Depends(get_async_db),
+):
+    """
+    /query 의 streaming 버전 (text/event-stream).
+    DB 작업(검색, 그룹 지침 조회, answer cache 조회)은 모두 응답 시작 전에 끝내고 요청 세션을 반납한다.
+    generator 는 OpenAI stream 과 citation 계산만 한다. (인용 vector 조회 / answer cache 저장은 짧은 별도 세션)
+    """
+    req_id = getattr(request.state, "request_id", None)
+
+    search_debug: Dict[str, Any] = {}
+    card = None
+    try:
+        prep = await _prepare(adb, p)
+        cached = prep["cached"]
+        if cached is None:
+            search_debug["answer_cache"] = _cache_status()
+            rows = await _search(adb, prep["qvec"], p, search_debug)
+            card_row = _fast_path_hit(rows, p["fast_path"])
+            card = await _card_answer(adb, card_row) if card_row else None
+    except LimitExceeded as e:
+        raise _busy(e)
+    # 이후 stream 동안 요청 세션(connection)을 잡고 있지 않는다
+    await _release_db(adb)
+
+    if cached is not None:
+        _log_usage(req_id, "query_stream", p, 0, None, note="answer_cache_hit", saved_tokens=cached["saved_tokens"])
+
+        async def _cached():
+            yield _sse("retrieval", {"passages": [], "debug": _cache_hit_debug(p, cached)})
+            yield _sse("token", {"text": cached["answer"]})
+            yield _sse("done", {"answer": cached["answer"], "citations": cached["citations"], "tokens": None, "cached": True})
+
+        return StreamingResponse(_cached(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+    used_k = len(rows)
+    if card is not None:
+        search_debug["fast_path"] = {"mode": p["fast_path"], **card["debug"]}
+
+    if card is not None and p["fast_path"] == "direct":
+        _log_usage(req_id, "query_stream", p, used_k, None, note="answer_card_fast_path")
+        debug = _debug_block(p, used_k, search_debug)
+
+        async def _card_only():
+            yield _sse("retrieval", {"passages": _passage_meta([to_passage(card_row)]), "debug": debug})
+            yield _sse("token", {"text": card["answer"]})
+            yield _sse("done", {"answer": card["answer"], "citations": card["citations"], "tokens": None})
+
+        return StreamingResponse(_card_only(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+    passage_vectors = None
+    if rows:
+        context, passages, search_debug["context"] = pack_context(rows, p["q"], model=CHAT_MODEL)
+        try:
+            passage_vectors = await _passage_vectors(p, passages)
+        except LimitExceeded as e:
+            raise _busy(e)
+    debug = _debug_block(p, used_k, search_debug)
+
+    if not rows:
+        _log_usage(req_id, "query_stream", p, 0, None, note="no_results")
+
+        async def _empty():
+            yield _sse("retrieval", {"passages": [], "debug": debug})
+            yield _sse("done", {"answer": NO_RESULTS_ANSWER, "citations": [], "tokens": None})
+
+        return StreamingResponse(_empty(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+    messages = _build_messages(prep["system_prompt"], p["q"], context)
+
+    async def _events():
+        started = time.perf_counter()
+        yield _sse("retrieval", {"passages": _passage_meta(passages), "debug": debug})
+        if card is not None:
+            # refine: 승인된 카드 답변을 먼저 보여 주고, 아래 LLM 답변이 이를 대체한다
+            yield _sse("card", {"answer": card["answer"], "citations": card["citations"]})
+
+        # 토큰 사이에서는 embedding 호출을 하지 않는다: 끝난 문장은 바로 lexical 로 인용하고,
+        # embedding 인용이면 stream 이 끝난 뒤 전체 문장을 한 번에 임베딩해 done 에서 다시 인용한다.
+        builder = CitationBuilder(passages)
+        sentence_texts: List[str] = []
+        annotated: List[str] = []
+        draft_parts: List[str] = []
+        buffer = ""
+        usage = None
+        first_token_ms = None
+
+        def _cite(sentences: List[str]) -> List[str]:
+            events = []
+            for sentence, (marked, citation, confidence) in zip(sentences, builder.cite_batch(sentences)):
+                sentence_texts.append(sentence)
+                annotated.append(marked)
+                events.append(_sse("citation", {
+                    "index": len(annotated) - 1,
+                    "sentence": sentence,
+                    "num": citation["num"] if citation else None,
+                    "confidence": confidence,
+                    "citation": citation,
+                }))
+            return events
+
+        try:
+            # streaming 은 마지막 chunk 까지 upstream 연결을 잡으므로 그동안 chat 슬롯을 유지한다
+            async with limits.limit("chat"):
+                stream = await client.chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=messages,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    # include_usage: 마지막 chunk 는 choices 가 비어 있고 usage 만 온다
+                    if getattr(chunk, "usage", None) is not None:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+                    draft_parts.append(delta)
+                    yield _sse("token", {"text": delta})
+
+                    buffer += delta
+                    sentences, buffer = pop_complete_sentences(buffer)
+                    for event in _cite(sentences):
+                        yield event
+        except LimitExceeded as e:
+            logger.error(f"[query_stream] {e}")
+            yield _sse("error", {"detail": f"서버가 혼잡합니다. 잠시 후 다시 시도해 주세요. ({e.name})"})
+            return
+        except Exception as e:
+            logger.error(f"[query_stream] OpenAI stream 실패: {e}")
+            yield _sse("error", {"detail": f"OpenAI 호출 실패: {e}"})
+            return
+
+        # 마지막 문장 (종결 부호 뒤 공백이 없어 아직 buffer 에 남은 것)
+        for event in _cite(split_sentences(buffer)):
+            yield event
+
+        answer, citations, methods = " ".join(annotated), builder.citations, builder.methods
+        if passage_vectors and sentence_texts:
+            # embedding 인용: 답변 문장 전체를 embedding 1회로 (실패하면 위 lexical 결과 유지)
+            sentence_vectors = await _sentence_vectors(sentence_texts)
+            if sentence_vectors is not None:
+                answer, citations, details = attach_citations_detailed(
+                    answer, passages, sentence_texts, passage_vectors, sentence_vectors
+                )
+                methods = [d["method"] for d in details]
+
+        draft = "".join(draft_parts).strip()
+        tokens = _usage_tokens(usage)
+        _log_usage(
+            req_id, "query_stream", p, used_k, tokens,
+            first_token_ms=first_token_ms,
+            prompt_tokens_saved=search_debug["context"]["tokens_saved"],
+        )
+        # done 의 answer / citations 가 최종본 (embedding 인용이면 citation 이벤트의 번호와 다를 수 있다)
+        yield _sse("done", {
+            "answer": answer or draft,
+            "citations": citations,
+            "cite": _cite_debug(p["cite_mode"], methods),
+            "tokens": tokens,
+            "first_token_ms": first_token_ms,
+        })
+        # 응답을 다 보낸 뒤 semantic answer cache 에 저장 (별도 세션)
+        await _store_answer(p, prep, rows, search_debug, answer or draft, citations, tokens)
+
+    return StreamingResponse(_events(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
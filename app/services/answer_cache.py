@@ -0,0 +1,261 @@
+# app/services/answer_cache.py
+"""
+/query semantic answer cache (semantic_answer_cache 테이블).
+
+- 같은 그룹(scope)에서 질문 임베딩 cosine similarity ≥ ANSWER_CACHE_MIN_SIMILARITY 인
+  이전 질문이 있고, 그 답변의 근거 passage 가 바뀌지 않았으면 검색 / LLM 호출 없이 저장된 답변을 쓴다.
+- 근거 passage 검증 (hit 직전, 후보 entry 마다):
+  - 문서 chunk: chunk 가 남아 있고 md5(text) 가 저장 시점과 같을 것 (재인덱스 / 삭제 → 불일치)
+  - answer card chunk: chunk text + card question / answer 해시 + status 가 같을 것
+  - Vertex 문서: 버전을 알 수 없으므로 ANSWER_CACHE_VERTEX_TTL_HOURS 동안만 유효
+  검증에 실패한 entry 는 바로 지운다.
+- settings_key: 검색 파라미터 + chat / embedding 모델 + 시스템 프롬프트(그룹 지침 포함)
+  + corpus generation(search_cache) 의 해시. 하나라도 다르면 다른 답변이므로 재사용하지 않는다.
+  → 문서 / 카드가 새로 추가 · 승인되면 (근거 passage 는 그대로여도) 이전 entry 는 더 이상 hit 하지 않는다.
+- hit 마다 원래 LLM 호출의 token 수를 saved_tokens 로 센다.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.answer import AnswerCard, AnswerChunk
+from app.models.answer_cache import SemanticAnswerCache
+from app.models.chunk import Chunk
+from app.services.search_cache import current_generation, scope_key
+from app.utils.debug_logger import log_debug, log_error, log_info
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE", "1") == "1"
+ANSWER_CACHE_MIN_SIMILARITY = float(os.getenv("ANSWER_CACHE_MIN_SIMILARITY", "0.95"))
+ANSWER_CACHE_MAX_AGE_HOURS = int(os.getenv("ANSWER_CACHE_MAX_AGE_HOURS", "168"))
+ANSWER_CACHE_VERTEX_TTL_HOURS = int(os.getenv("ANSWER_CACHE_VERTEX_TTL_HOURS", "24"))
+# threshold 를 넘는 후보 중 가까운 순으로 검증해 볼 개수
+ANSWER_CACHE_CANDIDATES = 3
+
+_lock = threading.Lock()
+_stats = {"lookups": 0, "hits": 0, "misses": 0, "stale": 0, "stores": 0, "saved_tokens": 0, "errors": 0}
+
+
+def _bump(**deltas: int) -> None:
+    with _lock:
+        for name, n in deltas.items():
+            _stats[name] += n
+
+
+def settings_key(**params: Any) -> str:
+    """검색 파라미터 / 모델 / 시스템 프롬프트 → entry 호환성 key"""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def corpus_generation(db: Session, group_id: Optional[Any]) -> Optional[int]:
+    """
+    settings_key 에 넣을 그룹 corpus generation (문서 / 카드 변경마다 증가).
+    검색 전에 읽어 두어야 검색 ~ 저장 사이의 변경도 다른 key 가 된다. 조회 실패 시 None → 캐시를 건너뛴다.
+    """
+    try:
+        return current_generation(db, group_id)
+    except Exception as e:
+        log_error(f"[AnswerCache] generation lookup failed: {e}")
+        db.rollback()
+        _bump(errors=1)
+        return None
+
+
+def _md5(text: str) -> str:
+    # Postgres md5(text) 와 같은 값 (UTF-8 DB)
+    return hashlib.md5((text or "").encode("utf-8")).hexdigest()
+
+
+def _source_ref(result: Dict[str, Any]) -> Dict[str, Any]:
+    src_type = result.get("source_type")
+    if src_type == "document":
+        return {"kind": "chunk", "id": result["chunk_id"]}
+    if src_type == "answer_card":
+        return {"kind": "answer_card", "id": result["chunk_id"]}
+    return {"kind": "vertex", "id": result.get("document_id")}
+
+
+def _current_versions(db: Session, refs: List[Dict[str, Any]]) -> Dict[str, str]:
+    """refs 의 현재 버전 ({"kind:id": version}). 없어진 passage 는 결과에 빠진다."""
+    chunk_ids = [r["id"] for r in refs if r["kind"] == "chunk"]
+    answer_chunk_ids = [r["id"] for r in refs if r["kind"] == "answer_card"]
+    versions: Dict[str, str] = {}
+    if chunk_ids:
+        rows = db.execute(
+            select(Chunk.id, func.md5(Chunk.text)).where(Chunk.id.in_(chunk_ids))
+        ).all()
+        versions.update({f"chunk:{cid}": digest for cid, digest in rows})
+    if answer_chunk_ids:
+        rows = db.execute(
+            select(
+                AnswerChunk.id,
+                func.md5(AnswerChunk.text),
+                # updated_at 은 카드 수정 시 갱신되지 않으므로 내용 자체를 해시한다
+                func.md5(AnswerCard.question + "\n" + AnswerCard.answer),
+                AnswerCard.status,
+            )
+            .join(AnswerCard, AnswerCard.id == AnswerChunk.answer_id)
+            .where(AnswerChunk.id.in_(answer_chunk_ids))
+        ).all()
+        versions.update({
+            f"answer_card:{cid}": f"{digest}:{card_digest}:{status}"
+            for cid, digest, card_digest, status in rows
+        })
+    return versions
+
+
+def _is_fresh(db: Session, sources: List[Dict[str, Any]], age_hours: float) -> bool:
+    if any(s["kind"] == "vertex" for s in sources) and age_hours > ANSWER_CACHE_VERTEX_TTL_HOURS:
+        return False
+    local = [s for s in sources if s["kind"] != "vertex"]
+    current = _current_versions(db, local)
+    return all(current.get(f"{s['kind']}:{s['id']}") == s["version"] for s in local)
+
+
+def lookup(
+    db: Session,
+    qvec: List[float],
+    group_id: Optional[Any],
+    key: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    반환: hit 이면 {"answer", "citations", "similarity", "question", "saved_tokens", "entry_id"}, 아니면 None
+    hit_count 갱신 / stale entry 삭제는 여기서 commit 한다.
+    """
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    _bump(lookups=1)
+    try:
+        distance = SemanticAnswerCache.embedding.cosine_distance(qvec)
+        age_hours = func.extract("epoch", func.now() - SemanticAnswerCache.created_at) / 3600.0
+        rows = db.execute(
+            select(
+                SemanticAnswerCache.id,
+                SemanticAnswerCache.question,
+                SemanticAnswerCache.sources,
+                SemanticAnswerCache.answer,
+                SemanticAnswerCache.citations,
+                SemanticAnswerCache.tokens,
+                (1 - distance).label("similarity"),
+                age_hours.label("age_hours"),
+            )
+            .where(
+                SemanticAnswerCache.scope == scope_key(group_id),
+                SemanticAnswerCache.settings_key == key,
+                distance <= 1.0 - ANSWER_CACHE_MIN_SIMILARITY,
+                SemanticAnswerCache.created_at
+                >= func.now() - func.make_interval(0, 0, 0, 0, ANSWER_CACHE_MAX_AGE_HOURS),
+            )
+            .order_by(distance)
+            .limit(ANSWER_CACHE_CANDIDATES)
+        ).mappings().all()
+
+        hit = None
+        stale = []
+        for row in rows:
+            if _is_fresh(db, row["sources"], float(row["age_hours"] or 0.0)):
+                hit = row
+                break
+            stale.append(row["id"])
+
+        if stale:
+            db.execute(
+                delete(SemanticAnswerCache)
+                .where(SemanticAnswerCache.id.in_(stale))
+                .execution_options(synchronize_session=False)
+            )
+        if hit is not None:
+            db.execute(
+                update(SemanticAnswerCache)
+                .where(SemanticAnswerCache.id == hit["id"])
+                .values(hit_count=SemanticAnswerCache.hit_count + 1, last_hit_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+    except Exception as e:
+        log_error(f"[AnswerCache] lookup failed: {e}")
+        db.rollback()
+        _bump(errors=1, misses=1)
+        return None
+
+    if hit is None:
+        _bump(misses=1, stale=len(stale))
+        log_debug(f"[AnswerCache] miss scope={scope_key(group_id)} candidates={len(rows)} stale={len(stale)}")
+        return None
+
+    saved = int((hit["tokens"] or {}).get("total") or 0)
+    _bump(hits=1, stale=len(stale), saved_tokens=saved)
+    log_info(f"[AnswerCache] hit scope={scope_key(group_id)} similarity={float(hit['similarity']):.4f}")
+    return {
+        "entry_id": str(hit["id"]),
+        "question": hit["question"],
+        "answer": hit["answer"],
+        "citations": hit["citations"],
+        "similarity": round(float(hit["similarity"]), 4),
+        "saved_tokens": saved,
+    }
+
+
+def store(
+    db: Session,
+    qvec: List[float],
+    question: str,
+    group_id: Optional[Any],
+    key: str,
+    results: List[Dict[str, Any]],
+    answer: str,
+    citations: List[Dict[str, Any]],
+    tokens: Optional[Dict[str, Any]],
+) -> bool:
+    """
+    LLM 답변 저장. 검색 이후 근거 passage 가 이미 바뀌었으면(동시 재인덱스 등) 저장하지 않는다.
+    반환: 저장 여부
+    """
+    if not ANSWER_CACHE_ENABLED or not results:
+        return False
+    try:
+        sources = [_source_ref(r) for r in results]
+        current = _current_versions(db, [s for s in sources if s["kind"] != "vertex"])
+        for source, result in zip(sources, results):
+            if source["kind"] == "vertex":
+                source["version"] = None
+                continue
+            version = current.get(f"{source['kind']}:{source['id']}")
+            # 검색에 쓴 text 와 지금 DB text 가 같아야 한다
+            if version is None or not version.startswith(_md5(result.get("text") or "")):
+                log_debug(f"[AnswerCache] skip store: {source['kind']} {source['id']} changed since retrieval")
+                return False
+            source["version"] = version
+
+        db.add(SemanticAnswerCache(
+            scope=scope_key(group_id),
+            settings_key=key,
+            question=question,
+            embedding=qvec,
+            sources=sources,
+            answer=answer,
+            citations=citations,
+            tokens=tokens,
+        ))
+        db.commit()
+    except Exception as e:
+        log_error(f"[AnswerCache] store failed: {e}")
+        db.rollback()
+        _bump(errors=1)
+        return False
+    _bump(stores=1)
+    return True
+
+
+def answer_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+    stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+    stats["enabled"] = ANSWER_CACHE_ENABLED
+    stats["min_similarity"] = ANSWER_CACHE_MIN_SIMILARITY
+    return stats
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.orm.attributes import flag_modified
 from app.models.answer import AnswerCard
 from app.services.guardrail import assess_risk
+from app.services.search_cache import bump_generation
 
 def create_answer_card(
     db: Session,
@@ -48,6 +49,7 @@ def create_answer_card(
         variants=[initial_variant]
     )
     db.add(card)
+    bump_generation(db, group_id)
     db.commit()
     db.refresh(card)
     return card
@@ -84,6 +86,7 @@ def add_variant(
     current_variants = list(card.variants) if card.variants else []
     current_variants.append(new_variant)
     card.variants = current_variants
+    bump_generation(db, card.group_id)
     
     db.commit()
     db.refresh(card)
@@ -118,6 +121,7 @@ def approve_answer_card(
                 break
         card.variants = variants
 
+    bump_generation(db, card.group_id)
     db.commit()
     db.refresh(card)
     return card
\ No newline at end of file
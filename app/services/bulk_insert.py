@@ -0,0 +1,178 @@
+# app/services/bulk_insert.py
+"""
+chunk / answer_chunk 대량 INSERT.
+
+ORM(db.add 반복)은 row 마다 INSERT 한 번 + 1536-float 벡터 literal 을 만든다.
+인덱싱처럼 한 번에 수백~수천 row 를 넣는 경로는 여기를 쓴다.
+
+method
+- copy:     psycopg(3) → COPY ... FROM STDIN (FORMAT BINARY), 벡터는 pgvector binary dumper
+            pg8000     → COPY ... FROM STDIN (text format, stream) — pg8000 은 binary COPY 를 못 쓴다
+            그 밖의 driver 는 multirow 로 대체
+- multirow: INSERT ... VALUES (...), (...), ... 를 BULK_INSERT_BATCH row 씩
+- orm:      db.add_all (비교 / 디버깅용)
+- auto:     copy
+
+호출한 쪽 세션의 트랜잭션 안에서 실행된다 (commit 은 호출한 쪽).
+"""
+import io
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import Integer, String, Text, insert
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+from pgvector.sqlalchemy import Vector
+
+from app.models.answer import AnswerChunk
+from app.models.chunk import Chunk
+from app.utils.debug_logger import log_debug
+
+BULK_INSERT_METHODS = ("auto", "copy", "multirow", "orm")
+BULK_INSERT_METHOD = os.getenv("BULK_INSERT_METHOD", "auto")
+BULK_INSERT_BATCH = int(os.getenv("BULK_INSERT_BATCH", "500"))
+
+
+def _columns(model, rows: List[Dict[str, Any]]) -> List[Any]:
+    # 테이블 컬럼 순서대로, rows 에 있는 컬럼만
+    return [c for c in model.__table__.columns if c.name in rows[0]]
+
+
+def _pg_type(column) -> str:
+    t = column.type
+    if isinstance(t, Vector):
+        return "vector"
+    if isinstance(t, PG_UUID):
+        return "uuid"
+    if isinstance(t, Integer):
+        return "int4"
+    if isinstance(t, (Text, String)):
+        return "text"
+    raise TypeError(f"bulk_insert: unsupported column type {t!r} ({column.name})")
+
+
+def _dbapi_connection(db: Session):
+    return db.connection().connection.dbapi_connection
+
+
+def _driver(dbapi_connection) -> str:
+    return type(dbapi_connection).__module__.split(".")[0]
+
+
+def _copy_sql(model, columns) -> str:
+    return f"COPY {model.__table__.name} ({', '.join(c.name for c in columns)}) FROM STDIN"
+
+
+def _binary_value(value: Any, pg_type: str) -> Any:
+    # binary dumper 는 타입을 엄격하게 본다 (uuid 는 UUID 객체, vector 는 ndarray)
+    if value is None:
+        return None
+    if pg_type == "vector":
+        return np.asarray(value, dtype=np.float32)
+    if pg_type == "uuid" and not isinstance(value, uuid.UUID):
+        return uuid.UUID(str(value))
+    return value
+
+
+def _copy_psycopg(dbapi_connection, model, columns, rows) -> None:
+    types = [_pg_type(c) for c in columns]
+    with dbapi_connection.cursor() as cur:
+        with cur.copy(_copy_sql(model, columns) + " WITH (FORMAT BINARY)") as copy:
+            copy.set_types(types)
+            for row in rows:
+                copy.write_row([_binary_value(row[c.name], t) for c, t in zip(columns, types)])
+
+
+def _text_field(value: Any, is_vector: bool) -> str:
+    if value is None:
+        return "\\N"
+    if is_vector:
+        return "[" + ",".join(map(str, np.asarray(value, dtype=np.float32).tolist())) + "]"
+    s = str(value)
+    return s.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _copy_pg8000(dbapi_connection, model, columns, rows) -> None:
+    is_vector = [isinstance(c.type, Vector) for c in columns]
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_text_field(row[c.name], v) for c, v in zip(columns, is_vector)))
+        buf.write("\n")
+    buf.seek(0)
+    cur = dbapi_connection.cursor()
+    try:
+        cur.execute(_copy_sql(model, columns), stream=buf)
+    finally:
+        cur.close()
+
+
+def _can_copy(dbapi_connection) -> Optional[str]:
+    driver = _driver(dbapi_connection)
+    if driver == "psycopg":
+        # binary COPY 는 pgvector dumper 가 등록된 커넥션에서만 (app/models/db.py connect listener)
+        return driver if dbapi_connection.adapters.types.get("vector") is not None else None
+    if driver == "pg8000":
+        return driver
+    return None
+
+
+def _multirow(db: Session, model, rows: List[Dict[str, Any]]) -> None:
+    table = model.__table__
+    for i in range(0, len(rows), BULK_INSERT_BATCH):
+        db.execute(insert(table).values(rows[i:i + BULK_INSERT_BATCH]))
+
+
+def bulk_insert(
+    db: Session,
+    model,
+    rows: List[Dict[str, Any]],
+    method: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    rows: 컬럼 이름 → 값 dict (모든 row 가 같은 key). embedding 은 list / ndarray.
+    반환: {"rows", "method"(실제 사용한 방식), "ms"}
+    """
+    method = method or BULK_INSERT_METHOD
+    if method not in BULK_INSERT_METHODS:
+        raise ValueError(f"bulk_insert: unknown method {method}")
+    if not rows:
+        return {"rows": 0, "method": method, "ms": 0.0}
+
+    started = time.perf_counter()
+    # 세션에 쌓인 ORM 변경(부모 document / answer_card 등)을 먼저 보낸다
+    db.flush()
+
+    used = method
+    if method in ("auto", "copy"):
+        dbapi_connection = _dbapi_connection(db)
+        driver = _can_copy(dbapi_connection)
+        columns = _columns(model, rows)
+        if driver == "psycopg":
+            _copy_psycopg(dbapi_connection, model, columns, rows)
+            used = "copy_binary"
+        elif driver == "pg8000":
+            _copy_pg8000(dbapi_connection, model, columns, rows)
+            used = "copy_text"
+        else:
+            _multirow(db, model, rows)
+            used = "multirow"
+    elif method == "multirow":
+        _multirow(db, model, rows)
+    else:
+        db.add_all(model(**row) for row in rows)
+        db.flush()
+
+    ms = round((time.perf_counter() - started) * 1000, 1)
+    log_debug(f"[BulkInsert] {model.__tablename__} rows={len(rows)} method={used} ms={ms}")
+    return {"rows": len(rows), "method": used, "ms": ms}
+
+
+def bulk_insert_chunks(db: Session, rows: List[Dict[str, Any]], method: Optional[str] = None) -> Dict[str, Any]:
+    return bulk_insert(db, Chunk, rows, method)
+
+
+def bulk_insert_answer_chunks(db: Session, rows: List[Dict[str, Any]], method: Optional[str] = None) -> Dict[str, Any]:
+    return bulk_insert(db, AnswerChunk, rows, method)
@@ -1,150 +1,168 @@
-from typing import List, Optional
-
-class RecursiveCharacterTextSplitter:
-    def __init__(
-        self,
-        chunk_size: int = 800,
-        chunk_overlap: int = 100,
-        separators: Optional[List[str]] = None,
-    ):
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
-        self.separators = separators or ["\n\n", "\n", " ", ""]
-
-    def split_text(self, text: str) -> List[str]:
-        """
-        재귀적으로 텍스트를 분할합니다.
-        """
-        final_chunks = []
-        separator = self.separators[-1]
-        
-        # 1. 적절한 구분자 찾기
-        for sep in self.separators:
-            if sep == "":
-                separator = sep
-                break
-            if sep in text:
-                separator = sep
-                break
-        
-        # 2. 구분자로 1차 분할
-        if separator:
-            splits = text.split(separator)
+# app/services/chunker.py
+"""
+페이지 텍스트 → 검색 / 임베딩용 chunk.
+
+- 크기는 tiktoken token 수 기준 (CHUNK_MAX_TOKENS), 인접 chunk 는 CHUNK_OVERLAP_TOKENS 만큼 겹친다.
+- 페이지마다 한 번만 encode 하고, token 경계마다 "자르기 좋은 정도"(문단 > 줄 > 문장 > 단어)를
+  미리 계산해 두어 chunk 끝 / overlap 시작을 O(1) 로 찾는다. → 페이지 길이에 선형, 재귀 / 재분할 없음
+- chunk 는 페이지를 넘지 않는다 (citation 이 page 단위). 페이지를 하나씩 처리하는 generator 라
+  큰 문서도 전체 chunk 를 한 번에 들고 있지 않아도 된다.
+- 각 chunk 는 페이지 텍스트 안의 [char_start, char_end) 를 함께 돌려준다 (text == page[char_start:char_end]).
+"""
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from app.utils.tokens import token_offsets
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+# chunk 가 이 비율보다 짧아지면서까지 좋은 경계를 찾지는 않는다 (그 전에 없으면 다음 등급 경계)
+CHUNK_MIN_FILL = float(os.getenv("CHUNK_MIN_FILL", "0.5"))
+# encoding 기준 model. None = cl100k_base (text-embedding-3-small 과 같은 encoding)
+CHUNK_TOKEN_MODEL = os.getenv("CHUNK_TOKEN_MODEL") or None
+# 예전 문자 기준 인자(max_chars / overlap) 환산 비율
+_LEGACY_CHARS_PER_TOKEN = 2
+
+# 경계 등급 (작을수록 자르기 좋은 곳)
+_PARAGRAPH, _LINE, _SENTENCE, _WORD, _ANY = 0, 1, 2, 3, 4
+_SENTENCE_END = np.array([ord(c) for c in ".?!。"], dtype=np.uint32)
+_SPACES = np.array([9, 10, 11, 12, 13, 32, 0x85, 0xA0, 0x3000, 0x2028, 0x2029, *range(0x2000, 0x200B)], dtype=np.uint32)
+_NEWLINE = 10
+
+
+def _boundary_ranks(text: str) -> np.ndarray:
+    """
+    문자 위치 p (text[p] 앞, p == len 은 끝) 마다 경계 등급. NumPy 로 한 번에 계산한다.
+    - 문단: "\\n\\n" 에 걸친 위치   - 줄: "\\n" 앞뒤
+    - 문장: 종결 부호(. ? ! 。) 뒤 공백 앞뒤   - 단어: 공백 앞뒤   - 나머지: 강제 분할
+    """
+    cp = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    n = len(cp)
+    space = np.isin(cp, _SPACES)
+    nl = cp == _NEWLINE
+    punct = np.isin(cp, _SENTENCE_END)
+    # p 기준 앞 글자 / 뒷 글자 (범위 밖은 줄바꿈으로 취급)
+    prev_space = np.concatenate(([True], space))
+    cur_space = np.concatenate((space, [True]))
+    prev_nl = np.concatenate(([True], nl))
+    cur_nl = np.concatenate((nl, [True]))
+    prev2_nl = np.concatenate(([True, True], nl))[: n + 1]
+    next_nl = np.concatenate((nl[1:], [True, True]))[: n + 1]
+    # p 앞에서 마지막 비공백 글자가 종결 부호인지
+    last_solid = np.maximum.accumulate(np.where(space, -1, np.arange(n)))
+    solid_punct = np.concatenate(([False], np.where(last_solid >= 0, punct[np.maximum(last_solid, 0)], False)))
+    prev_punct = np.concatenate(([False], punct))
+
+    ranks = np.full(n + 1, _ANY, dtype=np.int8)
+    ranks[prev_space | cur_space] = _WORD
+    ranks[(prev_space & solid_punct) | (prev_punct & cur_space)] = _SENTENCE
+    ranks[prev_nl | cur_nl] = _LINE
+    ranks[(prev2_nl & prev_nl) | (prev_nl & cur_nl) | (cur_nl & next_nl)] = _PARAGRAPH
+    return ranks
+
+
+def _nearest(mask: np.ndarray, before: bool) -> np.ndarray:
+    """before=True: i 이하에서 mask 가 참인 마지막 index (없으면 -1) / False: i 이상 첫 index (없으면 len)"""
+    idx = np.arange(len(mask))
+    if before:
+        return np.maximum.accumulate(np.where(mask, idx, -1))
+    return np.minimum.accumulate(np.where(mask, idx, len(mask))[::-1])[::-1]
+
+
+def _split_page(text: str, max_tokens: int, overlap_tokens: int, model: Optional[str]) -> Iterator[Dict]:
+    starts = token_offsets(text, model)
+    n = len(starts)
+    if n == 0:
+        return
+    # token i 앞 경계의 문자 offset (i == n 은 텍스트 끝)
+    offsets = starts + [len(text)]
+    ranks = _boundary_ranks(text)[offsets]
+    ranks[0] = _ANY
+    # 한 글자에 걸친 token 사이(같은 offset)에서는 자르지 않는다
+    ranks[1:n][np.diff(offsets[:n]) == 0] = _ANY
+
+    # last[r][i]: i 이하에서 등급 ≤ r 인 가장 가까운 경계 / next_[r][i]: i 이상에서 가장 가까운 경계
+    last = [_nearest(ranks <= r, before=True) for r in range(_WORD + 1)]
+    next_ = {r: _nearest(ranks <= r, before=False) for r in (_SENTENCE, _WORD)}
+
+    min_fill = max(1, int(max_tokens * CHUNK_MIN_FILL))
+    start = 0
+    while start < n:
+        limit = start + max_tokens
+        if limit >= n:
+            end = n
         else:
-            splits = list(text) # 글자 단위
-
-        # 3. 분할된 조각들을 병합하여 청크 생성
-        current_chunk = []
-        current_length = 0
-        
-        for split in splits:
-            split_len = len(split)
-            
-            # 현재 조각이 혼자서도 너무 크면 재귀적으로 더 쪼갬
-            if split_len > self.chunk_size:
-                # 현재까지 모은거 먼저 저장
-                if current_chunk:
-                    doc = self._join_docs(current_chunk, separator)
-                    final_chunks.append(doc)
-                    current_chunk = []
-                    current_length = 0
-                
-                # 재귀 호출 (다음 구분자 사용)
-                # 현재 구분자가 separator였으니, 그 다음 우선순위 구분자들을 사용하여 쪼갬
-                next_separators = self.separators[self.separators.index(separator) + 1 :] if separator in self.separators else []
-                
-                # 만약 더 이상 쪼갤 구분자가 없으면 강제로 자름 (문자 단위 등)
-                if not next_separators:
-                     # 여기서는 간단히 강제 분할하거나 그대로 둠. 
-                     # Recursive 로직상 ""(empty string)이 마지막에 있으므로 
-                     # 문자 단위로 쪼개져서 들어올 것임.
-                     final_chunks.append(split)
-                else:
-                    sub_splitter = RecursiveCharacterTextSplitter(
-                        chunk_size=self.chunk_size,
-                        chunk_overlap=self.chunk_overlap,
-                        separators=next_separators
-                    )
-                    final_chunks.extend(sub_splitter.split_text(split))
-                continue
-
-            # 병합 시도
-            # separator 길이도 고려해야 함 (join할 때 붙으니까)
-            sep_len = len(separator) if current_chunk else 0
-            
-            if current_length + split_len + sep_len > self.chunk_size:
-                # 꽉 찼으면 저장
-                doc = self._join_docs(current_chunk, separator)
-                final_chunks.append(doc)
-                
-                # 오버랩 처리 (단순화: 오버랩만큼 뒤에서부터 가져오기에는 구조가 복잡하므로
-                # 여기서는 오버랩 로직을 엄밀하게 구현하기보다, 
-                # LangChain 스타일의 '이전 청크의 끝부분을 포함'하는 방식은 
-                # 리스트 병합 방식에서 까다로움.
-                # 대신, 간단히 '새 청크 시작'으로 처리하거나, 
-                # 필요하면 sliding window 방식을 써야 함.
-                # 
-                # 이 구현에서는 '의미 단위 보존'에 집중하여 오버랩은 
-                # "이전 청크의 마지막 일부를 가져오는" 복잡한 로직 대신
-                # 단순히 끊어내고 새로 시작하되, 문맥이 끊기지 않도록 
-                # 구분자 단위로 잘린 것을 믿음.
-                # 
-                # *수정*: 오버랩을 제대로 하려면 sliding window가 필요함.
-                # 하지만 RecursiveSplitter의 핵심은 "큰 덩어리를 쪼개는 것"임.
-                # 병합 단계에서 overlap을 고려하여 current_chunk를 비울 때 일부 남기는 식으로 구현 가능.
-                
-                # 오버랩 적용:
-                # current_chunk의 뒤에서부터 overlap 길이만큼 남기고 버림?
-                # 텍스트 길이가 아니라 토큰/글자 수 기준이라 애매함.
-                # 여기서는 일단 오버랩 없이 깔끔하게 자르는 버전으로 구현 (복잡도 관리)
-                # *사용자 요구사항*: "단순하면 문제점... 개선"
-                # -> 오버랩도 있으면 좋음.
-                
-                # 오버랩 로직 추가:
-                # current_chunk를 비우기 전에, 마지막 몇 개 요소를 다음 청크의 시작으로 넘김?
-                # 정확한 글자수 계산이 필요함.
-                
-                # (간소화) 일단 비우고 새로 시작.
-                current_chunk = [split]
-                current_length = split_len
-            else:
-                current_chunk.append(split)
-                current_length += split_len + sep_len
-        
-        # 남은거 처리
-        if current_chunk:
-            doc = self._join_docs(current_chunk, separator)
-            final_chunks.append(doc)
-            
-        return final_chunks
-
-    def _join_docs(self, docs: List[str], separator: str) -> str:
-        text = separator.join(docs)
-        return text.strip()
-
-
-def chunk_pages(pages: List[str], max_chars=800, overlap=100) -> List[dict]:
+            end = limit  # 좋은 경계가 없으면 token 에서 강제로 자른다
+            for r in range(_WORD + 1):
+                j = int(last[r][limit])
+                if j >= start + min_fill:
+                    end = j
+                    break
+
+        cs, ce = offsets[start], offsets[end]
+        # 앞뒤 공백은 offset 째로 제외
+        while cs < ce and text[cs].isspace():
+            cs += 1
+        while ce > cs and text[ce - 1].isspace():
+            ce -= 1
+        if ce > cs:
+            yield {"text": text[cs:ce], "char_start": cs, "char_end": ce, "tokens": end - start}
+
+        if end >= n:
+            break
+        # overlap: end 에서 overlap_tokens 만큼 되돌아가되, 가능하면 문장 / 단어 시작에서 시작
+        next_start = end - overlap_tokens
+        if overlap_tokens <= 0 or next_start <= start:
+            start = end
+            continue
+        for r in (_SENTENCE, _WORD):
+            j = int(next_[r][next_start])
+            if j <= end - overlap_tokens // 2:
+                next_start = j
+                break
+        start = next_start
+
+
+def iter_chunks(
+    pages: Iterable[str],
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+) -> Iterator[Dict]:
     """
-    기존 인터페이스 호환 함수.
-    pages: 페이지별 텍스트 리스트
-    반환: [{"page": 1, "text": "..."}]
+    페이지를 하나씩 받아 chunk 를 바로 내보낸다.
+    yield: {"page", "text", "char_start", "char_end", "tokens"}
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=max_chars,
-        chunk_overlap=overlap,
-        separators=["\n\n", "\n", ". ", " ", ""] # 우선순위
-    )
-    
-    chunks = []
+    max_tokens = max_tokens or CHUNK_MAX_TOKENS
+    overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    # overlap 이 chunk 의 절반 이상이면 진행이 너무 느려진다
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+    model = model or CHUNK_TOKEN_MODEL
     for page_idx, text in enumerate(pages, start=1):
-        if not text.strip():
+        if not text or not text.strip():
             continue
-            
-        # 페이지 단위로 스플리팅
-        page_chunks = splitter.split_text(text)
-        
-        for c_text in page_chunks:
-            if c_text.strip():
-                chunks.append({"page": page_idx, "text": c_text})
-                
-    return chunks
+        for chunk in _split_page(text, max_tokens, overlap_tokens, model):
+            chunk["page"] = page_idx
+            yield chunk
+
+
+def chunk_pages(
+    pages: List[str],
+    max_chars: Optional[int] = None,
+    overlap: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+) -> List[dict]:
+    """
+    기존 인터페이스 호환 함수.
+    pages: 페이지별 텍스트 리스트
+    반환: [{"page": 1, "text": "...", "char_start": 0, "char_end": 812, "tokens": 400}]
+    max_chars / overlap (예전 문자 기준 인자)을 주면 ≈ 2 글자 / token 으로 환산한다.
+    """
+    if max_tokens is None and max_chars:
+        max_tokens = max(1, max_chars // _LEGACY_CHARS_PER_TOKEN)
+    if overlap_tokens is None and overlap is not None:
+        overlap_tokens = overlap // _LEGACY_CHARS_PER_TOKEN
+    return list(iter_chunks(pages, max_tokens=max_tokens, overlap_tokens=overlap_tokens))
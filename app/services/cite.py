@@ -1,9 +1,38 @@
 # app/services/cite.py
+import os
 import re
-from typing import List, Dict, Tuple
-from rapidfuzz import fuzz
+from typing import List, Dict, Tuple, Optional
 
-_SENT_SPLIT = re.compile(r'(?<=[\.\?\!])\s+')
+import numpy as np
+from rapidfuzz import fuzz, process
+from sqlalchemy.orm import Session
+
+from app.models.answer import AnswerChunk
+from app.models.chunk import Chunk
+from app.utils.vector_codec import load_embeddings
+
+# cdist worker thread 수 (-1 = 모든 core). 작은 행렬은 rapidfuzz 가 알아서 단일 thread 로 처리한다.
+CITE_WORKERS = int(os.getenv("CITE_WORKERS", "-1"))
+
+# 인용 방식
+# - lexical:   문장 × passage partial_ratio
+# - embedding: 답변 문장을 한 번에 임베딩해서 passage 의 저장된 embedding 과 cosine 비교.
+#              best cosine 이 CITE_EMBED_MIN_SIMILARITY 미만이거나 embedding 이 없는 passage(Vertex)만
+#              남는 문장은 lexical 로 대체한다.
+CITE_MODES = ("lexical", "embedding")
+CITE_MODE = os.getenv("CITE_MODE", "lexical")
+CITE_EMBED_MIN_SIMILARITY = float(os.getenv("CITE_EMBED_MIN_SIMILARITY", "0.45"))
+
+# 문장 경계
+# - 종결 부호(. ? ! 。) 뒤 공백
+# - 한국어 종결 어미(다/요/죠/까) + 마침표 뒤에 공백 없이 바로 다음 문장이 붙은 경우 ("수행한다.다음은")
+#   (숫자 / 마침표가 이어지면 소수점·말줄임표로 보고 자르지 않는다)
+# - 줄바꿈
+_SENT_SPLIT = re.compile(
+    r'(?<=[\.\?\!。])\s+'
+    r'|(?<=[다요죠까]\.)(?=[^\s\d\.])'
+    r'|\s*\n\s*'
+)
 
 def split_sentences(text: str) -> List[str]:
     s = text.strip()
@@ -11,46 +40,182 @@ def split_sentences(text: str) -> List[str]:
         return []
     return [t.strip() for t in _SENT_SPLIT.split(s) if t.strip()]
 
-def attach_citations(answer: str, passages: List[Dict]) -> Tuple[str, List[Dict]]:
+def pop_complete_sentences(buffer: str) -> Tuple[List[str], str]:
     """
-    passages: [{document_id, page, text, title, ...}]
-    각 문장에 best passage를 매핑하여 [n]을 삽입.
-    citations: 고유 (document_id, page) 순서대로 부여.
+    스트리밍 중인 텍스트 buffer 에서 끝난 문장들만 떼어낸다.
+    반환: (완결된 문장 목록, 아직 끝나지 않은 나머지)
+    """
+    last = None
+    for m in _SENT_SPLIT.finditer(buffer):
+        last = m
+    if last is None:
+        return [], buffer
+    return split_sentences(buffer[:last.start()]), buffer[last.end():]
+
+
+def score_matrix(sentences: List[str], passage_texts: List[str]) -> np.ndarray:
+    """
+    (문장 수 × passage 수) partial_ratio 점수 행렬 (0~100).
+    rapidfuzz.process.cdist 가 C++ 에서 CITE_WORKERS 개 thread 로 한 번에 계산한다.
+    """
+    if not sentences or not passage_texts:
+        return np.zeros((len(sentences), len(passage_texts)), dtype=np.float32)
+    return process.cdist(
+        sentences,
+        passage_texts,
+        scorer=fuzz.partial_ratio,
+        dtype=np.float32,
+        workers=CITE_WORKERS,
+    )
+
+
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def load_passage_vectors(db: Session, passages: List[Dict]) -> List[Optional[np.ndarray]]:
+    """
+    검색 때 이미 저장된 passage embedding (chunk / answer_chunk) 을 vector_send() 로 읽는다.
+    반환: passages 순서대로 ndarray, embedding 이 없는 passage(Vertex 등)는 None
+    """
+    ids = {"document": [], "answer_card": []}
+    for p in passages:
+        if p.get("chunk_id") and p.get("source_type") in ids:
+            ids[p["source_type"]].append(p["chunk_id"])
+    vectors = {
+        **{("document", k): v for k, v in load_embeddings(db, Chunk, ids["document"]).items()},
+        **{("answer_card", k): v for k, v in load_embeddings(db, AnswerChunk, ids["answer_card"]).items()},
+    }
+    return [vectors.get((p.get("source_type"), str(p.get("chunk_id")))) for p in passages]
+
+
+class CitationBuilder:
     """
-    sentences = split_sentences(answer)
-    # citation 번호 매핑
-    key_to_num = {}
-    citations = []
-    def get_num(doc_id, page, title, snippet):
+    문장 단위로 best passage 를 골라 [n] 을 붙인다.
+    citation 번호는 고유 (document_id, page) 가 처음 인용된 순서대로 부여.
+    스트리밍 응답에서는 문장이 끝날 때마다 cite_batch() 를 호출한다.
+    passage_vectors 를 주면 cite_batch(sentences, sentence_vectors) 가 embedding 으로 먼저 고른다.
+    """
+
+    def __init__(self, passages: List[Dict], passage_vectors: Optional[List[Optional[np.ndarray]]] = None):
+        self.passages = passages
+        self._texts = [p["text"] for p in passages]
+        self.key_to_num: Dict[Tuple, int] = {}
+        self.citations: List[Dict] = []
+        # embedding 이 있는 passage 만 (index, 정규화된 행렬)
+        self._vec_idx: List[int] = []
+        self._vec_mat: Optional[np.ndarray] = None
+        if passage_vectors:
+            self._vec_idx = [i for i, v in enumerate(passage_vectors) if v is not None]
+            if self._vec_idx:
+                self._vec_mat = _normalize_rows(
+                    np.vstack([passage_vectors[i] for i in self._vec_idx]).astype(np.float32)
+                )
+        # 인용한 문장 순서대로 고른 방식 ("embedding" | "lexical")
+        self.methods: List[str] = []
+
+    @property
+    def has_vectors(self) -> bool:
+        return self._vec_mat is not None
+
+    def _get_num(self, doc_id, page, title, snippet, char_start=None, char_end=None) -> int:
         key = (doc_id, page)
-        if key not in key_to_num:
-            key_to_num[key] = len(key_to_num) + 1
-            citations.append({
-                "num": key_to_num[key],
+        if key not in self.key_to_num:
+            self.key_to_num[key] = len(self.key_to_num) + 1
+            citation = {
+                "num": self.key_to_num[key],
                 "document_id": str(doc_id),
                 "page": int(page),
                 "title": title,
                 "snippet": (snippet[:240] + "…") if len(snippet) > 240 else snippet
-            })
-        return key_to_num[key]
-
-    # 간단한 lex 매칭으로 best passage 고르기
-    best_idx = []
-    for s in sentences:
-        bscore, bidx = -1, -1
-        for i, p in enumerate(passages):
-            score = fuzz.partial_ratio(s, p["text"])
-            if score > bscore:
-                bscore, bidx = score, i
-        best_idx.append(bidx)
-
-    # 문장 뒤에 [n] 삽입
-    out_parts = []
-    for s, i in zip(sentences, best_idx):
-        if i == -1:
-            out_parts.append(s)
-            continue
-        p = passages[i]
-        n = get_num(p["document_id"], p["page"], p.get("title",""), p.get("text",""))
-        out_parts.append(f"{s} [{n}]")
-    return (" ".join(out_parts), citations)
+            }
+            if char_start is not None:
+                # 페이지 원문 안의 snippet 위치 (뷰어 하이라이트용)
+                citation["char_start"], citation["char_end"] = char_start, char_end
+            self.citations.append(citation)
+        return self.key_to_num[key]
+
+    def _pick(
+        self,
+        sentences: List[str],
+        sentence_vectors: Optional[List[List[float]]],
+    ) -> List[Tuple[int, float, str]]:
+        """문장별 (passage index, confidence 0~1, "embedding" | "lexical")"""
+        picks: List[Optional[Tuple[int, float, str]]] = [None] * len(sentences)
+        if self._vec_mat is not None and sentence_vectors is not None and len(sentence_vectors) == len(sentences):
+            # (문장 × passage) cosine 을 행렬곱 한 번으로
+            sims = _normalize_rows(np.asarray(sentence_vectors, dtype=np.float32)) @ self._vec_mat.T
+            best = sims.argmax(axis=1)
+            for i in range(len(sentences)):
+                sim = float(sims[i, best[i]])
+                if sim >= CITE_EMBED_MIN_SIMILARITY:
+                    picks[i] = (self._vec_idx[int(best[i])], round(sim, 3), "embedding")
+
+        fallback = [i for i, pick in enumerate(picks) if pick is None]
+        if fallback:
+            scores = score_matrix([sentences[i] for i in fallback], self._texts)
+            best = scores.argmax(axis=1)  # 동점이면 앞(검색 순위가 높은) passage
+            for row, i in enumerate(fallback):
+                picks[i] = (int(best[row]), round(float(scores[row, best[row]]) / 100.0, 3), "lexical")
+        return picks
+
+    def cite_batch(
+        self,
+        sentences: List[str],
+        sentence_vectors: Optional[List[List[float]]] = None,
+    ) -> List[Tuple[str, Optional[Dict], Optional[float]]]:
+        """
+        반환: 문장별 ([n] 이 붙은 문장, citation dict 또는 None, confidence 0~1 또는 None)
+        confidence = embedding 으로 골랐으면 cosine similarity, 아니면 partial_ratio / 100
+        """
+        if not self.passages:
+            return [(s, None, None) for s in sentences]
+        out = []
+        for sentence, (idx, confidence, method) in zip(sentences, self._pick(sentences, sentence_vectors)):
+            p = self.passages[idx]
+            n = self._get_num(
+                p["document_id"], p["page"], p.get("title",""), p.get("text",""),
+                p.get("char_start"), p.get("char_end"),
+            )
+            self.methods.append(method)
+            out.append((f"{sentence} [{n}]", self.citations[n - 1], confidence))
+        return out
+
+    def cite(self, sentence: str) -> Tuple[str, Optional[Dict], Optional[float]]:
+        return self.cite_batch([sentence])[0]
+
+
+def attach_citations_detailed(
+    answer: str,
+    passages: List[Dict],
+    sentences: Optional[List[str]] = None,
+    passage_vectors: Optional[List[Optional[np.ndarray]]] = None,
+    sentence_vectors: Optional[List[List[float]]] = None,
+) -> Tuple[str, List[Dict], List[Dict]]:
+    """
+    attach_citations + 문장별 결과.
+    embedding 인용: sentences(= split_sentences(answer)) 와 그 embedding, passage_vectors 를 함께 준다.
+    반환: (annotated, citations, [{"sentence", "num", "confidence", "method"}])
+    """
+    builder = CitationBuilder(passages, passage_vectors)
+    if sentences is None:
+        sentences = split_sentences(answer)
+    cited = builder.cite_batch(sentences, sentence_vectors)
+    methods = builder.methods or [None] * len(sentences)
+    details = [
+        {"sentence": s, "num": c["num"] if c else None, "confidence": conf, "method": m}
+        for s, (_, c, conf), m in zip(sentences, cited, methods)
+    ]
+    return " ".join(marked for marked, _, _ in cited), builder.citations, details
+
+
+def attach_citations(answer: str, passages: List[Dict]) -> Tuple[str, List[Dict]]:
+    """
+    passages: [{document_id, page, text, title, ...}]
+    각 문장에 best passage를 매핑하여 [n]을 삽입.
+    citations: 고유 (document_id, page) 순서대로 부여.
+    """
+    answered, citations, _ = attach_citations_detailed(answer, passages)
+    return answered, citations
@@ -0,0 +1,164 @@
+# app/services/context.py
+"""
+/query LLM context packer.
+
+검색 결과(rows)를 token 예산 안에 들어가는 context 문자열로 만든다.
+1) 순서: 승인된 팀 정답 카드(answer_card, status=approved) → 나머지는 검색 점수 순
+2) dedupe: 이미 넣은 passage 와 거의 같은 passage 는 버리고,
+   겹치는 chunk(overlap) 는 이미 나온 문장을 빼고 남은 문장만 쓴다
+3) trim: CONTEXT_PASSAGE_MAX_TOKENS 를 넘는 문서 passage 는 질문과 관련 높은 문장만 남긴다 (원래 순서 유지)
+4) pack: CONTEXT_MAX_TOKENS 까지 채우고, 남은 예산이 모자라면 그 passage 도 문장 단위로 잘라 넣는다
+token 수는 tiktoken(chat 모델 encoding)으로 센다.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from rapidfuzz import fuzz
+
+from app.services.cite import split_sentences
+from app.utils.semantic_hash import normalize_text
+from app.utils.tokens import count_tokens
+
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+CONTEXT_PASSAGE_MAX_TOKENS = int(os.getenv("CONTEXT_PASSAGE_MAX_TOKENS", "400"))
+# 0~100 (rapidfuzz ratio). 이 이상이면 같은 passage 로 본다
+CONTEXT_DEDUPE_RATIO = float(os.getenv("CONTEXT_DEDUPE_RATIO", "90"))
+# 예산 끝에서 잘라 넣을 때 최소 남은 token (이보다 적으면 더 넣지 않는다)
+CONTEXT_MIN_REMAINDER_TOKENS = 40
+
+_LINE_SPLIT = re.compile(r"\n+")
+
+
+def _header(row: Dict[str, Any]) -> str:
+    if row["source_type"] == "answer_card":
+        return f"[팀 정답 카드] {row['title']}"
+    return f"[문서] {row['title']} (page {row['page']})"
+
+
+def _is_approved_card(row: Dict[str, Any]) -> bool:
+    return row["source_type"] == "answer_card" and (row.get("metadata") or {}).get("status") == "approved"
+
+
+def _sentences(text: str) -> List[str]:
+    out: List[str] = []
+    for line in _LINE_SPLIT.split(text or ""):
+        out.extend(split_sentences(line))
+    return out
+
+
+def _relevance(question: str, sentence: str) -> float:
+    return fuzz.token_set_ratio(question, sentence)
+
+
+def _fit_sentences(
+    sentences: List[str],
+    question: str,
+    max_tokens: int,
+    model: Optional[str],
+) -> List[str]:
+    """질문 관련도 높은 문장부터 max_tokens 까지 고른 뒤 원래 순서로 돌려준다."""
+    costs = [count_tokens(s, model) for s in sentences]
+    ranked = sorted(range(len(sentences)), key=lambda i: _relevance(question, sentences[i]), reverse=True)
+    picked, used = set(), 0
+    for i in ranked:
+        if used + costs[i] <= max_tokens:
+            picked.add(i)
+            used += costs[i]
+    return [sentences[i] for i in sorted(picked)]
+
+
+def to_passage(row: Dict[str, Any]) -> Dict[str, Any]:
+    # cite 용 passage: 인용 snippet 은 잘리지 않은 원문으로
+    doc_id = row["document_id"]
+    answer_id = row["answer_id"]
+    pseudo_doc_id = str(doc_id or answer_id) if (doc_id or answer_id) else None
+    return {
+        "document_id": pseudo_doc_id,
+        "page": row["page"],
+        "char_start": row.get("char_start"),
+        "char_end": row.get("char_end"),
+        "text": row["text"],
+        "title": row["title"],
+        "source_type": row["source_type"],
+        "chunk_id": row.get("chunk_id"),  # embedding 인용 시 저장된 vector 조회용 (Vertex 는 None)
+        "raw_document_id": str(doc_id) if doc_id else None,
+        "answer_id": str(answer_id) if answer_id else None,
+        "score": float(row["final_score"]),
+    }
+
+
+def pack_context(
+    rows: List[Dict[str, Any]],
+    question: str,
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    반환: (context 문자열, context 에 들어간 passage 목록(cite 용), stats)
+    stats.tokens_saved = 예전 방식(전체 원문 이어붙이기) 대비 줄어든 context token 수
+    """
+    budget = max_tokens or CONTEXT_MAX_TOKENS
+    ordered = sorted(range(len(rows)), key=lambda i: (not _is_approved_card(rows[i]), i))
+
+    raw_tokens = count_tokens("\n".join(f"{_header(r)}\n{r['text']}\n" for r in rows), model)
+
+    parts: List[str] = []
+    passages: List[Dict[str, Any]] = []
+    kept_texts: List[str] = []
+    seen_sentences = set()
+    used = 0
+    stats = {"deduped": 0, "trimmed": 0, "dropped": 0}
+
+    for i in ordered:
+        row = rows[i]
+        text = row["text"] or ""
+
+        # 1) 거의 같은 passage
+        if any(fuzz.ratio(text, kept) >= CONTEXT_DEDUPE_RATIO for kept in kept_texts):
+            stats["deduped"] += 1
+            continue
+
+        # 2) overlap: 이미 context 에 나온 문장 제거
+        sentences = [s for s in _sentences(text) if normalize_text(s) not in seen_sentences]
+        if not sentences:
+            stats["deduped"] += 1
+            continue
+
+        header = _header(row)
+        header_tokens = count_tokens(header, model) + 2
+        remaining = budget - used - header_tokens
+        if remaining < CONTEXT_MIN_REMAINDER_TOKENS and passages:
+            stats["dropped"] += 1
+            continue
+
+        # 3) 긴 문서 passage 는 관련 문장만 (정답 카드는 예산이 허락하는 한 원문 유지)
+        limit = remaining if _is_approved_card(row) else min(remaining, CONTEXT_PASSAGE_MAX_TOKENS)
+        body = " ".join(sentences)
+        body_tokens = count_tokens(body, model)
+        if body_tokens > limit:
+            sentences = _fit_sentences(sentences, question, limit, model)
+            if not sentences:
+                stats["dropped"] += 1
+                continue
+            body = " ".join(sentences)
+            body_tokens = count_tokens(body, model)
+            stats["trimmed"] += 1
+
+        parts.append(f"{header}\n{body}\n")
+        passages.append(to_passage(row))
+        kept_texts.append(text)
+        seen_sentences.update(normalize_text(s) for s in sentences)
+        used += header_tokens + body_tokens
+
+    context = "\n".join(parts)
+    packed_tokens = count_tokens(context, model)
+    stats.update({
+        "budget": budget,
+        "passages_in": len(rows),
+        "passages_out": len(passages),
+        "tokens_raw": raw_tokens,
+        "tokens_packed": packed_tokens,
+        "tokens_saved": max(0, raw_tokens - packed_tokens),
+    })
+    return context, passages, stats
@@ -1,11 +1,121 @@
 import os
-from openai import OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
-EMBED_MODEL = "text-embedding-3-small"  # 1536 dim
+from app.services.embed_providers import make_provider
+from app.utils.debug_logger import log_debug, log_info
+from app.utils.tokens import count_tokens_batch, truncate_tokens
 
-from typing import List
+# EMBED_PROVIDER=openai (기본) | local (offline 결정적 임베딩)
+provider = make_provider()
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
-    resp = client.embeddings.create(model=EMBED_MODEL, input=texts)
-    return [d.embedding for d in resp.data]
+EMBED_MODEL = provider.model  # openai: text-embedding-3-small (1536 dim)
+
+# ---------------------------------------------------------
+# Batching limits (ENV override)
+# - provider 제한: 요청당 입력 2048개, 입력당 8191 tokens, 요청당 300k tokens
+# - 요청당 token 상한을 provider 제한보다 낮게 잡아 큰 문서도 여러 batch 로 나눠 동시에 보낸다
+# ---------------------------------------------------------
+EMBED_MAX_BATCH_INPUTS = int(os.getenv("EMBED_MAX_BATCH_INPUTS", "256"))
+EMBED_MAX_BATCH_TOKENS = int(os.getenv("EMBED_MAX_BATCH_TOKENS", "60000"))
+EMBED_MAX_INPUT_TOKENS = int(os.getenv("EMBED_MAX_INPUT_TOKENS", "8191"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+
+_executor = ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY, thread_name_prefix="embed")
+
+
+def plan_batches(
+    token_counts: List[int],
+    max_inputs: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    입력 순서를 유지한 채 (입력 수 ≤ max_inputs, token 합 ≤ max_tokens) 인 batch 로 나눈다.
+    (기본값: EMBED_MAX_BATCH_INPUTS / EMBED_MAX_BATCH_TOKENS)
+    반환: batch 별 입력 index 목록
+    """
+    max_inputs = max_inputs or EMBED_MAX_BATCH_INPUTS
+    max_tokens = max_tokens or EMBED_MAX_BATCH_TOKENS
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, n in enumerate(token_counts):
+        if current and (len(current) >= max_inputs or current_tokens + n > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _embed_batch(texts: List[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    vectors, tokens = provider.embed_batch(texts)
+    return {
+        "vectors": vectors,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "tokens": tokens,
+    }
+
+
+def embed_texts(texts: List[str], metrics: Optional[Dict[str, Any]] = None) -> List[List[float]]:
+    """
+    texts 를 token-aware batch 로 나눠 최대 EMBED_CONCURRENCY 개씩 동시에 임베딩한다.
+    출력 순서는 입력 순서와 같다.
+    - EMBED_MAX_INPUT_TOKENS 를 넘는 입력은 앞부분만 남기고 자른다.
+    - metrics 에 dict 를 넘기면 batch 별 latency / token 수를 채워 준다.
+    """
+    if not texts:
+        return []
+
+    started = time.perf_counter()
+    token_counts = count_tokens_batch(texts, EMBED_MODEL)
+    inputs = list(texts)
+    truncated = 0
+    for i, n in enumerate(token_counts):
+        if n > EMBED_MAX_INPUT_TOKENS:
+            inputs[i] = truncate_tokens(inputs[i], EMBED_MAX_INPUT_TOKENS, EMBED_MODEL)
+            token_counts[i] = EMBED_MAX_INPUT_TOKENS
+            truncated += 1
+
+    batches = plan_batches(token_counts)
+    if len(batches) == 1:
+        outcomes = [_embed_batch(inputs)]
+    else:
+        futures = [_executor.submit(_embed_batch, [inputs[i] for i in idx]) for idx in batches]
+        outcomes = [f.result() for f in futures]
+
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    batch_stats = []
+    for idx, outcome in zip(batches, outcomes):
+        for i, vec in zip(idx, outcome["vectors"]):
+            vectors[i] = vec
+        stats = {
+            "inputs": len(idx),
+            "tokens_est": sum(token_counts[i] for i in idx),
+            "tokens": outcome["tokens"],
+            "ms": outcome["ms"],
+        }
+        batch_stats.append(stats)
+        log_debug(f"[Embed] batch {stats}")
+
+    summary = {
+        "inputs": len(texts),
+        "batches": len(batches),
+        "truncated": truncated,
+        "tokens": sum(s["tokens"] or s["tokens_est"] for s in batch_stats),
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "batch_stats": batch_stats,
+    }
+    # 질문 1건 같은 단일 batch 호출은 매 요청마다 오므로 debug, 대량 임베딩만 info
+    log = log_info if len(batches) > 1 or truncated or metrics is not None else log_debug
+    log(
+        f"[Embed] {summary['inputs']} inputs / {summary['batches']} batches / "
+        f"{summary['tokens']} tokens in {summary['ms']} ms (truncated={truncated})"
+    )
+    if metrics is not None:
+        metrics.update(summary)
+    return vectors
@@ -0,0 +1,246 @@
+# app/services/embed_cache.py
+"""
+질문 임베딩 캐시.
+
+- 1차: 프로세스 내 LRU (EMBED_CACHE_SIZE 개, float32 ndarray 로 보관)
+- 2차: Postgres embedding_cache 테이블 (Cloud Run 인스턴스 간 공유, EMBED_CACHE_DB=0 으로 끔)
+- miss 만 모아서 한 번의 embeddings 요청으로 보낸다.
+
+key 는 model + normalize_text(text) 의 sha256 이라
+공백/구두점/대소문자만 다른 질문은 같은 임베딩을 재사용한다.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.db import SessionLocal, AsyncSessionLocal
+from app.models.embedding_cache import EmbeddingCacheEntry
+from app.services import limits
+from app.services.embed import EMBED_MODEL, embed_texts
+from app.services.limits import LimitExceeded
+from app.utils.debug_logger import log_debug, log_error
+from app.utils.semantic_hash import normalize_text
+from app.utils.vector_codec import vector_bytes, decode_vector
+
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+EMBED_CACHE_DB = os.getenv("EMBED_CACHE_DB", "1") == "1"
+
+_lock = threading.Lock()
+_memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "db_errors": 0}
+
+
+def cache_key(text: str, model: str = EMBED_MODEL) -> str:
+    normalized = normalize_text(text) or text
+    return hashlib.sha256(f"{model}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+def _memory_get(keys: Iterable[str]) -> Dict[str, np.ndarray]:
+    found = {}
+    with _lock:
+        for key in keys:
+            vec = _memory.get(key)
+            if vec is not None:
+                _memory.move_to_end(key)
+                found[key] = vec
+    return found
+
+
+def _memory_put(items: Dict[str, np.ndarray]) -> None:
+    with _lock:
+        for key, vec in items.items():
+            _memory[key] = vec
+            _memory.move_to_end(key)
+        while len(_memory) > EMBED_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def _db_get_stmt(keys: List[str]):
+    return (
+        select(EmbeddingCacheEntry.key, vector_bytes(EmbeddingCacheEntry.embedding))
+        .where(EmbeddingCacheEntry.key.in_(keys))
+    )
+
+
+def _db_put_stmt(items: Dict[str, np.ndarray], model: str):
+    return pg_insert(EmbeddingCacheEntry).values(
+        [{"key": key, "model": model, "embedding": vec} for key, vec in items.items()]
+    ).on_conflict_do_nothing(index_elements=["key"])
+
+
+def _db_get(keys: List[str]) -> Dict[str, np.ndarray]:
+    db = SessionLocal()
+    try:
+        rows = db.execute(_db_get_stmt(keys)).all()
+        return {row[0]: decode_vector(row[1]) for row in rows}
+    finally:
+        db.close()
+
+
+def _db_put(items: Dict[str, np.ndarray], model: str) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(_db_put_stmt(items, model))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _adb_get(keys: List[str]) -> Dict[str, np.ndarray]:
+    if AsyncSessionLocal is None:
+        return await asyncio.to_thread(_db_get, keys)
+    async with limits.limit("db"):
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(_db_get_stmt(keys))).all()
+    return {row[0]: decode_vector(row[1]) for row in rows}
+
+
+async def _adb_put(items: Dict[str, np.ndarray], model: str) -> None:
+    if AsyncSessionLocal is None:
+        return await asyncio.to_thread(_db_put, items, model)
+    async with limits.limit("db"):
+        async with AsyncSessionLocal() as db:
+            await db.execute(_db_put_stmt(items, model))
+            await db.commit()
+
+
+def _plan(texts: List[str], model: str):
+    keys = [cache_key(t, model) for t in texts]
+    unique_keys = list(dict.fromkeys(keys))
+    return keys, unique_keys
+
+
+def _first_texts(keys: List[str], texts: List[str], missing: List[str]) -> List[str]:
+    first_text = {}
+    for key, text in zip(keys, texts):
+        first_text.setdefault(key, text)
+    return [first_text[k] for k in missing]
+
+
+def _record(unique_keys: List[str], memory_hits: int, db_hits: int, misses: int) -> None:
+    with _lock:
+        _stats["memory_hits"] += memory_hits
+        _stats["db_hits"] += db_hits
+        _stats["misses"] += misses
+
+    log_debug(
+        f"[EmbedCache] {len(unique_keys)} keys: memory={memory_hits}, db={db_hits}, miss={misses}"
+    )
+
+
+def _db_error(action: str, error: Exception) -> None:
+    with _lock:
+        _stats["db_errors"] += 1
+    log_error(f"[EmbedCache] DB {action} failed: {error}")
+
+
+def embed_texts_cached(
+    texts: List[str],
+    model: str = EMBED_MODEL,
+    embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+) -> List[List[float]]:
+    """
+    embed_texts 와 같은 입출력. 캐시에 없는 텍스트만 provider 로 보낸다.
+    DB tier 오류는 로그만 남기고 provider 호출로 진행한다.
+    """
+    if not texts:
+        return []
+    embed_fn = embed_fn or embed_texts
+
+    keys, unique_keys = _plan(texts, model)
+
+    found = _memory_get(unique_keys)
+    memory_hits = len(found)
+
+    missing = [k for k in unique_keys if k not in found]
+    db_hits = 0
+    if missing and EMBED_CACHE_DB:
+        try:
+            from_db = _db_get(missing)
+            db_hits = len(from_db)
+            found.update(from_db)
+            _memory_put(from_db)
+        except Exception as e:
+            _db_error("lookup", e)
+
+    missing = [k for k in unique_keys if k not in found]
+    if missing:
+        vecs = embed_fn(_first_texts(keys, texts, missing))
+        fresh = {k: np.asarray(v, dtype=np.float32) for k, v in zip(missing, vecs)}
+        found.update(fresh)
+        _memory_put(fresh)
+        if EMBED_CACHE_DB:
+            try:
+                _db_put(fresh, model)
+            except Exception as e:
+                _db_error("write", e)
+
+    _record(unique_keys, memory_hits, db_hits, len(missing))
+    return [found[k].tolist() for k in keys]
+
+
+async def aembed_texts_cached(
+    texts: List[str],
+    aembed_fn: Callable[[List[str]], Awaitable[List[List[float]]]],
+    model: str = EMBED_MODEL,
+) -> List[List[float]]:
+    """embed_texts_cached 의 async 버전 (DB tier 는 async 세션, miss 는 aembed_fn)."""
+    if not texts:
+        return []
+
+    keys, unique_keys = _plan(texts, model)
+
+    found = _memory_get(unique_keys)
+    memory_hits = len(found)
+
+    missing = [k for k in unique_keys if k not in found]
+    db_hits = 0
+    if missing and EMBED_CACHE_DB:
+        try:
+            from_db = await _adb_get(missing)
+            db_hits = len(from_db)
+            found.update(from_db)
+            _memory_put(from_db)
+        except LimitExceeded:
+            # DB 가 붐비면 cache tier 는 건너뛰고 provider 로
+            pass
+        except Exception as e:
+            _db_error("lookup", e)
+
+    missing = [k for k in unique_keys if k not in found]
+    if missing:
+        vecs = await aembed_fn(_first_texts(keys, texts, missing))
+        fresh = {k: np.asarray(v, dtype=np.float32) for k, v in zip(missing, vecs)}
+        found.update(fresh)
+        _memory_put(fresh)
+        if EMBED_CACHE_DB:
+            try:
+                await _adb_put(fresh, model)
+            except Exception as e:
+                _db_error("write", e)
+
+    _record(unique_keys, memory_hits, db_hits, len(missing))
+    return [found[k].tolist() for k in keys]
+
+
+def cache_stats() -> Dict[str, object]:
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_size"] = len(_memory)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["capacity"] = EMBED_CACHE_SIZE
+    stats["db_tier"] = EMBED_CACHE_DB
+    stats["hit_rate"] = round((stats["memory_hits"] + stats["db_hits"]) / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def clear_memory_cache() -> None:
+    with _lock:
+        _memory.clear()
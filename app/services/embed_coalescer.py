@@ -0,0 +1,160 @@
+# app/services/embed_coalescer.py
+"""
+동시 질문 임베딩 micro-batching.
+
+/query 요청마다 embed_texts([q]) 를 따로 보내는 대신,
+EMBED_COALESCE_WINDOW_MS 안에 들어온 텍스트(최대 EMBED_COALESCE_MAX_BATCH 개)를 모아
+embeddings 요청 1회로 보내고 결과를 기다리던 요청들에 나눠 준다.
+
+- 전용 event loop 를 background thread 에서 돌린다.
+  sync 호출(FastAPI threadpool)은 run_coroutine_threadsafe 로,
+  async 호출은 그 future 를 wrap_future 로 await 한다.
+- 실제 provider 호출(blocking)은 loop 의 default executor 에서 실행한다.
+  (embed_texts 의 token batching / 병렬 batch / provider 선택을 그대로 쓰기 위해 sync 경로를 공유한다.
+   executor thread 는 batch 당 하나라 요청 수만큼 늘어나지 않는다.)
+- batch 가 실패하면 그 batch 에 속한 요청 모두에 예외를 전달한다.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.embed import embed_texts
+from app.utils.debug_logger import log_debug, log_error
+
+EMBED_COALESCE_ENABLED = os.getenv("EMBED_COALESCE", "1") == "1"
+EMBED_COALESCE_WINDOW_MS = float(os.getenv("EMBED_COALESCE_WINDOW_MS", "5"))
+EMBED_COALESCE_MAX_BATCH = int(os.getenv("EMBED_COALESCE_MAX_BATCH", "64"))
+
+
+class EmbeddingCoalescer:
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        window_ms: float = EMBED_COALESCE_WINDOW_MS,
+        max_batch: int = EMBED_COALESCE_MAX_BATCH,
+    ):
+        self.embed_fn = embed_fn
+        self.window_s = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock = threading.Lock()
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._stats = {"requests": 0, "texts": 0, "batches": 0, "errors": 0}
+
+    # -----------------------------------------------------
+    # background loop
+    # -----------------------------------------------------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="embed-coalescer", daemon=True)
+                thread.start()
+                self._loop = loop
+        return self._loop
+
+    async def _submit(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            fut = loop.create_future()
+            self._pending.append((text, fut))
+            futures.append(fut)
+        self._stats["requests"] += 1
+        self._stats["texts"] += len(texts)
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_s, self._flush)
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # 같은 window 에 같은 질문이 여러 번 오면 한 번만 보낸다
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self._stats["batches"] += 1
+
+        def _done(task: "asyncio.Future[List[List[float]]]") -> None:
+            error = task.exception()
+            if error is not None:
+                self._stats["errors"] += 1
+                log_error(f"[EmbedCoalescer] batch of {len(unique)} failed: {error}")
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(error)
+                return
+            by_text = dict(zip(unique, task.result()))
+            for text, fut in batch:
+                if not fut.done():
+                    fut.set_result(by_text[text])
+            log_debug(
+                f"[EmbedCoalescer] {len(batch)} texts ({len(unique)} unique) "
+                f"in {round((time.perf_counter() - started) * 1000, 1)} ms"
+            )
+
+        loop.run_in_executor(None, self.embed_fn, unique).add_done_callback(_done)
+
+    # -----------------------------------------------------
+    # public API
+    # -----------------------------------------------------
+    def embed(self, texts: List[str], timeout: Optional[float] = None) -> List[List[float]]:
+        """sync 호출용 (FastAPI threadpool 등). embed_texts 와 같은 입출력."""
+        if not texts:
+            return []
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._submit(list(texts)), loop).result(timeout)
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """async 호출용. 호출한 쪽 loop 를 막지 않고 coalescer loop 의 결과를 기다린다."""
+        if not texts:
+            return []
+        loop = self._ensure_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._submit(list(texts)), loop))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["avg_batch_texts"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["window_ms"] = self.window_s * 1000
+        stats["max_batch"] = self.max_batch
+        return stats
+
+
+_coalescer = EmbeddingCoalescer(lambda texts: embed_texts(texts))
+
+
+def embed_texts_coalesced(texts: List[str]) -> List[List[float]]:
+    """
+    EMBED_COALESCE=1 이면 동시 요청과 묶어서, 아니면 바로 embed_texts 로 임베딩한다.
+    (embed_texts_cached 의 embed_fn 으로 넘겨 cache miss 만 묶는다)
+    """
+    if not EMBED_COALESCE_ENABLED:
+        return embed_texts(texts)
+    return _coalescer.embed(texts)
+
+
+async def aembed_texts_coalesced(texts: List[str]) -> List[List[float]]:
+    if not EMBED_COALESCE_ENABLED:
+        return await asyncio.to_thread(embed_texts, texts)
+    return await _coalescer.aembed(texts)
+
+
+def coalescer_stats() -> Dict[str, Any]:
+    stats = _coalescer.stats()
+    stats["enabled"] = EMBED_COALESCE_ENABLED
+    return stats
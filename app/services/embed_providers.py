@@ -0,0 +1,114 @@
+# app/services/embed_providers.py
+"""
+임베딩 provider 선택 (EMBED_PROVIDER=openai | local).
+
+- openai: text-embedding-3-small (기본)
+- local:  네트워크 없이 동작하는 결정적(deterministic) 임베딩.
+  문자 n-gram + 단어 토큰을 signed hashing trick 으로 1536 차원에 투영하고 L2 정규화한다.
+  같은 텍스트 → 항상 같은 벡터, 표현이 겹치는 텍스트일수록 cosine similarity 가 높다.
+  (의미 유사도는 없지만 lexical 유사도 구조가 있어 인덱스 / 검색 / rerank 부하 테스트에 충분)
+
+model 이름이 provider 마다 다르므로 embedding cache / chunk_embedding key 도 섞이지 않는다.
+"""
+import abc
+import hashlib
+import os
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+EMBED_PROVIDER = os.getenv("EMBED_PROVIDER", "openai").lower()
+EMBED_DIM = 1536
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingProvider(abc.ABC):
+    """provider 공통 인터페이스"""
+    name = "base"
+    model = ""
+    dim = EMBED_DIM
+
+    @abc.abstractmethod
+    def embed_batch(self, texts: List[str]) -> Tuple[List[List[float]], Optional[int]]:
+        """반환: (입력 순서대로 벡터 목록, provider 가 보고한 token 수 또는 None)"""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+    model = "text-embedding-3-small"  # 1536 dim
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self):
+        # API key 가 없는 환경(local provider 사용)에서도 import 가 되도록 지연 생성
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    def embed_batch(self, texts: List[str]) -> Tuple[List[List[float]], Optional[int]]:
+        resp = self.client.embeddings.create(model=self.model, input=texts)
+        usage = getattr(resp, "usage", None)
+        return [d.embedding for d in resp.data], getattr(usage, "prompt_tokens", None)
+
+
+class LocalHashingEmbeddingProvider(EmbeddingProvider):
+    """
+    문자 n-gram(기본 2~4) + 단어 unigram 을 blake2b 로 (index, sign) 에 해싱해서 누적.
+    - 한국어처럼 띄어쓰기/조사 변형이 많은 텍스트도 문자 n-gram 이 겹치면 가깝게 나온다.
+    - 단어 feature 는 가중치를 높여 키워드 일치가 similarity 에 더 크게 반영되게 한다.
+    """
+    name = "local"
+
+    def __init__(self, ngram_min: int = 2, ngram_max: int = 4, word_weight: float = 2.0, seed: str = "v1"):
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+        self.word_weight = word_weight
+        self.seed = seed
+        self.model = f"local-hash-ngram{ngram_min}{ngram_max}-{seed}"
+
+    def _features(self, text: str):
+        norm = " ".join(_WORD_RE.findall(text.lower()))
+        padded = f" {norm} "
+        for n in range(self.ngram_min, self.ngram_max + 1):
+            for i in range(len(padded) - n + 1):
+                yield "c:" + padded[i:i + n], 1.0
+        for word in norm.split():
+            yield "w:" + word, self.word_weight
+
+    def _hash(self, feature: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(f"{self.seed}|{feature}".encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, (1.0 if (value >> 63) & 1 else -1.0)
+
+    def embed_one(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text or ""):
+            idx, sign = self._hash(feature)
+            vec[idx] += sign * weight
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            # 빈 텍스트도 zero vector 대신 고정된 단위 벡터 (cosine distance 계산이 NaN 이 되지 않게)
+            vec[0] = 1.0
+            return vec
+        return vec / norm
+
+    def embed_batch(self, texts: List[str]) -> Tuple[List[List[float]], Optional[int]]:
+        return [self.embed_one(t).tolist() for t in texts], None
+
+
+_PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": LocalHashingEmbeddingProvider,
+}
+
+
+def make_provider(name: str = EMBED_PROVIDER) -> EmbeddingProvider:
+    try:
+        return _PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"unknown EMBED_PROVIDER: {name} (expected one of {sorted(_PROVIDERS)})")
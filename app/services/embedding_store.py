@@ -0,0 +1,282 @@
+# app/services/embedding_store.py
+"""
+문서 chunk 임베딩 content-addressed 저장소 (chunk_embedding 테이블).
+
+- key = sha256(model + '\\x00' + text). 같은 첨부가 여러 프로젝트에 올라오거나
+  재인덱스를 해도 이미 본 텍스트는 임베딩 API 를 다시 부르지 않는다.
+- chunk.embedding_key 가 key 를 참조하고, chunk_embedding.ref_count 로 참조 수를 센다.
+  index_document / 문서 삭제 경로는 같은 트랜잭션 안에서 ref_count 를 증감한다.
+- chunk.content_hash(page + text) 로 재인덱스 전후 chunk 를 맞춰 보고, 바뀐 chunk 만 release / 추가한다.
+- ref 증감을 거치지 않고 chunk 가 지워진 경우(수동 삭제, FK cascade 등)를 위해
+  gc_chunk_embeddings 는 chunk 테이블 기준으로 ref_count 를 다시 맞춘 뒤 0 인 row 를 지운다.
+"""
+import hashlib
+import os
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.chunk import Chunk
+from app.models.chunk_embedding import ChunkEmbedding
+from app.services.embed import EMBED_MODEL, embed_texts
+from app.utils.debug_logger import log_info
+from app.utils.vector_codec import decode_vector, vector_bytes
+
+# chunk_embedding 도입 전(embedding_key 가 없는) chunk 를 임베딩한 모델
+LEGACY_EMBED_MODEL = "text-embedding-3-small"
+# 한 번에 조회할 key 수 (IN 목록 크기)
+LOOKUP_BATCH = 500
+# ref_count 가 0 이 된 뒤 이 시간(분)이 지나야 GC 로 지운다 (동시 인덱싱 중인 row 보호)
+GC_GRACE_MINUTES = int(os.getenv("CHUNK_EMBEDDING_GC_GRACE_MINUTES", "60"))
+
+
+def embedding_key(text: str, model: str = EMBED_MODEL) -> str:
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def content_hash(page: int, text: str) -> str:
+    """chunk.content_hash: 같은 페이지의 같은 텍스트면 같은 chunk 로 본다 (모델 무관)"""
+    return hashlib.sha256(f"{page}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def _load_vectors(db: Session, keys: List[str]) -> Dict[str, List[float]]:
+    found: Dict[str, List[float]] = {}
+    for i in range(0, len(keys), LOOKUP_BATCH):
+        batch = keys[i:i + LOOKUP_BATCH]
+        rows = db.execute(
+            select(ChunkEmbedding.key, vector_bytes(ChunkEmbedding.embedding))
+            .where(ChunkEmbedding.key.in_(batch))
+        ).all()
+        for key, buf in rows:
+            found[key] = decode_vector(buf).tolist()
+    return found
+
+
+def get_or_embed(
+    db: Session,
+    texts: List[str],
+    model: str = EMBED_MODEL,
+    embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+) -> Tuple[List[str], List[List[float]], Dict[str, Any]]:
+    """
+    texts 의 (key 목록, 벡터 목록, stats) 반환. 저장소에 없는 텍스트만 임베딩해서 저장한다.
+    새 row 는 ref_count=0 으로 들어가며, 참조 수는 add_refs 로 올린다.
+    """
+    embed_fn = embed_fn or embed_texts
+    keys = [embedding_key(t, model) for t in texts]
+    unique_keys = list(dict.fromkeys(keys))
+
+    vectors = _load_vectors(db, unique_keys)
+    missing = [k for k in unique_keys if k not in vectors]
+    if missing:
+        first_text = {}
+        for key, text in zip(keys, texts):
+            first_text.setdefault(key, text)
+        fresh = embed_fn([first_text[k] for k in missing])
+        rows = [
+            {"key": k, "model": model, "embedding": v, "ref_count": 0}
+            for k, v in zip(missing, fresh)
+        ]
+        # multi-row INSERT 도 LOOKUP_BATCH 개씩 (bind parameter 65535 개 제한)
+        for i in range(0, len(rows), LOOKUP_BATCH):
+            db.execute(
+                pg_insert(ChunkEmbedding)
+                .values(rows[i:i + LOOKUP_BATCH])
+                .on_conflict_do_nothing(index_elements=["key"])
+            )
+        vectors.update(zip(missing, fresh))
+
+    stats = {
+        "chunks": len(texts),
+        "unique": len(unique_keys),
+        "reused": len(unique_keys) - len(missing),
+        "embedded": len(missing),
+    }
+    return keys, [vectors[k] for k in keys], stats
+
+
+def _shift_refs(db: Session, counts: Dict[str, int], sign: int) -> None:
+    # 같은 증감량끼리 묶어서 UPDATE 한 번씩
+    by_amount: Dict[int, List[str]] = {}
+    for key, n in counts.items():
+        if key and n:
+            by_amount.setdefault(n, []).append(key)
+    for n, keys in by_amount.items():
+        db.execute(
+            update(ChunkEmbedding)
+            .where(ChunkEmbedding.key.in_(keys))
+            .values(ref_count=ChunkEmbedding.ref_count + sign * n, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+
+def add_refs(db: Session, keys: Iterable[str]) -> None:
+    _shift_refs(db, Counter(keys), +1)
+
+
+def release_chunks(db: Session, chunk_ids: List[Any]) -> int:
+    """
+    지정한 chunk 들을 지우고 참조하던 임베딩의 ref_count 를 내린다 (호출한 쪽 트랜잭션).
+    반환: 삭제한 chunk 수
+    """
+    deleted = 0
+    for i in range(0, len(chunk_ids), LOOKUP_BATCH):
+        batch = chunk_ids[i:i + LOOKUP_BATCH]
+        rows = db.execute(
+            select(Chunk.embedding_key, func.count())
+            .where(Chunk.id.in_(batch))
+            .group_by(Chunk.embedding_key)
+        ).all()
+        _shift_refs(db, {k: n for k, n in rows if k}, -1)
+        deleted += db.execute(
+            delete(Chunk).where(Chunk.id.in_(batch)).execution_options(synchronize_session=False)
+        ).rowcount
+    return deleted
+
+
+def diff_document_chunks(db: Session, doc_id, chunks: List[Dict[str, Any]]) -> Dict[str, List]:
+    """
+    새 chunk 목록 vs 문서의 기존 chunk row.
+    같은 content_hash(page + text) 이고 embedding_key 가 현재 모델 기준과 같으면 그대로 둔다.
+    embedding_key 가 없는 예전 chunk(chunk_embedding 도입 전)는 content_hash 만으로 맞추고
+    (그때는 LEGACY_EMBED_MODEL 로 임베딩했으므로 현재 모델이 같을 때만) 저장된 벡터를 그대로 쓴다.
+    반환: {"added": [새 chunk], "removed": [기존 chunk id],
+           "moved": [{"id", "char_start", "char_end", "content_hash"}],
+           "backfill": [{"id", "embedding_key"}]}
+    (moved: 내용은 같고 페이지 안 위치가 바뀌었거나 content_hash 가 비어 있던 chunk,
+     backfill: embedding_key / chunk_embedding ref 를 채워야 하는 예전 chunk → backfill_legacy_refs)
+    """
+    for c in chunks:
+        c["content_hash"] = content_hash(c["page"], c["text"])
+
+    existing = db.execute(
+        select(Chunk.id, Chunk.content_hash, Chunk.embedding_key, Chunk.char_start, Chunk.char_end)
+        .where(Chunk.document_id == doc_id)
+    ).all()
+    # content_hash 가 없는 예전 chunk 는 page / text 로 계산
+    legacy_ids = [row.id for row in existing if row.content_hash is None]
+    legacy_hash = {}
+    if legacy_ids:
+        legacy_hash = {
+            cid: content_hash(page, text)
+            for cid, page, text in db.execute(
+                select(Chunk.id, Chunk.page, Chunk.text).where(Chunk.id.in_(legacy_ids))
+            ).all()
+        }
+
+    # 같은 내용의 chunk 가 여러 개일 수 있으므로 key 별 id 목록
+    available: Dict[tuple, List[Any]] = defaultdict(list)
+    positions = {}
+    for row in existing:
+        h = row.content_hash or legacy_hash.get(row.id)
+        available[(h, row.embedding_key)].append(row.id)
+        positions[row.id] = (row.char_start, row.char_end, row.content_hash is None)
+
+    reuse_legacy = EMBED_MODEL == LEGACY_EMBED_MODEL
+    added, moved, backfill = [], [], []
+    for c in chunks:
+        key = embedding_key(c["text"])
+        ids = available.get((c["content_hash"], key))
+        keyless = False
+        if not ids and reuse_legacy:
+            ids = available.get((c["content_hash"], None))
+            keyless = bool(ids)
+        if not ids:
+            added.append(c)
+            continue
+        cid = ids.pop()
+        if keyless:
+            backfill.append({"id": cid, "embedding_key": key})
+        char_start, char_end, legacy = positions[cid]
+        if legacy or (char_start, char_end) != (c["char_start"], c["char_end"]):
+            moved.append({
+                "id": cid,
+                "char_start": c["char_start"],
+                "char_end": c["char_end"],
+                "content_hash": c["content_hash"],
+            })
+
+    removed = [cid for ids in available.values() for cid in ids]
+    return {"added": added, "removed": removed, "moved": moved, "backfill": backfill}
+
+
+def backfill_legacy_refs(db: Session, items: List[Dict[str, Any]], model: str = EMBED_MODEL) -> int:
+    """
+    embedding_key 가 없던 chunk 에 key 를 채우고, chunk 에 저장된 벡터로 chunk_embedding row 를 만든 뒤
+    (이미 있으면 그대로) ref 를 올린다. 임베딩 API 호출 없음. 반환: 채운 chunk 수
+    """
+    for i in range(0, len(items), LOOKUP_BATCH):
+        batch = items[i:i + LOOKUP_BATCH]
+        db.execute(update(Chunk), batch)
+        db.execute(
+            pg_insert(ChunkEmbedding)
+            .from_select(
+                ["key", "model", "embedding", "ref_count"],
+                select(Chunk.embedding_key, literal(model), Chunk.embedding, literal(0))
+                .where(Chunk.id.in_([item["id"] for item in batch])),
+            )
+            .on_conflict_do_nothing(index_elements=["key"])
+        )
+    add_refs(db, [item["embedding_key"] for item in items])
+    return len(items)
+
+
+def release_document_chunks(db: Session, document_id) -> int:
+    """
+    문서의 chunk 를 지우고 참조하던 임베딩의 ref_count 를 내린다 (호출한 쪽 트랜잭션).
+    반환: 삭제한 chunk 수
+    """
+    rows = db.execute(
+        select(Chunk.embedding_key, func.count())
+        .where(Chunk.document_id == document_id)
+        .group_by(Chunk.embedding_key)
+    ).all()
+    _shift_refs(db, {k: n for k, n in rows if k}, -1)
+    return db.query(Chunk).filter(Chunk.document_id == document_id).delete(synchronize_session=False)
+
+
+def gc_chunk_embeddings(db: Session, reconcile: bool = True) -> Dict[str, int]:
+    """
+    참조되지 않는 임베딩 정리.
+    - reconcile=True: chunk 테이블의 실제 참조 수로 ref_count 를 다시 맞춘다
+    - ref_count <= 0 이고 GC_GRACE_MINUTES 동안 변하지 않은 row 삭제
+    """
+    reconciled = 0
+    if reconcile:
+        actual = (
+            select(Chunk.embedding_key.label("key"), func.count().label("n"))
+            .where(Chunk.embedding_key.isnot(None))
+            .group_by(Chunk.embedding_key)
+            .subquery()
+        )
+        # 참조가 있는 key: 실제 chunk 수로 (UPDATE ... FROM 집계)
+        reconciled = db.execute(
+            update(ChunkEmbedding)
+            .where(ChunkEmbedding.key == actual.c.key, ChunkEmbedding.ref_count != actual.c.n)
+            .values(ref_count=actual.c.n, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        # 참조가 하나도 없는 key: 0 으로
+        referenced = select(Chunk.id).where(Chunk.embedding_key == ChunkEmbedding.key).exists()
+        reconciled += db.execute(
+            update(ChunkEmbedding)
+            .where(ChunkEmbedding.ref_count != 0, ~referenced)
+            .values(ref_count=0, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    deleted = db.execute(
+        delete(ChunkEmbedding)
+        .where(
+            ChunkEmbedding.ref_count <= 0,
+            ChunkEmbedding.updated_at < func.now() - func.make_interval(0, 0, 0, 0, 0, GC_GRACE_MINUTES),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+
+    log_info(f"[EmbeddingStore] GC reconciled={reconciled} deleted={deleted}")
+    return {"reconciled": reconciled, "deleted": deleted}
@@ -0,0 +1,205 @@
+# app/services/fanout.py
+"""
+검색 backend fan-out 유틸.
+
+- 외부 backend(Vertex AI Search) 호출을 공용 thread pool 에서 실행하고
+  호출한 쪽은 그동안 로컬(pgvector) 검색을 진행한다.
+- latency budget: budget 안에 응답이 없으면 기다리지 않고 로컬 결과만 쓴다.
+- hedging: hedge_after 가 지나도 첫 요청이 안 끝났으면 같은 요청을 한 번 더 보내고
+  먼저 성공한 응답을 사용한다 (tail latency 완화).
+- merge_by_calibrated_score: backend 들이 같은 0~1 스케일(calibrated_score)을 줄 때 그대로 합친다.
+- merge_by_normalized_score: 점수 스케일이 다른 backend 가 섞이면
+  backend 내 최고점을 1.0 으로 정규화한 뒤 합친다.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.utils.debug_logger import log_error
+
+FANOUT_WORKERS = int(os.getenv("SEARCH_FANOUT_WORKERS", "8"))
+
+# backend 호출용 / budget·hedging 감시용 pool 을 분리한다
+# (감시 task 가 같은 pool 의 worker 를 기다리며 전부 점유하는 starvation 방지)
+_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="search-fanout")
+_coordinator = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="search-fanout-wait")
+
+
+def _hedged_call(fn: Callable[[], Any], budget_s: float, hedge_after_s: Optional[float]) -> Dict[str, Any]:
+    """
+    fn 을 budget 안에서 실행. 반환: {"status": ok|timeout|error, "value", "hedged", "ms", "error"}
+    coordinator thread 에서 실행되고, 실제 호출(원 요청 + hedge)은 _executor 에 제출한다.
+    """
+    started = time.perf_counter()
+    deadline = started + budget_s
+    pending = {_executor.submit(fn)}
+    hedged = False
+    last_error: Optional[BaseException] = None
+
+    while pending:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        timeout = deadline - now
+        if not hedged and hedge_after_s is not None:
+            timeout = min(timeout, max(started + hedge_after_s - now, 0.0))
+
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return {
+                    "status": "ok",
+                    "value": fut.result(),
+                    "hedged": hedged,
+                    "ms": round((time.perf_counter() - started) * 1000, 1),
+                }
+            last_error = fut.exception()
+
+        elapsed = time.perf_counter() - started
+        if not hedged and hedge_after_s is not None and (elapsed >= hedge_after_s or not pending) \
+                and time.perf_counter() < deadline:
+            # 첫 요청이 느리거나 실패 → 한 번 더 보낸다
+            pending.add(_executor.submit(fn))
+            hedged = True
+
+    for fut in pending:
+        fut.cancel()
+    return {
+        "status": "error" if last_error is not None and not pending else "timeout",
+        "value": None,
+        "hedged": hedged,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "error": str(last_error) if last_error is not None else None,
+    }
+
+
+def submit_with_budget(
+    fn: Callable[[], Any],
+    budget_ms: float,
+    hedge_after_ms: Optional[float] = None,
+) -> "Future[Dict[str, Any]]":
+    """
+    fn 을 백그라운드에서 budget / hedging 규칙으로 실행하는 Future 를 반환한다.
+    결과는 _hedged_call 의 status dict.
+    """
+    hedge_after_s = hedge_after_ms / 1000.0 if hedge_after_ms and hedge_after_ms > 0 else None
+    return _coordinator.submit(_hedged_call, fn, budget_ms / 1000.0, hedge_after_s)
+
+
+def collect(future: "Future[Dict[str, Any]]", budget_ms: float) -> Dict[str, Any]:
+    """submit_with_budget 결과 수집. (budget 보다 약간 더 기다린 뒤 timeout 처리)"""
+    try:
+        return future.result(timeout=budget_ms / 1000.0 + 0.05)
+    except Exception as e:
+        log_error(f"[Fanout] Backend call did not finish: {e}")
+        return {"status": "timeout", "value": None, "hedged": False, "ms": budget_ms}
+
+
+async def call_with_budget_async(
+    fn: Callable[[], Awaitable[Any]],
+    budget_ms: float,
+    hedge_after_ms: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    _hedged_call 의 asyncio 버전 (thread 를 쓰지 않는다).
+    fn 은 호출할 때마다 새 coroutine 을 만드는 함수. 반환 형식은 _hedged_call 과 같다.
+    """
+    budget_s = budget_ms / 1000.0
+    hedge_after_s = hedge_after_ms / 1000.0 if hedge_after_ms and hedge_after_ms > 0 else None
+    started = time.perf_counter()
+    deadline = started + budget_s
+    pending = {asyncio.ensure_future(fn())}
+    hedged = False
+    last_error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            timeout = deadline - now
+            if not hedged and hedge_after_s is not None:
+                timeout = min(timeout, max(started + hedge_after_s - now, 0.0))
+
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return {
+                        "status": "ok",
+                        "value": task.result(),
+                        "hedged": hedged,
+                        "ms": round((time.perf_counter() - started) * 1000, 1),
+                    }
+                last_error = task.exception()
+
+            elapsed = time.perf_counter() - started
+            if not hedged and hedge_after_s is not None and (elapsed >= hedge_after_s or not pending) \
+                    and time.perf_counter() < deadline:
+                pending.add(asyncio.ensure_future(fn()))
+                hedged = True
+    finally:
+        # 남은 요청(느린 원 요청 / 진 hedge / budget 초과)은 취소
+        for task in pending:
+            task.cancel()
+
+    return {
+        "status": "error" if last_error is not None and not pending else "timeout",
+        "value": None,
+        "hedged": hedged,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "error": str(last_error) if last_error is not None else None,
+    }
+
+
+def merge_by_normalized_score(
+    result_lists: Dict[str, List[Dict[str, Any]]],
+    top_k: int,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    backend 별 결과를 (score / backend 최고점) × weight 로 정규화해 합친다.
+    원래 점수는 backend_score 로 보존하고, final_score 를 정규화 점수로 바꾼다.
+    """
+    weights = weights or {}
+    merged: List[Dict[str, Any]] = []
+    for backend, results in result_lists.items():
+        if not results:
+            continue
+        top = max(float(r.get("final_score") or 0.0) for r in results)
+        w = weights.get(backend, 1.0)
+        for r in results:
+            raw = float(r.get("final_score") or 0.0)
+            item = dict(r)
+            item["backend"] = backend
+            item["backend_score"] = raw
+            item["final_score"] = (raw / top if top > 0 else 0.0) * w
+            merged.append(item)
+    merged.sort(key=lambda r: r["final_score"], reverse=True)
+    return merged[:top_k]
+
+
+def merge_by_calibrated_score(
+    result_lists: Dict[str, List[Dict[str, Any]]],
+    top_k: int,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    backend 별 결과를 calibrated_score × weight 로 합친다 (정규화 없음 → 절대 점수 비교).
+    원래 final_score 는 backend_score 로 보존한다.
+    """
+    weights = weights or {}
+    merged: List[Dict[str, Any]] = []
+    for backend, results in result_lists.items():
+        w = weights.get(backend, 1.0)
+        for r in results:
+            item = dict(r)
+            item["backend"] = backend
+            item["backend_score"] = float(r.get("final_score") or 0.0)
+            item["final_score"] = float(r.get("calibrated_score") or 0.0) * w
+            merged.append(item)
+    merged.sort(key=lambda r: r["final_score"], reverse=True)
+    return merged[:top_k]
@@ -1,17 +1,24 @@
 # app/services/indexer.py
 import uuid
-from typing import Optional
-from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Any, Dict, Optional
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.services.ingest import download_bytes_from_gcs, GCS_BUCKET_NAME
 from .extract import extract_text_pages
 from .chunker import chunk_pages
-from .embed import embed_texts
+from .bulk_insert import bulk_insert_chunks
+from .embedding_store import (
+    get_or_embed,
+    add_refs,
+    backfill_legacy_refs,
+    diff_document_chunks,
+    release_chunks,
+)
 # ...
 from app.models.chunk import Chunk
 from app.models.document import Document
-from app.services.vertex_client import VertexAIClient
+from app.services.vertex_client import get_vertex_client
+from app.services.search_cache import bump_generation
 from app.utils.debug_logger import log_info, log_error
 import datetime
 
@@ -21,11 +28,15 @@ def index_document(
     s3_key: str,
     title: str,
     pdf_bytes: Optional[bytes] = None,
+    stats: Optional[Dict[str, Any]] = None,
 ) -> int:
     """
     주어진 document에 대해 인덱싱(또는 재인덱싱)을 수행한다.
     - pdf_bytes가 주어지면 그 바이트를 사용하고,
       없으면 s3_key(Blob Name) 기준으로 GCS에서 파일을 읽어온다.
+    - 재인덱싱은 증분: 새 chunking 을 기존 chunk 와 content_hash 로 비교해서
+      사라진 chunk 만 지우고, 새로 생긴 chunk 만 임베딩 / 저장한다. (그대로인 chunk row 는 유지)
+    - stats 를 넘기면 {"chunks", "kept", "added", "removed", "moved", "backfilled", "embedded", "insert_ms"} 를 채운다.
     """
 
     # 1) 원본 파일 바이트 확보
@@ -47,38 +58,74 @@ def index_document(
     pages = extract_text_pages(pdf_bytes)
 
     # 3) 페이지 → 청크 목록으로 변환
-    #    chunk_pages는 [{"page": int, "text": "..."} ...] 형태를 반환한다고 가정
+    #    chunk_pages는 [{"page": int, "text": "...", "char_start": int, "char_end": int} ...]
     chunks = chunk_pages(pages)
 
-    if not chunks:
-        # 빈 문서면 청크만 삭제하고 0 반환
-        db.query(Chunk).filter(Chunk.document_id == doc_id).delete()
-        db.commit()
-        return 0
-
-    # 4) 청크 텍스트 임베딩
-    texts = [c["text"] for c in chunks]
-    embs  = embed_texts(texts)
-
-    # 5) 🔥 기존 청크 전부 삭제 → 재인덱스 시에도 중복 NO
-    db.query(Chunk).filter(Chunk.document_id == doc_id).delete()
-
-    # 6) 새 청크 + 임베딩 저장
-    for c, e in zip(chunks, embs):
-        db.add(
-            Chunk(
-                id=uuid.uuid4(),
-                document_id=doc_id,
-                page=c["page"],
-                text=c["text"],
-                embedding=e,
-            )
-        )
-
+    # 4) 기존 chunk 와 비교
+    plan = diff_document_chunks(db, doc_id, chunks)
+    result = {
+        "chunks": len(chunks),
+        "kept": len(chunks) - len(plan["added"]),
+        "added": len(plan["added"]),
+        "removed": len(plan["removed"]),
+        "moved": len(plan["moved"]),
+        "backfilled": len(plan["backfill"]),
+        "embedded": 0,
+    }
+
+    # 5) 새 chunk 만 임베딩 (chunk_embedding 저장소에 없는 텍스트만 API 호출)
+    #    기존 chunk 를 release 하기 전에 해서, 옮겨 가는 텍스트의 임베딩 row 가 ref 0 상태로 남지 않게 한다
+    added = plan["added"]
+    if added:
+        keys, embs, embed_stats = get_or_embed(db, [c["text"] for c in added])
+        result["embedded"] = embed_stats["embedded"]
+
+    # 6) 사라진 chunk 삭제 (+ 임베딩 ref 해제)
+    if plan["removed"]:
+        release_chunks(db, plan["removed"])
+
+    # 7) 그대로인 chunk 는 페이지 안 위치만 갱신
+    if plan["moved"]:
+        db.execute(update(Chunk), plan["moved"])
+    # embedding_key 가 없던 예전 chunk: 저장된 벡터로 chunk_embedding key / ref 를 채운다 (재임베딩 X)
+    if plan["backfill"]:
+        backfill_legacy_refs(db, plan["backfill"])
+
+    # 8) 새 chunk 저장 (COPY / multi-row INSERT, row 별 ORM INSERT X)
+    if added:
+        insert_stats = bulk_insert_chunks(db, [
+            {
+                "id": uuid.uuid4(),
+                "document_id": doc_id,
+                "page": c["page"],
+                "text": c["text"],
+                "char_start": c["char_start"],
+                "char_end": c["char_end"],
+                "content_hash": c["content_hash"],
+                "embedding": e,
+                "embedding_key": key,
+            }
+            for c, e, key in zip(added, embs, keys)
+        ])
+        result["insert_ms"] = insert_stats["ms"]
+        add_refs(db, keys)
+
+    # 검색 결과가 달라질 때만 검색 캐시 세대를 올린다
+    if added or plan["removed"] or plan["moved"]:
+        _bump_document_generation(db, doc_id)
     db.commit()
 
+    log_info(f"[Indexer] doc={doc_id} {result}")
+    if stats is not None:
+        stats.update(result)
     return len(chunks)
 
+
+def _bump_document_generation(db: Session, doc_id) -> None:
+    """문서가 속한 그룹(없으면 global)의 검색 캐시 세대를 올린다."""
+    doc = db.get(Document, doc_id)
+    bump_generation(db, doc.group_id if doc else None)
+
 def index_file_to_vertex(db: Session, doc_id: str):
     """
     Indexes a document in Vertex AI Search and updates its sync status in the database.
@@ -120,7 +167,7 @@ def index_file_to_vertex(db: Session, doc_id: str):
         # if not gcs_uri.startswith("gs://"):
         #     gcs_uri = f"gs://{os.getenv('GCS_BUCKET')}/{gcs_uri}"
 
-        client = VertexAIClient()
+        client = get_vertex_client()
         operation_name = client.index_document(gcs_uri=gcs_uri)
         
         # We can store operation name if we want to poll later.
@@ -135,6 +182,7 @@ def index_file_to_vertex(db: Session, doc_id: str):
         document.vertex_sync_status = "SYNCED"
         document.last_vertex_sync_at = datetime.datetime.now()
         
+        bump_generation(db, None)
         log_info(f"Triggered Vertex AI indexing for {doc_id}. Op: {operation_name}")
 
     except Exception as e:
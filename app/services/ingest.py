@@ -3,9 +3,11 @@ import uuid
 import os
 import datetime
 from sqlalchemy.orm import Session
+from app.models.chunk import Chunk
 from app.models.document import Document
 from app.utils.pdf_hwp_parser import parse_pdf, parse_hwp
 from app.utils.semantic_hash import compute_sha256
+from app.services.search_cache import bump_generation
 from google.cloud import storage
 
 # GCS Configuration
@@ -116,9 +118,9 @@ def resolve_conflict(
             
         existing = query.first()
         if existing:
-            db.delete(existing) 
-            db.commit()
-            
+            # 같은 문서 row 를 새 버전으로 교체 → 기존 chunk 와 비교해서 바뀐 부분만 재인덱스
+            return _replace_document(db, existing, file_bytes, filename, workspace, gid)
+
         return ingest_document(db, file_bytes, filename, workspace, group_id)
 
     elif resolution == "merge":
@@ -129,6 +131,76 @@ def resolve_conflict(
     else:
         raise ValueError(f"Unknown resolution: {resolution}")
 
+def _parse_upload(file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    lower_filename = filename.lower()
+    try:
+        if lower_filename.endswith(".pdf"):
+            return parse_pdf(file_bytes)
+        elif lower_filename.endswith(".hwp"):
+            return parse_hwp(file_bytes)
+        else:
+            # Fallback for text/md or unsupported
+            try:
+                text_content = file_bytes.decode("utf-8")
+                return {"text": text_content, "pages": []}
+            except UnicodeDecodeError:
+                 return {"text": "", "error": "Unsupported file format or decoding failed"}
+    except Exception as e:
+        print(f"Parsing failed for {filename}: {e}")
+        return {"text": "", "error": f"Parsing failed: {str(e)}"}
+
+def _replace_document(
+    db: Session,
+    existing: Document,
+    file_bytes: bytes,
+    filename: str,
+    workspace: str,
+    gid: Optional[uuid.UUID],
+) -> Dict[str, Any]:
+    """
+    Version conflict (keep_new): 기존 document row 를 유지한 채 파일만 새 버전으로 바꾼다.
+    로컬 chunk 가 있던 문서는 index_document 가 content_hash 로 비교해서
+    바뀐 chunk 만 지우고 / 임베딩한다 (전체 삭제 후 재임베딩 X).
+    """
+    from app.services.indexer import index_document, index_file_to_vertex
+
+    file_hash = compute_sha256(file_bytes)
+    parse_result = _parse_upload(file_bytes, filename)
+
+    print(f"[ingest] Replacing document {existing.id} with new version: {filename}")
+    blob_name = f"{workspace}/{existing.id}/{filename}"
+    upload_file_to_gcs(GCS_BUCKET_NAME, file_bytes, blob_name)
+    existing.s3_key_raw = blob_name
+    existing.sha256 = file_hash
+
+    index_stats: Dict[str, Any] = {}
+    has_chunks = db.query(Chunk.id).filter(Chunk.document_id == existing.id).first() is not None
+    if has_chunks:
+        # commit 까지 index_document 안에서 (검색 캐시 세대도 바뀐 경우에만 올린다)
+        index_document(db, existing.id, blob_name, existing.title, pdf_bytes=file_bytes, stats=index_stats)
+    else:
+        bump_generation(db, gid)
+        db.commit()
+
+    if gid:
+        existing.vertex_sync_status = "PENDING"
+        db.commit()
+        try:
+            index_file_to_vertex(db, str(existing.id))
+        except Exception as e:
+            print(f"[ingest] Failed to trigger Vertex Indexing: {e}")
+
+    return {
+        "status": "success",
+        "document_id": str(existing.id),
+        "sha256": file_hash,
+        "replaced": True,
+        "index": index_stats or None,
+        "parsed_text": parse_result.get("text", ""),
+        "metadata": parse_result.get("metadata", {}),
+        "pages": parse_result.get("pages", [])
+    }
+
 def ingest_document(
     db: Session,
     file_bytes: bytes,
@@ -160,24 +232,7 @@ def ingest_document(
         }
 
     # 3. Parse Document
-    parse_result = {}
-    lower_filename = filename.lower()
-    
-    try:
-        if lower_filename.endswith(".pdf"):
-            parse_result = parse_pdf(file_bytes)
-        elif lower_filename.endswith(".hwp"):
-            parse_result = parse_hwp(file_bytes)
-        else:
-            # Fallback for text/md or unsupported
-            try:
-                text_content = file_bytes.decode("utf-8")
-                parse_result = {"text": text_content, "pages": []}
-            except UnicodeDecodeError:
-                 parse_result = {"text": "", "error": "Unsupported file format or decoding failed"}
-    except Exception as e:
-        print(f"Parsing failed for {filename}: {e}")
-        parse_result = {"text": "", "error": f"Parsing failed: {str(e)}"}
+    parse_result = _parse_upload(file_bytes, filename)
 
     # 4. Save to DB AND GCS
     print(f"[ingest] Saving to DB & GCS: {filename}, group_id={group_id}")
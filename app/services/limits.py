@@ -0,0 +1,86 @@
+# app/services/limits.py
+"""
+async 경로의 upstream 별 동시 실행 상한 (asyncio.Semaphore).
+
+/query 가 async 로 돌면 threadpool(40) 이 아니라 upstream 한도가 동시성을 결정해야 한다.
+- chat:   OpenAI chat completion (streaming 은 응답이 끝날 때까지 슬롯을 잡는다)
+- embed:  질문 임베딩 (coalescer 로 묶이기 전 단계)
+- db:     async DB 세션 사용 구간 (pool_size + max_overflow 와 맞춘다)
+- vertex: Vertex AI Search 호출
+
+슬롯을 ASYNC_LIMIT_WAIT_S 안에 얻지 못하면 LimitExceeded 를 올린다 (route 에서 503).
+asyncio.Semaphore 는 처음 사용한 event loop 에 묶이므로 loop 별로 만든다.
+"""
+import asyncio
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+from app.db import ASYNC_DB_MAX_OVERFLOW, ASYNC_DB_POOL_SIZE
+
+LIMITS: Dict[str, int] = {
+    "chat": int(os.getenv("ASYNC_LIMIT_CHAT", "64")),
+    "embed": int(os.getenv("ASYNC_LIMIT_EMBED", "32")),
+    "db": int(os.getenv("ASYNC_LIMIT_DB", str(ASYNC_DB_POOL_SIZE + ASYNC_DB_MAX_OVERFLOW))),
+    "vertex": int(os.getenv("ASYNC_LIMIT_VERTEX", "32")),
+}
+ASYNC_LIMIT_WAIT_S = float(os.getenv("ASYNC_LIMIT_WAIT_S", "30"))
+
+
+class LimitExceeded(RuntimeError):
+    """upstream 슬롯 대기 시간 초과"""
+
+    def __init__(self, name: str, waited_s: float):
+        super().__init__(f"{name} concurrency limit ({LIMITS[name]}) busy for {waited_s:.1f}s")
+        self.name = name
+
+
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+_stats: Dict[str, Dict[str, Any]] = {
+    name: {"in_flight": 0, "waiting": 0, "peak_in_flight": 0, "acquired": 0, "rejected": 0, "wait_ms_max": 0.0}
+    for name in LIMITS
+}
+
+
+def _semaphore(name: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    per_loop = _semaphores.get(loop)
+    if per_loop is None:
+        per_loop = {n: asyncio.Semaphore(size) for n, size in LIMITS.items()}
+        _semaphores[loop] = per_loop
+    return per_loop[name]
+
+
+@asynccontextmanager
+async def limit(name: str, timeout: float = ASYNC_LIMIT_WAIT_S):
+    """async with limit("chat"): ... — 슬롯을 잡은 동안만 upstream 을 호출한다."""
+    sem = _semaphore(name)
+    stats = _stats[name]
+    started = time.perf_counter()
+    stats["waiting"] += 1
+    try:
+        await asyncio.wait_for(sem.acquire(), timeout)
+    except asyncio.TimeoutError:
+        stats["rejected"] += 1
+        raise LimitExceeded(name, time.perf_counter() - started)
+    finally:
+        stats["waiting"] -= 1
+
+    waited_ms = (time.perf_counter() - started) * 1000
+    stats["acquired"] += 1
+    stats["in_flight"] += 1
+    stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+    stats["wait_ms_max"] = round(max(stats["wait_ms_max"], waited_ms), 1)
+    try:
+        yield
+    finally:
+        stats["in_flight"] -= 1
+        sem.release()
+
+
+def limiter_stats() -> Dict[str, Any]:
+    return {name: {"limit": LIMITS[name], **stats} for name, stats in _stats.items()}
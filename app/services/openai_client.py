@@ -1,6 +1,7 @@
 import os
 from typing import List, Dict, Any, Optional
 from openai import OpenAI
+from app.services.embed import EMBED_MODEL, embed_texts
 from app.utils.debug_logger import log_debug, log_error
 
 class OpenAIClient:
@@ -9,22 +10,26 @@ class OpenAIClient:
         if not self.api_key:
             log_error("[OpenAI] Missing OPENAI_API_KEY")
         
-        self.client = OpenAI(api_key=self.api_key)
-        self.embed_model = "text-embedding-3-small"
+        self._client = None
+        self.embed_model = EMBED_MODEL  # EMBED_PROVIDER 에 따라 결정
         self.chat_model = "gpt-5.1" # Fallback logic can be added here or in caller
 
+    @property
+    def client(self) -> OpenAI:
+        # offline(EMBED_PROVIDER=local) 환경에서도 import 시점에 실패하지 않도록 지연 생성
+        if self._client is None:
+            self._client = OpenAI(api_key=self.api_key)
+        return self._client
+
     def get_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for a list of texts.
+        (embed.embed_texts 경유 → 설정된 provider / token-aware batching 사용)
         """
         try:
             # Replace newlines with spaces for better embedding results
             texts = [text.replace("\n", " ") for text in texts]
-            response = self.client.embeddings.create(
-                input=texts,
-                model=self.embed_model
-            )
-            return [data.embedding for data in response.data]
+            return embed_texts(texts)
         except Exception as e:
             log_error(f"[OpenAI] Embedding failed: {e}")
             raise e
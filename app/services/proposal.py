@@ -6,8 +6,9 @@ from app.models.project import Project
 from app.models.rfp_requirement import RFPRequirement
 from app.models.answer import AnswerCard
 from app.models.answer import AnswerCard
-from app.services.search import search_chunks
+from app.services.search import search_chunks_batch
 from app.services.openai_client import OpenAIClient
+from app.services.embed_cache import embed_texts_cached
 from app.services.answers import create_answer_card # If needed
 from app.utils.debug_logger import log_info, log_error
 import os
@@ -38,7 +39,8 @@ def map_requirements_to_answers(db: Session, project_id: str) -> Dict[str, Any]:
     if req_texts:
         try:
             log_info(f"[Proposal] Batch embedding {len(req_texts)} requirements...")
-            embeddings = openai_client.get_embeddings(req_texts)
+            # 반복되는 요구사항 문구는 embedding cache 에서 재사용
+            embeddings = embed_texts_cached(req_texts)
         except Exception as e:
             log_error(f"[Proposal] Batch embedding failed: {e}")
             # Fallback or abort? For now, abort mapping for this batch is safer than crashing or partials without vectors
@@ -48,26 +50,31 @@ def map_requirements_to_answers(db: Session, project_id: str) -> Dict[str, Any]:
                 "error": str(e)
             }
 
-    for req, qvec in zip(requirements, embeddings):
-        # 2. Search for existing answers
-        try:
-            results = search_chunks(
-                db=db,
-                qvec=qvec,
-                qtext=req.requirement_text,
-                top_k=3,
-                prefer_team_answer=True,
-                workspace="personal" # MVP hardcoded
-            )
-        except Exception as e:
-            log_error(f"[Proposal] Search failed for req {req.id}: {e}")
-            results = []
-        
+    # 요구사항 전체를 한 번에 검색 (LATERAL batch SQL).
+    # 매핑 대상은 프로젝트 그룹의 Answer Card 이므로 로컬 검색만 한다.
+    try:
+        batch_results = search_chunks_batch(
+            db,
+            embeddings,
+            top_k=3,
+            workspace="personal", # MVP hardcoded
+            group_id=str(project.group_id) if project.group_id else None,
+        )
+    except Exception as e:
+        log_error(f"[Proposal] Batch search failed: {e}")
+        # 검색 실패를 "매칭 없음"으로 기록하지 않는다
+        return {
+            "total_requirements": len(requirements),
+            "mapped_requirements": 0,
+            "error": str(e)
+        }
+
+    for req, results in zip(requirements, batch_results):
         best_match = None
         if results:
             top_result = results[0]
             # Increased threshold to 0.9 to avoid weak matches
-            if top_result["source_type"] == "answer" and top_result["final_score"] > 0.9:
+            if top_result["source_type"] == "answer_card" and top_result["final_score"] > 0.9:
                 best_match = top_result["answer_id"]
                 log_info(f"[Proposal] Matched existing answer: {best_match} (Score: {top_result['final_score']})")
             else:
@@ -0,0 +1,90 @@
+# app/services/rerank.py
+"""
+검색 후보 rerank: Maximal Marginal Relevance + 문서당 passage 상한.
+
+후보 n개의 임베딩으로 (n, n) 유사도 행렬을 한 번에 계산하고,
+greedy 선택 시 "이미 뽑힌 것들과의 최대 유사도" 벡터만 갱신하므로
+선택 단계는 k 번의 O(n) NumPy 연산이다.
+"""
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _normalize_rows(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _scale_relevance(relevance: np.ndarray) -> np.ndarray:
+    """
+    fusion 방식(weighted / rrf)에 상관없이 최고 relevance 를 1.0 으로 맞춘다.
+    (비율은 유지 → 임베딩 유사도와 같은 스케일에서 비교 가능)
+    """
+    hi = float(relevance.max())
+    if hi <= 1e-12:
+        return np.ones_like(relevance)
+    return relevance / hi
+
+
+def mmr_select(
+    embeddings: np.ndarray,
+    relevance: Sequence[float],
+    k: int,
+    lambda_mult: float = 0.9,
+    group_keys: Optional[Sequence[Any]] = None,
+    per_group_limit: Optional[int] = None,
+) -> Tuple[List[int], Dict[str, Any]]:
+    """
+    MMR greedy 선택.
+    score_i = λ · rel_i − (1 − λ) · max_{j ∈ selected} sim(i, j)
+
+    - embeddings: (n, d) 후보 임베딩
+    - relevance: 후보별 relevance (검색 final_score)
+    - lambda_mult: 1.0 이면 순수 relevance 순서, 낮을수록 다양성 비중 ↑
+    - group_keys / per_group_limit: 같은 문서(또는 Answer Card)에서 최대 몇 개까지 뽑을지
+    반환: (선택된 후보 index 목록(선택 순서), stats)
+    """
+    started = time.perf_counter()
+    n = len(relevance)
+    stats: Dict[str, Any] = {
+        "candidates": n,
+        "selected": 0,
+        "lambda": lambda_mult,
+        "per_doc_limit": per_group_limit,
+        "dropped_by_doc_cap": 0,
+    }
+    if n == 0 or k <= 0:
+        stats["ms"] = 0.0
+        return [], stats
+
+    vecs = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+    rel = _scale_relevance(np.asarray(relevance, dtype=np.float32))
+    sim = vecs @ vecs.T  # (n, n) cosine similarity
+
+    max_sim = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    group_counts: Dict[Any, int] = {}
+    selected: List[int] = []
+
+    while len(selected) < k and available.any():
+        scores = lambda_mult * rel - (1.0 - lambda_mult) * max_sim
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        available[best] = False
+
+        if group_keys is not None and per_group_limit:
+            key = group_keys[best]
+            if group_counts.get(key, 0) >= per_group_limit:
+                stats["dropped_by_doc_cap"] += 1
+                continue
+            group_counts[key] = group_counts.get(key, 0) + 1
+
+        selected.append(best)
+        np.maximum(max_sim, sim[:, best], out=max_sim)
+
+    stats["selected"] = len(selected)
+    stats["ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return selected, stats
@@ -1,143 +1,773 @@
 # app/services/search.py
 from typing import List, Optional, Any, Dict, Union
+import asyncio
+import os
+import re
+import time
+from sqlalchemy import select, union, union_all, literal, null, cast, String, Integer, func, or_, case, values, column, true
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
+from pgvector.sqlalchemy import Vector
 
 from app.models.chunk import Chunk
 from app.models.document import Document
 from app.models.answer import AnswerChunk, AnswerCard
-from app.services.vertex_client import VertexAIClient
+from app.services.vertex_client import get_vertex_client
+from app.services.rerank import mmr_select
+from app.services import search_cache, fanout, vector_index, limits
+from app.services.limits import LimitExceeded
+from app.utils.vector_codec import vector_bytes, decode_vectors
 from app.utils.debug_logger import log_error, log_info, log_debug
 
-# Default weights (legacy parameters, kept for compatibility)
-W_VEC_DEFAULT = 0.6
-W_LEX_DEFAULT = 0.4
-DIVERSITY_PENALTY_DEFAULT = 0.9
+# Default weights (ENV override: SEARCH_W_VEC / SEARCH_W_LEX / SEARCH_DIVERSITY_PENALTY)
+W_VEC_DEFAULT = float(os.getenv("SEARCH_W_VEC", "0.6"))
+W_LEX_DEFAULT = float(os.getenv("SEARCH_W_LEX", "0.4"))
+DIVERSITY_PENALTY_DEFAULT = float(os.getenv("SEARCH_DIVERSITY_PENALTY", "0.9"))
+
+# lexical + vector 점수 결합 방식: weighted | rrf
+FUSION_DEFAULT = os.getenv("SEARCH_FUSION", "weighted")
+RRF_K = 60
+# branch 별 후보 수 = top_k × multiplier
+HYBRID_CANDIDATE_MULTIPLIER = 4
+# iterative index scan 을 못 쓰는 pgvector 에서 결과가 부족할 때 재시도 multiplier
+HYBRID_CANDIDATE_MULTIPLIER_MAX = 16
+
+# cosine similarity 하한 (1 - distance). vector 후보 쿼리에 distance 조건으로 들어간다.
+MIN_SIMILARITY = float(os.getenv("SEARCH_MIN_SIMILARITY", "0.3"))
+# 단, lexical 점수가 이 이상이면 (예: 요구사항 ID 정확 매칭) 벡터 점수와 무관하게 남긴다.
+LEX_MIN_SCORE = 0.5
+
+# MMR rerank 시 top_k 대비 후보 oversampling 배수
+MMR_OVERSAMPLE = 3
+
+# 요구사항 ID 형태의 키워드 (F-01, H-01, SR-003, REQ.12 ...)
+_ID_TERM_RE = re.compile(r"(?<![A-Za-z0-9])[A-Za-z]{1,6}[-_.]?\d{1,4}(?:[-_.]\d{1,4})*(?![A-Za-z0-9])")
+LEX_MAX_TERMS = 5
+
+# Knowledge Hub fan-out (Vertex AI Search ∥ 로컬 global 문서 pgvector)
+FANOUT_VERTEX_ENABLED = os.getenv("SEARCH_FANOUT_VERTEX", "1") == "1"
+VERTEX_LATENCY_BUDGET_MS = float(os.getenv("VERTEX_LATENCY_BUDGET_MS", "1500"))
+VERTEX_HEDGE_AFTER_MS = float(os.getenv("VERTEX_HEDGE_AFTER_MS", "600"))  # 0 → hedging off
+FANOUT_W_VERTEX = float(os.getenv("SEARCH_FANOUT_W_VERTEX", "1.0"))
+FANOUT_W_LOCAL = float(os.getenv("SEARCH_FANOUT_W_LOCAL", "1.0"))
+
+# search_chunks_batch: SQL 1문장당 query vector 수
+SEARCH_BATCH_SIZE = int(os.getenv("SEARCH_BATCH_SIZE", "100"))
+EMBED_DIM = 1536
+
+# Vertex 가 relevance score 를 주지 않을 때의 rank 기반 대체 점수 (calibrated_score 스케일)
+VERTEX_RANK_SCORE_TOP = 0.9
+VERTEX_RANK_SCORE_DECAY = 0.05
+VERTEX_RANK_SCORE_MIN = 0.1
 
 def search_chunks(
     db: Session,
     qvec: List[float],
     qtext: str,
     top_k: int = 6,
-    w_vec: float = W_VEC_DEFAULT, # unused in this version
-    w_lex: float = W_LEX_DEFAULT, # unused in this version
-    diversity_penalty: float = DIVERSITY_PENALTY_DEFAULT, # unused
-    per_doc_limit: int = 3, # unused
+    w_vec: float = W_VEC_DEFAULT,
+    w_lex: float = W_LEX_DEFAULT,
+    diversity_penalty: float = DIVERSITY_PENALTY_DEFAULT,
+    per_doc_limit: int = 3,
+    min_similarity: float = MIN_SIMILARITY,
     document_id: Optional[str] = None,
     workspace: str = "personal",
     group_id: Optional[str] = None, # If None -> Knowledge Hub (Vertex), If Set -> Project (DB)
     prefer_team_answer: bool = False,
+    debug: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Hybrid Search Engine:
     - If group_id is provided (Project Context) -> Use Local PGVector (Chunks & AnswerCards)
-    - If group_id is None (Knowledge Hub Context) -> Use Vertex AI Search (Global Docs)
+      with trigram lexical candidates fused by w_vec / w_lex (SEARCH_FUSION),
+      then MMR (λ = diversity_penalty) + per_doc_limit rerank over oversampled candidates
+    - min_similarity: vector hit 의 cosine similarity 하한 (SQL distance 조건). 낮추면 검색 범위가 넓어진다.
+    - If group_id is None (Knowledge Hub Context) -> Vertex AI Search (Global Docs) 와
+      로컬 global 문서 chunk 를 동시에 조회해 정규화 점수로 병합 (Vertex 지연/실패 시 로컬만)
+    결과는 그룹 corpus 세대(search_cache) 기준으로 캐시된다.
+    debug 에 dict 를 넘기면 단계별 비용(rerank, result_cache 등)을 채워 준다.
     """
-    results = []
+    params = dict(
+        top_k=top_k, w_vec=w_vec, w_lex=w_lex, diversity_penalty=diversity_penalty,
+        per_doc_limit=per_doc_limit, min_similarity=min_similarity,
+        document_id=document_id, workspace=workspace,
+        group_id=group_id, prefer_team_answer=prefer_team_answer,
+    )
+    if not search_cache.SEARCH_CACHE_ENABLED:
+        return _search_chunks_uncached(db, qvec, qtext, debug=debug, **params)
+
+    fingerprint = search_cache.search_fingerprint(qvec, qtext, **params)
+    generation, cached = search_cache.lookup(db, group_id, fingerprint)
+    if debug is not None:
+        debug["result_cache"] = "hit" if cached is not None else "miss"
+    if cached is not None:
+        return cached
+
+    run_debug = debug if debug is not None else {}
+    results = _search_chunks_uncached(db, qvec, qtext, debug=run_debug, **params)
+    # 빈 결과 / 일부 backend 가 빠진(degraded) 결과는 캐시하지 않는다.
+    degraded = (run_debug.get("fanout") or {}).get("degraded")
+    if results and not degraded and generation is not None:
+        search_cache.store(group_id, generation, fingerprint, results)
+    return results
 
+
+def _search_chunks_uncached(
+    db: Session,
+    qvec: List[float],
+    qtext: str,
+    top_k: int = 6,
+    w_vec: float = W_VEC_DEFAULT,
+    w_lex: float = W_LEX_DEFAULT,
+    diversity_penalty: float = DIVERSITY_PENALTY_DEFAULT,
+    per_doc_limit: int = 3,
+    min_similarity: float = MIN_SIMILARITY,
+    document_id: Optional[str] = None,
+    workspace: str = "personal",
+    group_id: Optional[str] = None,
+    prefer_team_answer: bool = False,
+    debug: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
     # ---------------------------------------------------------
-    # Case A: Knowledge Hub Search (Vertex AI Search)
+    # Case A: Knowledge Hub Search (Vertex AI Search + local global docs)
     # ---------------------------------------------------------
     if not group_id:
-        log_info(f"[Search] Context: Knowledge Hub (Global). Using Vertex AI Search for query: '{qtext}'")
-        try:
-            v_client = VertexAIClient()
-            # Vertex Search handles semantic + keyword internally
-            vertex_results = v_client.search_docs(qtext, top_k=top_k)
-            
-            for rank, r in enumerate(vertex_results):
-                # Normalize Vertex Result to Unified Format
-                results.append({
-                    "source_type": "vertex_doc", # Indicates this came from Vertex KH
-                    "document_id": r["id"],      # Vertex Doc ID (usually UUID string)
-                    "answer_id": None,
-                    "page": 0,                   # Deep link page info might be in metadata
-                    "text": r["snippet"],        # Snippet from Vertex
-                    "title": r["title"],
-                    "uri": r.get("uri"),         # GCS Link
-                    "final_score": 0.9 - (rank * 0.05), # Artificial decay as Vertex score is hidden
-                    "metadata": {}
-                })
-            
-            return results
-
-        except Exception as e:
-            log_error(f"[Search] Vertex AI Search failed: {e}")
-            # In KH mode, if Vertex fails, we might return empty or fallback to local DB (if desired).
-            # For now, return empty to indicate failure cleanly.
-            return []
+        return _knowledge_hub_search(
+            db, qvec, qtext, top_k, w_vec, w_lex, diversity_penalty, per_doc_limit,
+            min_similarity, workspace, debug,
+        )
 
     # ---------------------------------------------------------
     # Case B: Project Context Search (Local PGVector)
     # ---------------------------------------------------------
+    log_info(f"[Search] Context: Project {group_id}. Using Local PGVector.")
+    try:
+        return _local_search(
+            db, qvec, qtext, top_k, w_vec, w_lex, diversity_penalty, per_doc_limit,
+            min_similarity, workspace, UUID(group_id), debug,
+        )
+    except Exception as e:
+        log_error(f"[Search] Local PGVector search failed: {e}")
+        return []
+
+
+def _local_search(
+    db: Session,
+    qvec: List[float],
+    qtext: str,
+    top_k: int,
+    w_vec: float,
+    w_lex: float,
+    diversity_penalty: float,
+    per_doc_limit: int,
+    min_similarity: float,
+    workspace: str,
+    group_uuid: Optional[UUID],
+    debug: Optional[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    로컬 pgvector 검색. group_uuid=None 이면 global(Knowledge Hub) 문서 chunk 대상.
+    Document chunks + AnswerCard chunks (vector + lexical 후보)를 한 번에 조회한다.
+    (threshold / fusion / top-k 까지 Postgres 에서 처리 → round trip 1회)
+    rerank 를 할 때는 top_k × MMR_OVERSAMPLE 개를 임베딩(binary)과 함께 가져온다.
+
+    vector 후보는 `distance <= 1 - min_similarity` 와 tenant 조건을 만족하는 row 만 LIMIT 에 센다.
+    iterative index scan 이 가능하면 한 번에 fetch_k 개를 채우고,
+    불가능한 pgvector 에서는 결과가 모자랄 때 후보 multiplier 를 키워 1회 재시도한다.
+    """
+    use_rerank = diversity_penalty < 1.0 or per_doc_limit > 0
+    fetch_k = top_k * MMR_OVERSAMPLE if use_rerank else top_k
+
+    multiplier = HYBRID_CANDIDATE_MULTIPLIER
+    while True:
+        scan = vector_index.prepare_filtered_search(db, fetch_k * multiplier)
+        stmt = _project_search_stmt(
+            qvec, workspace, group_uuid, fetch_k,
+            qtext=qtext, w_vec=w_vec, w_lex=w_lex,
+            with_embeddings=use_rerank,
+            min_similarity=min_similarity,
+            candidate_multiplier=multiplier,
+        )
+        rows = db.execute(stmt).mappings().all()
+        if len(rows) >= fetch_k or scan["iterative_scan"] or multiplier >= HYBRID_CANDIDATE_MULTIPLIER_MAX:
+            break
+        multiplier = HYBRID_CANDIDATE_MULTIPLIER_MAX
+    if debug is not None:
+        debug["vector_scan"] = {**scan, "candidate_multiplier": multiplier, "rows": len(rows)}
+
+    results = [_row_to_result(row) for row in rows]
+    if not use_rerank:
+        return results
+    return _rerank(rows, results, top_k, diversity_penalty, per_doc_limit, debug)
+
+
+def _vertex_to_result(r: Dict[str, Any], rank: int) -> Dict[str, Any]:
+    """
+    Normalize Vertex Result to Unified Format
+    relevance score 를 받았으면 그대로 calibrated_score 로, 아니면 rank 기반 대체 점수를 쓴다.
+    """
+    if r.get("score_source") == "relevance":
+        score, source = float(r["score"]), "relevance"
     else:
-        log_info(f"[Search] Context: Project {group_id}. Using Local PGVector.")
-        
-        # 1. Search Document Chunks (RFP Attachments, etc.)
-        doc_results = []
-        try:
-            # Join with Document to filter by group_id
-            doc_query = db.query(
-                Chunk, 
-                Chunk.embedding.cosine_distance(qvec).label("distance")
-            ).join(Document, Chunk.document_id == Document.id).filter(
-                Document.workspace == workspace,
-                Document.group_id == UUID(group_id)
-            ).order_by("distance").limit(top_k)
-
-            for chunk, distance in doc_query.all():
-                similarity = 1 - distance
-                if similarity < 0.3: continue # Basic threshold
-
-                doc_results.append({
-                    "source_type": "document",
-                    "document_id": str(chunk.document_id),
-                    "answer_id": None,
-                    "page": chunk.page,
-                    "text": chunk.text,
-                    "title": chunk.document.title,
-                    "uri": None, # Local logic might need Signed URL generation if requested
-                    "final_score": similarity,
-                    "metadata": {}
-                })
-        except Exception as e:
-            log_error(f"[Search] Local Doc Search failed: {e}")
+        score = max(VERTEX_RANK_SCORE_MIN, VERTEX_RANK_SCORE_TOP - rank * VERTEX_RANK_SCORE_DECAY)
+        source = "rank"
+    return {
+        "source_type": "vertex_doc", # Indicates this came from Vertex KH
+        "document_id": r["id"],      # Vertex Doc ID (usually UUID string)
+        "answer_id": None,
+        "page": 0,                   # Deep link page info might be in metadata
+        "text": r["snippet"],        # Snippet from Vertex
+        "title": r["title"],
+        "uri": r.get("uri"),         # GCS Link
+        "final_score": score,
+        "calibrated_score": score,
+        "metadata": {"score_source": source}
+    }
+
+
+def _merge_backends(result_lists: Dict[str, List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+    """
+    backend 결과 병합. 모든 결과가 calibrated score(로컬 similarity 기반 / Vertex relevance)를
+    갖고 있으면 그 절대값으로, Vertex 가 rank 대체 점수뿐이면 backend 별 정규화로 합친다.
+    """
+    weights = {"vertex": FANOUT_W_VERTEX, "local": FANOUT_W_LOCAL}
+    uncalibrated = any(
+        r.get("metadata", {}).get("score_source") == "rank" for r in result_lists.get("vertex", [])
+    )
+    if uncalibrated:
+        return fanout.merge_by_normalized_score(result_lists, top_k, weights=weights)
+    return fanout.merge_by_calibrated_score(result_lists, top_k, weights=weights)
+
+
+def _knowledge_hub_search(
+    db: Session,
+    qvec: List[float],
+    qtext: str,
+    top_k: int,
+    w_vec: float,
+    w_lex: float,
+    diversity_penalty: float,
+    per_doc_limit: int,
+    min_similarity: float,
+    workspace: str,
+    debug: Optional[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Vertex AI Search 를 fan-out pool 에서 (latency budget + hedging) 실행하는 동안
+    로컬 global 문서 chunk 를 검색하고, 두 결과를 backend 별 정규화 점수로 병합한다.
+    Vertex 가 budget 을 넘기거나 실패하면 로컬 결과만 반환한다 (degraded).
+    """
+    log_info(f"[Search] Context: Knowledge Hub (Global). Fan-out Vertex AI Search + Local PGVector for query: '{qtext}'")
+
+    vertex_future = None
+    if FANOUT_VERTEX_ENABLED:
+        v_client = get_vertex_client()
+        # Vertex Search handles semantic + keyword internally
+        vertex_future = fanout.submit_with_budget(
+            lambda: v_client.search_docs(qtext, top_k=top_k, raise_errors=True),
+            VERTEX_LATENCY_BUDGET_MS,
+            VERTEX_HEDGE_AFTER_MS,
+        )
+
+    # DB session 은 thread-safe 하지 않으므로 로컬 검색은 호출 thread 에서 수행
+    started = time.perf_counter()
+    local_status = "ok"
+    local_results: List[Dict[str, Any]] = []
+    try:
+        local_results = _local_search(
+            db, qvec, qtext, top_k, w_vec, w_lex, diversity_penalty, per_doc_limit,
+            min_similarity, workspace, None, debug,
+        )
+    except Exception as e:
+        log_error(f"[Search] Local PGVector (global docs) search failed: {e}")
+        db.rollback()
+        local_status = "error"
+    local_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    vertex_stats: Dict[str, Any] = {"status": "disabled"}
+    if vertex_future is not None:
+        vertex_stats = fanout.collect(vertex_future, VERTEX_LATENCY_BUDGET_MS)
+
+    return _merge_fanout(vertex_stats, local_results, local_status, local_ms, top_k, debug)
+
+
+def _merge_fanout(
+    vertex_stats: Dict[str, Any],
+    local_results: List[Dict[str, Any]],
+    local_status: str,
+    local_ms: float,
+    top_k: int,
+    debug: Optional[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Knowledge Hub fan-out 결과 병합 + debug["fanout"] 기록 (sync / async 공용)"""
+    vertex_results = [_vertex_to_result(r, rank) for rank, r in enumerate(vertex_stats.pop("value", None) or [])]
+    if vertex_stats["status"] not in ("ok", "disabled"):
+        log_error(f"[Search] Vertex AI Search {vertex_stats['status']} → degrading to local results ({vertex_stats})")
+
+    results = _merge_backends({"vertex": vertex_results, "local": local_results}, top_k)
 
-        # 2. Search AnswerCard Chunks (Project's Approved Answers)
-        ans_results = []
+    degraded = local_status != "ok" or vertex_stats["status"] not in ("ok", "disabled")
+    if debug is not None:
+        debug["fanout"] = {
+            "vertex": {**vertex_stats, "n": len(vertex_results)},
+            "local": {"status": local_status, "ms": local_ms, "n": len(local_results)},
+            "degraded": degraded,
+        }
+    return results
+
+
+# ---------------------------------------------------------
+# Async 경로 (/query async)
+# - DB 단계는 AsyncSession.run_sync 로 기존 sync 함수(_local_search, search_cache)를
+#   greenlet 위에서 그대로 실행한다 → 같은 SQL, thread 사용 없음
+# - Vertex 는 SearchServiceAsyncClient + fanout.call_with_budget_async
+# - 각 upstream 호출은 limits 슬롯 안에서만 실행
+# ---------------------------------------------------------
+async def asearch_chunks(
+    adb: AsyncSession,
+    qvec: List[float],
+    qtext: str,
+    top_k: int = 6,
+    w_vec: float = W_VEC_DEFAULT,
+    w_lex: float = W_LEX_DEFAULT,
+    diversity_penalty: float = DIVERSITY_PENALTY_DEFAULT,
+    per_doc_limit: int = 3,
+    min_similarity: float = MIN_SIMILARITY,
+    document_id: Optional[str] = None,
+    workspace: str = "personal",
+    group_id: Optional[str] = None,
+    prefer_team_answer: bool = False,
+    debug: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """search_chunks 의 async 버전 (같은 파라미터 / 결과 / 캐시)."""
+    params = dict(
+        top_k=top_k, w_vec=w_vec, w_lex=w_lex, diversity_penalty=diversity_penalty,
+        per_doc_limit=per_doc_limit, min_similarity=min_similarity,
+        document_id=document_id, workspace=workspace,
+        group_id=group_id, prefer_team_answer=prefer_team_answer,
+    )
+    if not search_cache.SEARCH_CACHE_ENABLED:
+        return await _asearch_chunks_uncached(adb, qvec, qtext, debug=debug, **params)
+
+    fingerprint = search_cache.search_fingerprint(qvec, qtext, **params)
+    async with limits.limit("db"):
+        generation, cached = await adb.run_sync(lambda db: search_cache.lookup(db, group_id, fingerprint))
+    if debug is not None:
+        debug["result_cache"] = "hit" if cached is not None else "miss"
+    if cached is not None:
+        return cached
+
+    run_debug = debug if debug is not None else {}
+    results = await _asearch_chunks_uncached(adb, qvec, qtext, debug=run_debug, **params)
+    degraded = (run_debug.get("fanout") or {}).get("degraded")
+    if results and not degraded and generation is not None:
+        search_cache.store(group_id, generation, fingerprint, results)
+    return results
+
+
+async def _asearch_chunks_uncached(
+    adb: AsyncSession,
+    qvec: List[float],
+    qtext: str,
+    top_k: int,
+    w_vec: float,
+    w_lex: float,
+    diversity_penalty: float,
+    per_doc_limit: int,
+    min_similarity: float,
+    document_id: Optional[str],
+    workspace: str,
+    group_id: Optional[str],
+    prefer_team_answer: bool,
+    debug: Optional[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    group_uuid = UUID(group_id) if group_id else None
+
+    async def _local() -> List[Dict[str, Any]]:
+        async with limits.limit("db"):
+            return await adb.run_sync(lambda db: _local_search(
+                db, qvec, qtext, top_k, w_vec, w_lex, diversity_penalty, per_doc_limit,
+                min_similarity, workspace, group_uuid, debug,
+            ))
+
+    if group_id:
+        log_info(f"[Search] Context: Project {group_id}. Using Local PGVector (async).")
         try:
-            from app.models.answer import AnswerChunk, AnswerCard
-            ans_query = db.query(
-                AnswerChunk, 
-                AnswerChunk.embedding.cosine_distance(qvec).label("distance")
-            ).join(AnswerCard, AnswerChunk.answer_id == AnswerCard.id).filter(
-                AnswerCard.workspace == workspace,
-                AnswerCard.group_id == UUID(group_id) # Scope to project
-            ).order_by("distance").limit(top_k)
-
-            for chunk, distance in ans_query.all():
-                similarity = 1 - distance
-                if similarity < 0.3: continue
-
-                ans_results.append({
-                    "source_type": "answer_card",
-                    "document_id": None,
-                    "answer_id": str(chunk.answer_id),
-                    "page": 0,
-                    "text": chunk.text,
-                    "title": chunk.answer_card.question,
-                    "uri": None,
-                    "final_score": similarity, # Answers usually highly relevant
-                    "metadata": {"status": chunk.answer_card.status}
-                })
+            return await _local()
+        except LimitExceeded:
+            raise
         except Exception as e:
-            log_error(f"[Search] Local Answer Search failed: {e}")
+            log_error(f"[Search] Local PGVector search failed: {e}")
+            return []
+
+    log_info(f"[Search] Context: Knowledge Hub (Global). Async fan-out for query: '{qtext}'")
+
+    async def _vertex() -> Dict[str, Any]:
+        if not FANOUT_VERTEX_ENABLED:
+            return {"status": "disabled"}
+        v_client = get_vertex_client()
+
+        async def _call():
+            async with limits.limit("vertex"):
+                return await v_client.search_docs_async(qtext, top_k=top_k, raise_errors=True)
+
+        return await fanout.call_with_budget_async(_call, VERTEX_LATENCY_BUDGET_MS, VERTEX_HEDGE_AFTER_MS)
+
+    vertex_task = asyncio.ensure_future(_vertex())
+    started = time.perf_counter()
+    local_status = "ok"
+    local_results: List[Dict[str, Any]] = []
+    try:
+        local_results = await _local()
+    except LimitExceeded:
+        vertex_task.cancel()
+        raise
+    except Exception as e:
+        log_error(f"[Search] Local PGVector (global docs) search failed: {e}")
+        await adb.rollback()
+        local_status = "error"
+    local_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    vertex_stats = await vertex_task
+    return _merge_fanout(vertex_stats, local_results, local_status, local_ms, top_k, debug)
+
+
+def _rerank(
+    rows,
+    results: List[Dict[str, Any]],
+    top_k: int,
+    diversity_penalty: float,
+    per_doc_limit: int,
+    debug: Optional[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """oversampled 후보 → MMR + 문서당 상한 적용 후 top_k"""
+    if not results:
+        return results
+    embeddings = decode_vectors([row["embedding_bin"] for row in rows])
+    group_keys = [r["document_id"] or r["answer_id"] for r in results]
+    picked, stats = mmr_select(
+        embeddings,
+        [r["final_score"] for r in results],
+        k=top_k,
+        lambda_mult=diversity_penalty,
+        group_keys=group_keys,
+        per_group_limit=per_doc_limit or None,
+    )
+    if debug is not None:
+        debug["rerank"] = stats
+    log_debug(f"[Search] Rerank {stats}")
+    return [results[i] for i in picked]
+
+
+def extract_lexical_terms(qtext: str) -> List[str]:
+    """
+    질문에서 정확 매칭해야 하는 식별자형 키워드를 뽑는다.
+    예: "F-01", "H-01", "SR-003", "REQ.12"  (영문 + 숫자 조합)
+    """
+    terms = []
+    for m in _ID_TERM_RE.finditer(qtext or ""):
+        term = m.group(0)
+        if len(term) < 3:  # trigram 인덱스는 3글자 이상 패턴만 사용 가능
+            continue
+        if term.upper() not in (t.upper() for t in terms):
+            terms.append(term)
+    return terms[:LEX_MAX_TERMS]
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _branch_spec(kind: str, workspace: str, group_uuid: Optional[UUID]) -> Dict[str, Any]:
+    """
+    chunk / answer_chunk branch 별 projection 컬럼, join, scope 조건
+    group_uuid=None 이면 global(Knowledge Hub, group_id IS NULL) 범위.
+    """
+    if kind == "document":
+        return {
+            "columns": [
+                literal("document").label("source_type"),
+                Chunk.id.label("chunk_id"),
+                Chunk.document_id.label("document_id"),
+                cast(null(), PG_UUID(as_uuid=True)).label("answer_id"),
+                Chunk.page.label("page"),
+                Chunk.text.label("text"),
+                Document.title.label("title"),
+                cast(null(), String).label("status"),
+                Chunk.char_start.label("char_start"),
+                Chunk.char_end.label("char_end"),
+            ],
+            "embedding": Chunk.embedding,
+            "text": Chunk.text,
+            "join": (Document, Chunk.document_id == Document.id),
+            "where": [
+                Document.workspace == workspace,
+                Document.group_id == group_uuid if group_uuid else Document.group_id.is_(None),
+            ],
+        }
+    return {
+        "columns": [
+            literal("answer_card").label("source_type"),
+            AnswerChunk.id.label("chunk_id"),
+            cast(null(), PG_UUID(as_uuid=True)).label("document_id"),
+            AnswerChunk.answer_id.label("answer_id"),
+            literal(0).label("page"),
+            AnswerChunk.text.label("text"),
+            AnswerCard.question.label("title"),
+            AnswerCard.status.label("status"),
+            cast(null(), Integer).label("char_start"),
+            cast(null(), Integer).label("char_end"),
+        ],
+        "embedding": AnswerChunk.embedding,
+        "text": AnswerChunk.text,
+        "join": (AnswerCard, AnswerChunk.answer_id == AnswerCard.id),
+        "where": [
+            AnswerCard.workspace == workspace,
+            AnswerCard.group_id == group_uuid if group_uuid else AnswerCard.group_id.is_(None),  # Scope to project
+        ],
+    }
+
+
+def _candidate_select(
+    spec: Dict[str, Any],
+    qvec: List[float],
+    qtext: str,
+    lex_terms: List[str],
+    mode: str,
+    limit: int,
+    with_embeddings: bool = False,
+    max_distance: Optional[float] = None,
+):
+    """
+    한 branch 의 후보 쿼리.
+    - mode="vector": ORDER BY distance LIMIT n  → ANN 인덱스
+    - mode="lexical": trigram 조건(ILIKE 키워드 / word_similarity) → GIN trgm 인덱스
+    두 모드 모두 같은 (distance, lex_score) 컬럼을 계산하므로
+    같은 row 는 바깥 UNION 에서 중복 제거된다.
+    max_distance: vector 모드의 threshold (LIMIT 전에 적용 → 조건을 만족하는 row 로 LIMIT 를 채운다)
+    """
+    text_col = spec["text"]
+    distance_expr = spec["embedding"].cosine_distance(qvec)
+    distance = distance_expr.label("distance")
+
+    word_sim = func.word_similarity(qtext, text_col)
+    if lex_terms:
+        exact_hit = or_(*[text_col.ilike(f"%{_escape_like(t)}%", escape="\\") for t in lex_terms])
+        lex_score = case((exact_hit, 1.0), else_=word_sim)
+    else:
+        exact_hit = None
+        lex_score = word_sim
+    lex_score = lex_score.label("lex_score")
+
+    columns = [*spec["columns"], distance, lex_score]
+    if with_embeddings:
+        columns.append(vector_bytes(spec["embedding"]).label("embedding_bin"))
+    stmt = (
+        select(*columns)
+        .join(*spec["join"])
+        .where(*spec["where"])
+    )
+    if mode == "vector":
+        if max_distance is not None:
+            stmt = stmt.where(distance_expr <= max_distance)
+        return stmt.order_by(distance).limit(limit)
+
+    # `:q <% text` → word_similarity >= pg_trgm.word_similarity_threshold (인덱스 사용)
+    lex_match = literal(qtext).op("<%")(text_col)
+    if exact_hit is not None:
+        lex_match = or_(exact_hit, lex_match)
+    return stmt.where(lex_match).order_by(lex_score.desc()).limit(limit)
+
+
+def _project_search_stmt(
+    qvec: List[float],
+    workspace: str,
+    group_uuid: Optional[UUID],
+    top_k: int,
+    qtext: str = "",
+    w_vec: float = W_VEC_DEFAULT,
+    w_lex: float = W_LEX_DEFAULT,
+    fusion: str = FUSION_DEFAULT,
+    with_embeddings: bool = False,
+    min_similarity: float = MIN_SIMILARITY,
+    candidate_multiplier: int = HYBRID_CANDIDATE_MULTIPLIER,
+):
+    """
+    Project 검색용 단일 SQL 문 (hybrid lexical + vector).
+    - 각 branch(chunk / answer_chunk) × (vector / lexical) 후보 쿼리는 자체 ORDER BY/LIMIT 를
+      가져서 각각 ANN / trigram 인덱스를 탈 수 있고,
+    - UNION 으로 후보를 합친 뒤(중복 제거) 바깥 쿼리에서 threshold, fusion 점수,
+      최종 top-k 를 Postgres 에서 계산한다.
+    ORM 엔티티가 아닌 필요한 컬럼만 projection 한다 (lazy load / 벡터 로드 없음).
+
+    fusion:
+    - "weighted": w_vec * similarity + w_lex * lex_score
+    - "rrf":      w_vec / (RRF_K + rank_vec) + w_lex / (RRF_K + rank_lex)
+    with_embeddings=True 이면 rerank 용 embedding_bin(vector_send) 컬럼을 포함한다.
+
+    calibrated_score: fusion 방식과 무관하게 (w_vec·similarity + w_lex·lex_score) / (w_vec + w_lex)
+    → 0~1 절대 스케일이라 다른 backend(Vertex relevance score)와 비교 가능하다.
+    """
+    n_candidates = max(top_k * candidate_multiplier, top_k)
+    max_distance = 1.0 - min_similarity
+    use_lexical = bool(qtext and qtext.strip()) and w_lex > 0
+    lex_terms = extract_lexical_terms(qtext) if use_lexical else []
+
+    branches = []
+    for kind in ("document", "answer_card"):
+        spec = _branch_spec(kind, workspace, group_uuid)
+        branches.append(_candidate_select(
+            spec, qvec, qtext or "", lex_terms, "vector", n_candidates, with_embeddings,
+            max_distance=max_distance,
+        ))
+        if use_lexical:
+            branches.append(_candidate_select(
+                spec, qvec, qtext, lex_terms, "lexical", n_candidates, with_embeddings,
+            ))
+
+    # UNION (not ALL): vector / lexical 후보에 동시에 걸린 row 중복 제거
+    hits = union(*branches).subquery("hits")
+    similarity = 1 - hits.c.distance
+
+    if fusion == "rrf":
+        rank_vec = func.row_number().over(order_by=hits.c.distance)
+        rank_lex = func.row_number().over(order_by=hits.c.lex_score.desc())
+        score = w_vec / (RRF_K + rank_vec) + w_lex / (RRF_K + rank_lex)
+    else:
+        score = w_vec * similarity + w_lex * hits.c.lex_score
+    weight_sum = (w_vec + w_lex) or 1.0
+    calibrated = (w_vec * similarity + w_lex * hits.c.lex_score) / weight_sum
+
+    scored = (
+        select(
+            hits,
+            similarity.label("similarity"),
+            score.label("final_score"),
+            calibrated.label("calibrated_score"),
+        )
+        .where(or_(similarity >= min_similarity, hits.c.lex_score >= LEX_MIN_SCORE))
+        .subquery("scored")
+    )
+    return select(scored).order_by(scored.c.final_score.desc()).limit(top_k)
+
+
+# ---------------------------------------------------------
+# Batch search (N query vectors → 1 SQL)
+# ---------------------------------------------------------
+def _batch_search_stmt(
+    qvecs: List[List[float]],
+    workspace: str,
+    group_uuid: Optional[UUID],
+    top_k: int,
+    offset: int = 0,
+    min_similarity: float = MIN_SIMILARITY,
+):
+    """
+    VALUES (idx, qvec) 목록에 LATERAL join 으로 branch 별 ANN top-k 를 붙인 뒤
+    query 별 distance 순위 상위 top_k 만 남긴다. (vector-only, final_score = similarity)
+    threshold 는 LATERAL 안의 distance 조건이므로 LIMIT 는 조건을 만족하는 row 로만 채워진다.
+    각 LATERAL branch 는 `ORDER BY embedding <=> q.qvec LIMIT k` 형태라 query 마다 ANN 인덱스를 탄다.
+    """
+    q = values(
+        column("qidx", Integer), column("qvec", Vector(EMBED_DIM)), name="q",
+    ).data([(offset + i, v) for i, v in enumerate(qvecs)])
+    # VALUES 안의 벡터 리터럴은 text 로 해석되므로 명시적으로 cast
+    qvec = cast(q.c.qvec, Vector(EMBED_DIM))
+
+    branches = []
+    for kind in ("document", "answer_card"):
+        spec = _branch_spec(kind, workspace, group_uuid)
+        distance_expr = spec["embedding"].cosine_distance(qvec)
+        distance = distance_expr.label("distance")
+        branches.append(
+            select(*spec["columns"], distance)
+            .join(*spec["join"])
+            .where(*spec["where"], distance_expr <= 1.0 - min_similarity)
+            .order_by(distance)
+            .limit(top_k)
+        )
+    hits = union_all(*branches).lateral("hits")
+
+    similarity = (1 - hits.c.distance).label("similarity")
+    rank = func.row_number().over(partition_by=q.c.qidx, order_by=hits.c.distance).label("rank")
+    ranked = (
+        select(q.c.qidx, hits, similarity, rank)
+        .select_from(q)
+        .join(hits, true())
+        .subquery("ranked")
+    )
+    return (
+        select(
+            ranked,
+            ranked.c.similarity.label("final_score"),
+            ranked.c.similarity.label("calibrated_score"),
+            literal(0.0).label("lex_score"),
+        )
+        .where(ranked.c.rank <= top_k)
+        .order_by(ranked.c.qidx, ranked.c.rank)
+    )
+
+
+def search_chunks_batch(
+    db: Session,
+    qvecs: List[List[float]],
+    top_k: int = 6,
+    workspace: str = "personal",
+    group_id: Optional[str] = None,
+    min_similarity: float = MIN_SIMILARITY,
+) -> List[List[Dict[str, Any]]]:
+    """
+    여러 query vector 를 한 번에 검색한다. 반환: 입력 순서대로 query 별 결과 목록.
+    로컬(chunk / answer_chunk)만 SEARCH_BATCH_SIZE 개씩 LATERAL join SQL 1문장으로 검색한다.
+    lexical / MMR / 원격(Vertex) 단계는 없다 (대량 매핑용 vector-only 경로).
+    검색 실패는 호출한 쪽으로 올린다 (빈 결과와 구분되도록).
+    """
+    n = len(qvecs)
+    if n == 0:
+        return []
+    group_uuid = UUID(group_id) if group_id else None
+
+    started = time.perf_counter()
+    results: List[List[Dict[str, Any]]] = [[] for _ in range(n)]
+    try:
+        for offset in range(0, n, SEARCH_BATCH_SIZE):
+            batch = qvecs[offset:offset + SEARCH_BATCH_SIZE]
+            vector_index.prepare_filtered_search(db, top_k)
+            stmt = _batch_search_stmt(
+                batch, workspace, group_uuid, top_k, offset=offset, min_similarity=min_similarity,
+            )
+            for row in db.execute(stmt).mappings():
+                results[row["qidx"]].append(_row_to_result(row))
+    except Exception as e:
+        log_error(f"[Search] Batch PGVector search failed: {e}")
+        db.rollback()
+        raise
+    log_info(f"[Search] Batch local search: {n} queries in {round((time.perf_counter() - started) * 1000, 1)} ms")
+    return results
 
-        # 3. Merge & Sort
-        all_results = doc_results + ans_results
-        all_results.sort(key=lambda x: x["final_score"], reverse=True)
 
-        return all_results[:top_k]
+def _row_to_result(row) -> Dict[str, Any]:
+    """검색 결과 row(mapping) → 통합 검색 결과 dict"""
+    is_answer = row["source_type"] == "answer_card"
+    return {
+        "source_type": row["source_type"],
+        "chunk_id": str(row["chunk_id"]),
+        "document_id": str(row["document_id"]) if row["document_id"] else None,
+        "answer_id": str(row["answer_id"]) if row["answer_id"] else None,
+        "page": row["page"],
+        "char_start": row["char_start"],  # 페이지 텍스트 안의 위치 (chunker offset, 예전 chunk 는 None)
+        "char_end": row["char_end"],
+        "text": row["text"],
+        "title": row["title"],
+        "uri": None,  # Local logic might need Signed URL generation if requested
+        "final_score": float(row["final_score"]),  # fusion 점수 (정렬 기준)
+        "similarity": float(row["similarity"]),    # 순수 cosine similarity
+        "calibrated_score": float(row["calibrated_score"]),  # backend 간 비교용 0~1 점수
+        "lex_score": float(row["lex_score"] or 0.0),
+        "metadata": {"status": row["status"]} if is_answer else {},
+    }
 
 class SearchService:
     """Class wrapper for future expansion"""
@@ -0,0 +1,119 @@
+# app/services/search_cache.py
+"""
+search_chunks 결과 캐시.
+
+- 캐시 key = (scope, generation, 검색 fingerprint)
+  fingerprint 는 query embedding(float32 bytes) + qtext + top_k + 가중치 등 검색 파라미터의 해시.
+- 그룹 corpus 가 바뀌면(index_document, answer card 생성/승인/수정, 문서 삭제)
+  bump_generation() 으로 세대 번호만 +1 한다 → O(1) 무효화.
+  이전 세대 entry 는 다시 조회되지 않고 LRU 에서 자연히 밀려난다.
+- 세대 번호는 corpus_generation 테이블에 있으므로 Cloud Run 인스턴스 간에도 정확하다.
+  (조회 시 PK lookup 1회)
+- Vertex 쪽 corpus 는 비동기 import 로 바뀌므로 TTL(SEARCH_CACHE_TTL)도 함께 둔다.
+- 저장 / 조회 모두 deep copy 한다 (호출한 쪽이 결과의 metadata 등 nested dict 를 고쳐도 캐시는 그대로).
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.corpus_generation import CorpusGeneration
+from app.utils.debug_logger import log_error
+
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE", "1") == "1"
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))  # seconds
+
+GLOBAL_SCOPE = "global"
+
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple[str, int, str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+
+def scope_key(group_id: Optional[Any]) -> str:
+    return str(group_id) if group_id else GLOBAL_SCOPE
+
+
+def bump_generation(db: Session, group_id: Optional[Any]) -> None:
+    """
+    그룹 corpus 변경 표시. 호출한 쪽의 트랜잭션에 포함되므로 commit 과 함께 반영된다.
+    """
+    stmt = pg_insert(CorpusGeneration).values(scope=scope_key(group_id), generation=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope"],
+        set_={"generation": CorpusGeneration.generation + 1, "updated_at": func.now()},
+    )
+    db.execute(stmt)
+
+
+def current_generation(db: Session, group_id: Optional[Any]) -> int:
+    gen = db.execute(
+        select(CorpusGeneration.generation).where(CorpusGeneration.scope == scope_key(group_id))
+    ).scalar()
+    return int(gen or 0)
+
+
+def search_fingerprint(qvec: List[float], qtext: str, **params: Any) -> str:
+    h = hashlib.sha256(np.asarray(qvec, dtype=np.float32).tobytes())
+    h.update((qtext or "").encode("utf-8"))
+    h.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def lookup(db: Session, group_id: Optional[Any], fingerprint: str) -> Tuple[Optional[int], Optional[List[Dict[str, Any]]]]:
+    """
+    반환: (현재 generation, 캐시된 결과 또는 None)
+    generation 조회 자체가 실패하면 (None, None) → 캐시를 건너뛴다.
+    """
+    try:
+        generation = current_generation(db, group_id)
+    except Exception as e:
+        db.rollback()
+        with _lock:
+            _stats["errors"] += 1
+        log_error(f"[SearchCache] generation lookup failed: {e}")
+        return None, None
+
+    key = (scope_key(group_id), generation, fingerprint)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and now - entry[0] <= SEARCH_CACHE_TTL:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return generation, copy.deepcopy(entry[1])
+        if entry is not None:
+            del _entries[key]
+        _stats["misses"] += 1
+    return generation, None
+
+
+def store(group_id: Optional[Any], generation: int, fingerprint: str, results: List[Dict[str, Any]]) -> None:
+    key = (scope_key(group_id), generation, fingerprint)
+    with _lock:
+        _entries[key] = (time.monotonic(), copy.deepcopy(results))
+        _entries.move_to_end(key)
+        while len(_entries) > SEARCH_CACHE_SIZE:
+            _entries.popitem(last=False)
+        _stats["stores"] += 1
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+        stats["size"] = len(_entries)
+    lookups = stats["hits"] + stats["misses"]
+    stats["capacity"] = SEARCH_CACHE_SIZE
+    stats["ttl_sec"] = SEARCH_CACHE_TTL
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -6,11 +6,11 @@ from sqlalchemy.orm import Session
 from app.models.rfp_requirement import RFPRequirement
 from app.models.project import Project
 from app.models.project import Project
-from app.services.vertex_client import VertexAIClient
+from app.services.vertex_client import get_vertex_client
 from app.utils.debug_logger import log_info, log_debug, log_error, save_debug_artifact
 
 # Initialize Vertex AI Client (Gemini)
-vertex_client = VertexAIClient()
+vertex_client = get_vertex_client()
 
 from app.services.preprocess import preprocess_structure, flatten_sections, fix_chunk_boundaries, fix_tables
 
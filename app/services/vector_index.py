@@ -0,0 +1,408 @@
+# app/services/vector_index.py
+"""
+pgvector ANN 인덱스 관리.
+
+- 검색 코드가 사용하는 distance(현재 cosine_distance, `<=>`)와
+  같은 operator class 로 HNSW / IVFFlat 인덱스를 만든다.
+  (opclass 가 다르면 planner 가 인덱스를 못 타고 seq scan 으로 떨어진다.)
+  DDL 은 advisory lock 을 잡은 한 곳에서만 실행하고, INVALID 인덱스는 다시 만든다.
+- 세션 단위 tunable(hnsw.ef_search / ivfflat.probes)을 커넥션 생성 시 적용하고,
+  트랜잭션 단위로 override 할 수 있게 한다.
+- 실제 검색 쿼리를 EXPLAIN 해서 인덱스 스캔인지 확인하는 검증 함수를 제공한다.
+"""
+import json
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.utils.debug_logger import log_error, log_info
+
+# 검색 코드(app/services/search.py)가 사용하는 distance. opclass 선택의 기준.
+SEARCH_DISTANCE = "cosine"
+
+DISTANCE_OPCLASS = {
+    "cosine": "vector_cosine_ops",
+    "l2": "vector_l2_ops",
+    "inner_product": "vector_ip_ops",
+}
+
+# 관리 대상 (table, column)
+VECTOR_COLUMNS = [
+    ("chunk", "embedding"),
+    ("answer_chunk", "embedding"),
+    ("semantic_answer_cache", "embedding"),
+]
+
+# hybrid 검색 lexical 후보용 trigram(GIN) 인덱스 대상 (table, column)
+TEXT_COLUMNS = [
+    ("chunk", "text"),
+    ("answer_chunk", "text"),
+]
+
+# ---------------------------------------------------------
+# Tunables (ENV override)
+# ---------------------------------------------------------
+INDEX_METHOD = os.getenv("VECTOR_INDEX_METHOD", "hnsw")  # hnsw | ivfflat
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "100"))
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
+# 필터(workspace / group / distance threshold)가 걸린 ANN 검색용
+# - iterative scan(pgvector >= 0.8): LIMIT 만큼 조건을 통과할 때까지 인덱스를 계속 읽는다
+# - HNSW ef_search 는 후보 수 × SEARCH_EF_OVERSAMPLE 까지 올린다
+ITERATIVE_SCAN = os.getenv("VECTOR_ITERATIVE_SCAN", "relaxed_order")  # off | relaxed_order | strict_order
+HNSW_MAX_SCAN_TUPLES = int(os.getenv("HNSW_MAX_SCAN_TUPLES", "20000"))
+IVFFLAT_MAX_PROBES = int(os.getenv("IVFFLAT_MAX_PROBES", "100"))
+SEARCH_EF_OVERSAMPLE = float(os.getenv("SEARCH_EF_OVERSAMPLE", "2"))
+# 앱 기동 시 인덱스 DDL 실행 여부. 기본은 점검(로그)만 하고, 생성 / 재생성은 verify_vector_index.py 로 한다.
+# (큰 테이블의 HNSW build 가 기동을 막고, replica 여러 개가 동시에 build 하지 않도록)
+INDEX_DDL_ON_STARTUP = os.getenv("VECTOR_INDEX_DDL_ON_STARTUP", "0") == "1"
+HNSW_EF_SEARCH_MAX = 1000  # pgvector 상한
+
+
+def index_name(table: str, column: str, method: str = INDEX_METHOD, distance: str = SEARCH_DISTANCE) -> str:
+    return f"idx_{table}_{column}_{method}_{distance}"
+
+
+def _index_ddl(table: str, column: str, method: str, distance: str) -> str:
+    opclass = DISTANCE_OPCLASS[distance]
+    if method == "hnsw":
+        with_clause = f"m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION}"
+    elif method == "ivfflat":
+        with_clause = f"lists = {IVFFLAT_LISTS}"
+    else:
+        raise ValueError(f"unsupported vector index method: {method}")
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(table, column, method, distance)} "
+        f"ON {table} USING {method} ({column} {opclass}) WITH ({with_clause})"
+    )
+
+
+_EXISTING_INDEXES_SQL = text("""
+    SELECT i.relname AS index_name, am.amname AS method, opc.opcname AS opclass, x.indisvalid AS valid
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_am am ON am.oid = i.relam
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = x.indkey[0]
+    JOIN pg_opclass opc ON opc.oid = x.indclass[0]
+    WHERE t.relname = :table
+      AND a.attname = :column
+      AND am.amname IN ('hnsw', 'ivfflat')
+""")
+
+_INDEX_VALID_SQL = text("""
+    SELECT x.indisvalid
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    WHERE i.relname = :name
+""")
+
+# 인스턴스 여러 개가 동시에 DDL 을 돌리지 않도록 잡는 advisory lock key (임의의 고정값)
+INDEX_DDL_LOCK_KEY = 734_211_905
+
+
+def list_vector_indexes(conn, table: str, column: str) -> List[Dict[str, Any]]:
+    rows = conn.execute(_EXISTING_INDEXES_SQL, {"table": table, "column": column}).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def _table_exists(conn, table: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:t)"), {"t": f"public.{table}"}).scalar() is not None
+
+
+@contextmanager
+def _ddl_lock(conn):
+    """
+    pg_try_advisory_lock: 다른 인스턴스가 인덱스 DDL 중이면 기다리지 않고 False.
+    (동시에 CONCURRENTLY build 가 겹치면 실패한 쪽이 INVALID 인덱스를 남긴다)
+    """
+    acquired = bool(conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": INDEX_DDL_LOCK_KEY}).scalar())
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": INDEX_DDL_LOCK_KEY})
+
+
+def ensure_vector_indexes(
+    engine: Engine,
+    method: str = INDEX_METHOD,
+    distance: str = SEARCH_DISTANCE,
+    drop_mismatched: bool = True,
+    apply: bool = True,
+) -> Dict[str, Any]:
+    """
+    관리 대상 벡터 컬럼마다 (method, distance opclass) 인덱스를 보장한다.
+    - opclass 나 method 가 다른 기존 ANN 인덱스(예: vector_l2_ops ivfflat)는 drop
+    - INVALID 인덱스(실패한 CONCURRENTLY build 의 잔재)는 이름이 같아도 drop 후 다시 만든다
+    - CONCURRENTLY 로 생성하므로 AUTOCOMMIT 커넥션에서, advisory lock 을 잡은 인스턴스 하나만 실행한다.
+    apply=False: DDL 없이 점검만 한다 (앱 기동 시). 실제 생성 / 삭제는 verify_vector_index.py 로.
+    반환: {"created": [...], "dropped": [...], "kept": [...], "invalid": [...], "skipped": bool}
+          (apply=False 이면 created / dropped 는 실행할 예정인 목록)
+    """
+    wanted_opclass = DISTANCE_OPCLASS[distance]
+    report: Dict[str, Any] = {"created": [], "dropped": [], "kept": [], "invalid": [], "skipped": False}
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        plan = []  # (drop 할 인덱스 목록, 만들 인덱스 또는 None, ddl 인자)
+        for table, column in VECTOR_COLUMNS:
+            if not _table_exists(conn, table):
+                continue
+
+            target = index_name(table, column, method, distance)
+            has_target = False
+            drops = []
+            for idx in list_vector_indexes(conn, table, column):
+                if not idx.get("valid", True):
+                    report["invalid"].append(idx["index_name"])
+                    drops.append(idx)
+                    continue
+                matches = idx["method"] == method and idx["opclass"] == wanted_opclass
+                if idx["index_name"] == target or matches:
+                    has_target = True
+                    report["kept"].append(idx["index_name"])
+                elif drop_mismatched:
+                    drops.append(idx)
+            plan.append((drops, None if has_target else target, (table, column)))
+
+        for drops, target, _ in plan:
+            report["dropped"].extend(idx["index_name"] for idx in drops)
+            if target:
+                report["created"].append(target)
+        if not apply or not (report["dropped"] or report["created"]):
+            return report
+
+        with _ddl_lock(conn) as acquired:
+            if not acquired:
+                log_info("[VectorIndex] Another instance holds the index DDL lock, skipping")
+                report.update(created=[], dropped=[], skipped=True)
+                return report
+            for drops, target, (table, column) in plan:
+                for idx in drops:
+                    log_info(
+                        f"[VectorIndex] Dropping {idx['index_name']} ({idx['method']}/{idx['opclass']}, "
+                        f"valid={idx.get('valid', True)}, search uses {wanted_opclass})"
+                    )
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {idx['index_name']}"))
+                if target:
+                    log_info(f"[VectorIndex] Creating {target}")
+                    conn.execute(text(_index_ddl(table, column, method, distance)))
+
+    return report
+
+
+def ensure_text_indexes(engine: Engine, apply: bool = True) -> Dict[str, Any]:
+    """
+    hybrid 검색의 lexical 후보 쿼리(ILIKE / word_similarity `<%`)가 사용할
+    pg_trgm GIN 인덱스를 보장한다. INVALID 인덱스는 drop 후 다시 만든다.
+    apply=False: DDL 없이 점검만 한다.
+    반환: {"ok": [이미 유효한 인덱스], "created": [...], "invalid": [...], "skipped": bool}
+    """
+    report: Dict[str, Any] = {"ok": [], "created": [], "invalid": [], "skipped": False}
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        todo = []
+        for table, column in TEXT_COLUMNS:
+            if not _table_exists(conn, table):
+                continue
+            name = f"idx_{table}_{column}_trgm"
+            valid = conn.execute(_INDEX_VALID_SQL, {"name": name}).scalar()
+            if valid:
+                report["ok"].append(name)
+                continue
+            if valid is False:
+                report["invalid"].append(name)
+            todo.append((table, column, name))
+            report["created"].append(name)
+
+        if not apply or not todo:
+            return report
+
+        with _ddl_lock(conn) as acquired:
+            if not acquired:
+                log_info("[VectorIndex] Another instance holds the index DDL lock, skipping")
+                report.update(created=[], skipped=True)
+                return report
+            try:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            except Exception as e:
+                log_error(f"[VectorIndex] pg_trgm extension unavailable: {e}")
+                report["created"] = []
+                return report
+            for table, column, name in todo:
+                if name in report["invalid"]:
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                conn.execute(text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                    f"ON {table} USING gin ({column} gin_trgm_ops)"
+                ))
+    return report
+
+
+# ---------------------------------------------------------
+# Session tunables
+# ---------------------------------------------------------
+def apply_session_tunables(dbapi_connection) -> None:
+    """
+    커넥션 생성 시 pgvector 검색 tunable 을 세션 기본값으로 설정한다.
+    - GUC 를 모르는 pgvector 버전이면 해당 SET 만 건너뛴다.
+    - 실패한 SET 은 rollback, 성공한 SET 은 commit 해야
+      (트랜잭션 rollback 시 SET 이 되돌아가지 않도록) 세션에 남는다.
+    """
+    settings = [
+        ("hnsw.ef_search", HNSW_EF_SEARCH),
+        ("ivfflat.probes", IVFFLAT_PROBES),
+    ]
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in settings:
+            try:
+                cursor.execute(f"SET {name} = {int(value)}")
+                dbapi_connection.commit()
+            except Exception:
+                dbapi_connection.rollback()
+    finally:
+        cursor.close()
+
+
+def set_search_tunables(
+    db: Session,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+) -> None:
+    """
+    현재 트랜잭션에만 적용되는 override (SET LOCAL).
+    recall 을 더 올리고 싶은 개별 검색(예: 대량 매핑)에서 사용한다.
+    """
+    if ef_search is not None:
+        db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+    if probes is not None:
+        db.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+
+
+_pgvector_version: Optional[tuple] = None
+
+
+def pgvector_version(db: Session) -> tuple:
+    """설치된 vector extension 버전 (프로세스 단위 캐시). 조회 실패 시 (0,)"""
+    global _pgvector_version
+    if _pgvector_version is None:
+        try:
+            raw = db.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+            _pgvector_version = tuple(int(p) for p in (raw or "0").split(".") if p.isdigit())
+        except Exception as e:
+            log_error(f"[VectorIndex] pgvector version lookup failed: {e}")
+            db.rollback()
+            return (0,)
+    return _pgvector_version
+
+
+def prepare_filtered_search(db: Session, n_candidates: int) -> Dict[str, Any]:
+    """
+    threshold / tenant 필터가 걸린 ANN 검색 직전에 호출 (SET LOCAL, 현재 트랜잭션 한정).
+    - HNSW ef_search 를 후보 수에 맞춰 oversampling (IVFFlat 은 probes 가 후보 수와 무관하므로 유지)
+    - iterative scan 을 지원하면 켜서, 필터 통과 row 가 LIMIT 만큼 모일 때까지 스캔하게 한다
+    반환: 적용한 설정 (iterative_scan 이 None 이면 호출 쪽이 재시도로 oversampling 해야 한다)
+    """
+    applied: Dict[str, Any] = {"iterative_scan": None}
+    if INDEX_METHOD != "ivfflat":
+        applied["ef_search"] = min(HNSW_EF_SEARCH_MAX, max(HNSW_EF_SEARCH, int(n_candidates * SEARCH_EF_OVERSAMPLE)))
+        set_search_tunables(db, ef_search=applied["ef_search"])
+
+    if ITERATIVE_SCAN != "off" and pgvector_version(db) >= (0, 8):
+        if INDEX_METHOD == "ivfflat":
+            db.execute(text(f"SET LOCAL ivfflat.iterative_scan = {ITERATIVE_SCAN}"))
+            db.execute(text(f"SET LOCAL ivfflat.max_probes = {int(IVFFLAT_MAX_PROBES)}"))
+        else:
+            db.execute(text(f"SET LOCAL hnsw.iterative_scan = {ITERATIVE_SCAN}"))
+            db.execute(text(f"SET LOCAL hnsw.max_scan_tuples = {int(HNSW_MAX_SCAN_TUPLES)}"))
+        applied["iterative_scan"] = ITERATIVE_SCAN
+    return applied
+
+
+# ---------------------------------------------------------
+# EXPLAIN verification
+# ---------------------------------------------------------
+def _collect_index_scans(plan: Dict[str, Any], found: List[str]) -> None:
+    if plan.get("Node Type") in ("Index Scan", "Index Only Scan") and plan.get("Index Name"):
+        found.append(plan["Index Name"])
+    for child in plan.get("Plans", []) or []:
+        _collect_index_scans(child, found)
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <stmt>. 안쪽 statement 의 bind / type processor 를 그대로 쓴다."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def explain_statement(db: Session, stmt) -> Dict[str, Any]:
+    """SQLAlchemy statement 의 EXPLAIN (FORMAT JSON) 결과를 반환"""
+    # literal_binds 로 문자열을 만들면 LIKE 패턴의 '%' 가 드라이버에 따라 '%%' 로 남는다 → bind 그대로 실행
+    raw = db.execute(_Explain(stmt)).scalar()
+    plan = json.loads(raw) if isinstance(raw, str) else raw
+    return plan[0]["Plan"]
+
+
+def verify_search_plan(
+    db: Session,
+    workspace: str = "personal",
+    group_id: Optional[str] = None,
+    top_k: int = 6,
+    force_index: bool = True,
+) -> Dict[str, Any]:
+    """
+    실제 project 검색 쿼리(_project_search_stmt)를 EXPLAIN 하고
+    chunk / answer_chunk 양쪽 branch 가 검색 distance 와 같은 opclass 의
+    ANN 인덱스로 스캔하는지 확인한다.
+
+    force_index=True 이면 enable_seqscan=off 로 "인덱스를 쓸 수 있는지"를 본다.
+    (데이터가 적은 개발 DB 에서는 planner 가 seq scan 을 고르는 게 정상이므로)
+    반환: {"ok": bool, "index_scans": [...], "missing": [table, ...], "plan": {...}}
+    """
+    import uuid
+    from app.services.search import _project_search_stmt
+
+    qvec = [0.0] * 1535 + [1.0]
+    gid = uuid.UUID(group_id) if group_id else uuid.uuid4()
+    stmt = _project_search_stmt(qvec, workspace, gid, top_k, qtext="F-01 요구사항")
+
+    wanted_opclass = DISTANCE_OPCLASS[SEARCH_DISTANCE]
+    usable = {
+        table: {i["index_name"] for i in list_vector_indexes(db, table, column) if i["opclass"] == wanted_opclass}
+        for table, column in VECTOR_COLUMNS
+        if table in ("chunk", "answer_chunk")  # 검색 쿼리가 스캔하는 테이블만
+    }
+
+    try:
+        if force_index:
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = explain_statement(db, stmt)
+    finally:
+        db.rollback()
+
+    found: List[str] = []
+    _collect_index_scans(plan, found)
+    missing = [table for table, names in usable.items() if not names.intersection(found)]
+
+    result = {"ok": not missing, "index_scans": found, "missing": missing, "plan": plan}
+    if missing:
+        log_error(f"[VectorIndex] No ANN index scan on {missing}. Index scans: {found}")
+    else:
+        log_info(f"[VectorIndex] Search plan uses {found}")
+    return result
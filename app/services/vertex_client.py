@@ -1,4 +1,7 @@
 import os
+import asyncio
+import threading
+import weakref
 from typing import List, Dict, Any, Optional
 from google.cloud import discoveryengine_v1 as discoveryengine
 from google.api_core.client_options import ClientOptions
@@ -6,6 +9,115 @@ import vertexai
 from vertexai.generative_models import GenerativeModel, Part, GenerationConfig
 from app.utils.debug_logger import log_debug, log_error, log_info
 
+# ---------------------------------------------------------
+# Search request options (ENV override)
+# ---------------------------------------------------------
+# summary_spec 는 결과에서 쓰지 않는데 Vertex 가 매 검색마다 요약 생성을 하므로 기본 off
+VERTEX_SEARCH_SUMMARY = os.getenv("VERTEX_SEARCH_SUMMARY", "0") == "1"
+VERTEX_SEARCH_SUMMARY_COUNT = int(os.getenv("VERTEX_SEARCH_SUMMARY_COUNT", "3"))
+VERTEX_SEARCH_SNIPPETS = os.getenv("VERTEX_SEARCH_SNIPPETS", "1") == "1"
+VERTEX_SEARCH_TIMEOUT = float(os.getenv("VERTEX_SEARCH_TIMEOUT", "10"))  # seconds
+# 결과별 relevance score(0~1) 요청 → 로컬 검색 점수와 같은 스케일로 병합
+VERTEX_SEARCH_RELEVANCE_SCORE = os.getenv("VERTEX_SEARCH_RELEVANCE_SCORE", "1") == "1"
+
+# ---------------------------------------------------------
+# Process-wide client registry
+# - discoveryengine 클라이언트는 gRPC 채널(+TLS)을 들고 있으므로 endpoint 별로 1개만 만든다.
+# - async 클라이언트는 생성된 event loop 에 묶이므로 loop 별로 캐시한다.
+# - vertexai.init 은 (project, location) 별 1회.
+# ---------------------------------------------------------
+_registry_lock = threading.Lock()
+_clients: Dict[Any, Any] = {}
+# loop → {location: async client}. loop 가 닫혀 사라지면 그 loop 의 클라이언트도 같이 정리된다
+# (id(loop) 는 닫힌 loop 의 id 가 재사용될 수 있다)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+_vertexai_initialized: set = set()
+_shared_client: Optional["VertexAIClient"] = None
+
+
+def _client_options(location: str) -> Optional[ClientOptions]:
+    if location == "global":
+        return None
+    return ClientOptions(api_endpoint=f"{location}-discoveryengine.googleapis.com")
+
+
+def _get_or_create(key, factory):
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _registry_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+            log_info(f"[VertexAI] Created {key[0]} client ({key[1]})")
+    return client
+
+
+def get_search_client(location: str) -> discoveryengine.SearchServiceClient:
+    return _get_or_create(
+        ("search", location),
+        lambda: discoveryengine.SearchServiceClient(client_options=_client_options(location)),
+    )
+
+
+def get_document_client(location: str) -> discoveryengine.DocumentServiceClient:
+    return _get_or_create(
+        ("document", location),
+        lambda: discoveryengine.DocumentServiceClient(client_options=_client_options(location)),
+    )
+
+
+def get_search_async_client(location: str) -> discoveryengine.SearchServiceAsyncClient:
+    """현재 실행 중인 event loop 에서 호출해야 한다."""
+    loop = asyncio.get_running_loop()
+    with _registry_lock:
+        per_loop = _async_clients.get(loop)
+        if per_loop is None:
+            per_loop = {}
+            _async_clients[loop] = per_loop
+        client = per_loop.get(location)
+        if client is None:
+            client = discoveryengine.SearchServiceAsyncClient(client_options=_client_options(location))
+            per_loop[location] = client
+            log_info(f"[VertexAI] Created search_async client ({location})")
+    return client
+
+
+def _init_vertexai(project_id: str, location: str) -> None:
+    key = (project_id, location)
+    if key in _vertexai_initialized:
+        return
+    with _registry_lock:
+        if key in _vertexai_initialized:
+            return
+        vertexai.init(project=project_id, location=location)
+        _vertexai_initialized.add(key)
+    log_info(f"[VertexAI] Initialized with project {project_id} in {location}")
+
+
+def get_vertex_client() -> "VertexAIClient":
+    """프로세스 공용 VertexAIClient (요청마다 생성하지 않는다)."""
+    global _shared_client
+    if _shared_client is None:
+        with _registry_lock:
+            if _shared_client is None:
+                _shared_client = VertexAIClient()
+    return _shared_client
+
+
+def warm_up_clients() -> None:
+    """
+    앱 시작 시 검색 클라이언트를 미리 만들어 둔다.
+    (채널 생성 / 인증 로딩 비용을 첫 KH 쿼리가 떠안지 않도록)
+    """
+    client = get_vertex_client()
+    if not client.project_id:
+        return
+    get_search_client(client.location)
+    get_document_client(client.location)
+
+
 class VertexAIClient:
     def __init__(self):
         self.project_id = os.getenv("GCP_PROJECT_ID") or os.getenv("PROJECT_ID")
@@ -19,72 +131,133 @@ class VertexAIClient:
             log_error("[VertexAI] Missing GCP_PROJECT_ID or VERTEX_DATA_STORE_ID")
             # We don't raise error here to allow app startup, but methods will fail
             
-        # Initialize Vertex AI SDK
+        # Initialize Vertex AI SDK (process 당 1회)
         if self.project_id:
              try:
-                vertexai.init(project=self.project_id, location=self.location)
-                log_info(f"[VertexAI] Initialized with project {self.project_id} in {self.location}")
+                _init_vertexai(self.project_id, self.location)
              except Exception as e:
                  log_error(f"[VertexAI] Init failed: {e}")
 
-    def search_docs(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def _serving_config(self) -> str:
+        return discoveryengine.SearchServiceClient.serving_config_path(
+            project=self.project_id,
+            location=self.location,
+            data_store=self.data_store_id,
+            serving_config="default_config",
+        )
+
+    def build_search_request(
+        self,
+        query: str,
+        top_k: int = 5,
+        with_summary: Optional[bool] = None,
+        with_snippets: Optional[bool] = None,
+    ) -> discoveryengine.SearchRequest:
+        """
+        SearchRequest 구성. 옵션을 생략하면 ENV 기본값(VERTEX_SEARCH_*)을 따른다.
+        """
+        with_summary = VERTEX_SEARCH_SUMMARY if with_summary is None else with_summary
+        with_snippets = VERTEX_SEARCH_SNIPPETS if with_snippets is None else with_snippets
+
+        content_search_spec: Dict[str, Any] = {}
+        if with_snippets:
+            content_search_spec["snippet_spec"] = {"return_snippet": True}
+        if with_summary:
+            content_search_spec["summary_spec"] = {
+                "summary_result_count": VERTEX_SEARCH_SUMMARY_COUNT,
+                "include_citations": True,
+            }
+
+        return discoveryengine.SearchRequest(
+            serving_config=self._serving_config(),
+            query=query,
+            page_size=top_k,
+            content_search_spec=content_search_spec or None,
+            relevance_score_spec={"return_relevance_score": True} if VERTEX_SEARCH_RELEVANCE_SCORE else None,
+        )
+
+    @staticmethod
+    def _parse_search_results(response) -> List[Dict[str, Any]]:
+        results = []
+        for result in response.results:
+            data = result.document.derived_struct_data
+            snippet = ""
+            # Try to get snippet from derived data or snippets field
+            if hasattr(data, "snippets") and data["snippets"]:
+                 snippet = data["snippets"][0].get("snippet", "")
+            
+            # relevance_score_spec 를 요청한 경우 model_scores["relevance_score"] 로 온다
+            score, score_source = 0.0, None
+            if "relevance_score" in result.model_scores and result.model_scores["relevance_score"].values:
+                score, score_source = float(result.model_scores["relevance_score"].values[0]), "relevance"
+
+            results.append({
+                "id": result.document.id,
+                "title": data.get("title", ""),
+                "uri": data.get("link", ""),
+                "snippet": snippet,
+                "score": score,
+                "score_source": score_source,
+            })
+        return results
+
+    def search_docs(
+        self,
+        query: str,
+        top_k: int = 5,
+        timeout: Optional[float] = None,
+        raise_errors: bool = False,
+        **request_options: Any,
+    ) -> List[Dict[str, Any]]:
         """
         Search documents in Vertex AI Search (Discovery Engine).
         Returns a list of simplified result dicts.
+        request_options: build_search_request 옵션 (with_summary / with_snippets)
+        raise_errors=True 이면 실패를 [] 대신 예외로 올린다 (fan-out 의 hedging / degrade 판단용).
         """
         if not self.data_store_id:
             log_error("[VertexAI] No Data Store ID configured.")
             return []
 
         try:
-            client_options = (
-                ClientOptions(api_endpoint=f"{self.location}-discoveryengine.googleapis.com")
-                if self.location != "global"
-                else None
-            )
-            
-            client = discoveryengine.SearchServiceClient(client_options=client_options)
-            
-            serving_config = client.serving_config_path(
-                project=self.project_id,
-                location=self.location,
-                data_store=self.data_store_id,
-                serving_config="default_config",
-            )
-            
-            request = discoveryengine.SearchRequest(
-                serving_config=serving_config,
-                query=query,
-                page_size=top_k,
-                content_search_spec={
-                    "snippet_spec": {"return_snippet": True},
-                    "summary_spec": {"summary_result_count": 3, "include_citations": True},
-                },
-            )
-            
-            response = client.search(request)
-            
-            results = []
-            for result in response.results:
-                data = result.document.derived_struct_data
-                snippet = ""
-                # Try to get snippet from derived data or snippets field
-                if hasattr(data, "snippets") and data["snippets"]:
-                     snippet = data["snippets"][0].get("snippet", "")
-                
-                results.append({
-                    "id": result.document.id,
-                    "title": data.get("title", ""),
-                    "uri": data.get("link", ""),
-                    "snippet": snippet,
-                    "score": 0.0 # Discovery Engine doesn't always return a raw score in basic response
-                })
-                
+            client = get_search_client(self.location)
+            request = self.build_search_request(query, top_k, **request_options)
+            response = client.search(request, timeout=timeout or VERTEX_SEARCH_TIMEOUT)
+            results = self._parse_search_results(response)
             log_debug(f"[VertexAI] Search returned {len(results)} results")
             return results
 
         except Exception as e:
             log_error(f"[VertexAI] Search failed: {e}")
+            if raise_errors:
+                raise
+            return []
+
+    async def search_docs_async(
+        self,
+        query: str,
+        top_k: int = 5,
+        timeout: Optional[float] = None,
+        raise_errors: bool = False,
+        **request_options: Any,
+    ) -> List[Dict[str, Any]]:
+        """search_docs 의 asyncio 버전 (SearchServiceAsyncClient, loop 별 공유 채널)."""
+        if not self.data_store_id:
+            log_error("[VertexAI] No Data Store ID configured.")
+            return []
+
+        try:
+            client = get_search_async_client(self.location)
+            request = self.build_search_request(query, top_k, **request_options)
+            response = await client.search(request, timeout=timeout or VERTEX_SEARCH_TIMEOUT)
+            results = self._parse_search_results(response)
+            log_debug(f"[VertexAI] Async search returned {len(results)} results")
+            return results
+
+        except Exception as e:
+            log_error(f"[VertexAI] Async search failed: {e}")
+            if raise_errors:
+                raise
             return []
 
     def shred_document(self, pdf_gcs_uri: str, prompt_override: Optional[str] = None) -> Dict[str, Any]:
@@ -133,13 +306,7 @@ class VertexAIClient:
             raise ValueError(msg)
 
         try:
-            client_options = (
-                ClientOptions(api_endpoint=f"{self.location}-discoveryengine.googleapis.com")
-                if self.location != "global"
-                else None
-            )
-            
-            client = discoveryengine.DocumentServiceClient(client_options=client_options)
+            client = get_document_client(self.location)
             
             parent = client.branch_path(
                 project=self.project_id,
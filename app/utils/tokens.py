@@ -0,0 +1,98 @@
+# app/utils/tokens.py
+"""
+tiktoken 기반 토큰 계산 유틸.
+
+encoding 은 프로세스 단위로 한 번만 로드한다.
+BPE 파일을 받을 수 없는 환경(오프라인 빌드 등)에서는
+UTF-8 바이트 기반의 보수적 추정치(≈ 2 bytes / token)로 대체한다.
+(한글 1글자 = 3 bytes → 1.5 tokens 로 계산되므로 실제보다 크게 잡힌다)
+"""
+import math
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from app.utils.debug_logger import log_error
+
+DEFAULT_ENCODING = "cl100k_base"
+_FALLBACK_BYTES_PER_TOKEN = 2
+
+_lock = threading.Lock()
+_encodings = {}
+_unavailable = set()
+
+
+def get_encoding(model: Optional[str] = None):
+    """model(또는 기본 cl100k_base)의 tiktoken encoding. 로드 실패 시 None"""
+    name = model or DEFAULT_ENCODING
+    if name in _encodings:
+        return _encodings[name]
+    if name in _unavailable:
+        return None
+    with _lock:
+        if name in _encodings:
+            return _encodings[name]
+        try:
+            import tiktoken
+            try:
+                enc = tiktoken.encoding_for_model(name)
+            except KeyError:
+                enc = tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception as e:
+            log_error(f"[Tokens] tiktoken encoding '{name}' unavailable, using byte estimate: {e}")
+            _unavailable.add(name)
+            return None
+        _encodings[name] = enc
+        return enc
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    if not text:
+        return 0
+    enc = get_encoding(model)
+    if enc is None:
+        return math.ceil(len(text.encode("utf-8")) / _FALLBACK_BYTES_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def count_tokens_batch(texts: List[str], model: Optional[str] = None) -> List[int]:
+    enc = get_encoding(model)
+    if enc is None:
+        return [count_tokens(t, model) for t in texts]
+    return [len(ids) for ids in enc.encode_batch(list(texts), disallowed_special=())]
+
+
+def truncate_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """text 를 max_tokens 이하로 자른다 (앞부분 유지)"""
+    if max_tokens <= 0:
+        return ""
+    enc = get_encoding(model)
+    if enc is None:
+        max_bytes = max_tokens * _FALLBACK_BYTES_PER_TOKEN
+        raw = text.encode("utf-8")
+        if len(raw) <= max_bytes:
+            return text
+        return raw[:max_bytes].decode("utf-8", errors="ignore")
+    ids = enc.encode(text, disallowed_special=())
+    if len(ids) <= max_tokens:
+        return text
+    return enc.decode(ids[:max_tokens])
+
+
+def token_offsets(text: str, model: Optional[str] = None) -> List[int]:
+    """
+    text 를 한 번 encode 해서 각 token 의 시작 문자 offset 목록을 돌려준다. (len = token 수)
+    tiktoken 과 마찬가지로 한 글자에 걸친 token 들은 같은 offset 을 가진다.
+    tiktoken 이 없으면 count_tokens 의 byte 추정과 같은 기준(2 bytes = 1 token)으로 나눈다.
+    """
+    if not text:
+        return []
+    enc = get_encoding(model)
+    if enc is not None:
+        _, offsets = enc.decode_with_offsets(enc.encode(text, disallowed_special=()))
+        return offsets
+    cp = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    utf8_len = 1 + (cp >= 0x80) + (cp >= 0x800) + (cp >= 0x10000)
+    char_of_byte = np.repeat(np.arange(len(cp)), utf8_len)
+    return char_of_byte[::_FALLBACK_BYTES_PER_TOKEN].tolist()
@@ -0,0 +1,69 @@
+# app/utils/vector_codec.py
+"""
+pgvector 바이너리 전송 헬퍼.
+
+pg8000 은 text protocol 이라 vector 컬럼을 그대로 SELECT 하면
+'[0.0123,-0.0456,...]' 1536개 float 문자열을 파싱하게 된다.
+벡터가 실제로 필요한 경로(MMR rerank, embedding citation 등)에서는
+vector_send() 로 binary(bytea) 표현을 받아 NumPy 로 바로 decode 한다.
+"""
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# vector_send 포맷: int16 dim, int16 unused, float4[dim] (network byte order)
+_HEADER_BYTES = 4
+_WIRE_DTYPE = np.dtype(">f4")
+
+
+def vector_bytes(column):
+    """SELECT 절에서 vector 컬럼 대신 사용할 binary 표현식"""
+    return func.vector_send(column)
+
+
+def decode_vector(buf: Any) -> np.ndarray:
+    """vector_send() 결과(bytes/memoryview) → float32 1-D ndarray"""
+    return np.frombuffer(bytes(buf), dtype=_WIRE_DTYPE, offset=_HEADER_BYTES).astype(np.float32)
+
+
+def decode_vectors(bufs: Sequence[Any], dim: int = 1536) -> np.ndarray:
+    """여러 개의 vector_send() 결과 → (n, dim) float32 행렬"""
+    if not bufs:
+        return np.empty((0, dim), dtype=np.float32)
+    return np.vstack([decode_vector(b) for b in bufs])
+
+
+def load_embeddings(db: Session, model, ids: List[Any]) -> Dict[str, np.ndarray]:
+    """
+    model(Chunk / AnswerChunk)의 id 목록에 대한 embedding 을 binary 로 읽어온다.
+    반환: {str(id): float32 ndarray}
+    """
+    if not ids:
+        return {}
+    rows = db.execute(
+        select(model.id, vector_bytes(model.embedding)).where(model.id.in_(ids))
+    ).all()
+    return {str(row[0]): decode_vector(row[1]) for row in rows}
+
+
+def register_vector_codecs(dbapi_connection) -> bool:
+    """
+    DBAPI 커넥션이 psycopg(3) 이면 pgvector 의 numpy/binary adapter 를 등록한다.
+    - ndarray 를 그대로 bind 할 수 있고, binary cursor 에서 vector 를 바로 decode 한다.
+    - pg8000 은 binary 포맷을 지원하지 않으므로 vector_send() 경로를 사용한다.
+    async engine 의 adapted connection 이면 driver 커넥션(psycopg.AsyncConnection)에 async 로 등록한다.
+    반환: 등록 여부
+    """
+    if hasattr(dbapi_connection, "run_async"):
+        if type(dbapi_connection.driver_connection).__module__.split(".")[0] != "psycopg":
+            return False
+        from pgvector.psycopg import register_vector_async
+        dbapi_connection.run_async(register_vector_async)
+        return True
+    if type(dbapi_connection).__module__.split(".")[0] != "psycopg":
+        return False
+    from pgvector.psycopg import register_vector
+    register_vector(dbapi_connection)
+    return True
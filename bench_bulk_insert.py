@@ -0,0 +1,96 @@
+"""
+chunk / answer_chunk INSERT 방식별 처리량 벤치마크 (rows/s).
+
+임시 document / answer_card 를 만들고 같은 row 들을 orm / multirow / copy 로 넣어 본 뒤
+전부 rollback 한다 (DB 에 남는 것 없음). DATABASE_URL 등 app/db.py 의 DB 설정이 필요하다.
+
+Usage:
+    python bench_bulk_insert.py                      # 2000 rows, 1536 dim
+    python bench_bulk_insert.py --rows 10000 --methods multirow copy
+"""
+import argparse
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import numpy as np
+
+from app.models.db import SessionLocal
+from app.models.answer import AnswerCard
+from app.models.document import Document
+from app.models import group  # noqa: F401  (document / answer_card FK 대상 테이블 등록)
+from app.services.bulk_insert import bulk_insert_answer_chunks, bulk_insert_chunks
+from app.services.embedding_store import content_hash
+
+TEXT = "보안 점검은 연 1회 외부 기관이 수행하며, 결과는 정보보호위원회에 보고한다. " * 8
+
+
+def _chunk_rows(doc_id, n, dim, rng):
+    return [
+        {
+            "id": uuid.uuid4(),
+            "document_id": doc_id,
+            "page": i // 4 + 1,
+            "text": f"{i} {TEXT}",
+            "char_start": 0,
+            "char_end": len(TEXT),
+            "content_hash": content_hash(i // 4 + 1, f"{i} {TEXT}"),
+            "embedding": rng.standard_normal(dim).astype(np.float32).tolist(),
+            "embedding_key": None,
+        }
+        for i in range(n)
+    ]
+
+
+def _answer_rows(answer_id, n, dim, rng):
+    return [
+        {
+            "id": uuid.uuid4(),
+            "answer_id": answer_id,
+            "page": 0,
+            "text": f"{i} {TEXT}",
+            "embedding": rng.standard_normal(dim).astype(np.float32).tolist(),
+        }
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--methods", nargs="+", default=["orm", "multirow", "copy"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    db = SessionLocal()
+    try:
+        doc = Document(id=uuid.uuid4(), workspace="bench", title="bench_bulk_insert")
+        card = AnswerCard(id=uuid.uuid4(), workspace="bench", question="bench", answer="bench", created_by="bench")
+        db.add_all([doc, card])
+        db.flush()
+        print(f"driver={db.get_bind().dialect.driver} rows={args.rows} dim={args.dim}")
+
+        for table, insert_fn, make_rows, parent in (
+            ("chunk", bulk_insert_chunks, _chunk_rows, doc.id),
+            ("answer_chunk", bulk_insert_answer_chunks, _answer_rows, card.id),
+        ):
+            for method in args.methods:
+                rows = make_rows(parent, args.rows, args.dim, rng)
+                # 방식마다 SAVEPOINT 안에서 넣고 되돌린다 (같은 빈 테이블 조건)
+                savepoint = db.begin_nested()
+                started = time.perf_counter()
+                stats = insert_fn(db, rows, method=method)
+                elapsed = time.perf_counter() - started
+                savepoint.rollback()
+                print(f"{table:<13} {stats['method']:<12} {elapsed * 1000:9.1f}ms → {args.rows / elapsed:9.0f} rows/s")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
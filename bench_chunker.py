@@ -0,0 +1,63 @@
+"""
+chunker 처리량 벤치마크.
+
+sample.pdf 그대로 / sample.pdf 페이지를 반복해 만든 500 페이지 입력에 대해
+chunk_pages() 의 pages/s, MB/s, chunk 수, 평균 token 수를 출력한다.
+
+Usage:
+    python bench_chunker.py                 # sample.pdf, 500 pages
+    python bench_chunker.py --pages 2000 --repeat 5 --file sample.docx
+"""
+import argparse
+import statistics
+import time
+
+from app.services.chunker import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, CHUNK_TOKEN_MODEL, chunk_pages
+from app.services.extract import extract_text_pages
+from app.utils.tokens import DEFAULT_ENCODING, get_encoding
+
+
+def _run(label, pages, repeat):
+    timings = []
+    chunks = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = chunk_pages(pages)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    mb = sum(len(p.encode("utf-8")) for p in pages) / 1e6
+    avg_tokens = statistics.mean(c["tokens"] for c in chunks) if chunks else 0
+    print(
+        f"{label:<12} pages={len(pages):>5} size={mb:6.2f}MB chunks={len(chunks):>6} "
+        f"avg_tokens={avg_tokens:6.1f} best={best * 1000:8.1f}ms median={statistics.median(timings) * 1000:8.1f}ms "
+        f"→ {len(pages) / best:8.0f} pages/s, {mb / best:6.2f} MB/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", default="sample.pdf")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.file, "rb") as f:
+        pages = extract_text_pages(f.read())
+    pages = [p for p in pages if p and p.strip()]
+    if not pages:
+        raise SystemExit(f"{args.file}: no text")
+
+    encoding = "tiktoken" if get_encoding(CHUNK_TOKEN_MODEL) is not None else "byte-estimate"
+    print(
+        f"chunk={CHUNK_MAX_TOKENS} tokens, overlap={CHUNK_OVERLAP_TOKENS} tokens, "
+        f"encoding={CHUNK_TOKEN_MODEL or DEFAULT_ENCODING} ({encoding})"
+    )
+    get_encoding(CHUNK_TOKEN_MODEL)  # encoding 로드 시간은 측정에서 제외
+
+    _run(args.file, pages, args.repeat)
+    big = [pages[i % len(pages)] for i in range(args.pages)]
+    _run(f"{args.pages} pages", big, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,5 +19,7 @@ CREATE TABLE IF NOT EXISTS chunk (
 
 CREATE INDEX IF NOT EXISTS idx_chunk_text_trgm ON chunk USING gin (text gin_trgm_ops);
 
-CREATE INDEX IF NOT EXISTS idx_chunk_embedding_ivfflat
-ON chunk USING ivfflat (embedding vector_l2_ops) WITH (lists = 100);
+-- 검색은 cosine distance(<=>)를 사용하므로 opclass 도 vector_cosine_ops 여야 인덱스를 탄다.
+-- (앱 기동 시 app/services/vector_index.py 가 동일한 인덱스를 보장한다.)
+CREATE INDEX IF NOT EXISTS idx_chunk_embedding_hnsw_cosine
+ON chunk USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,111 @@
+import hashlib
+import unittest
+from unittest import mock
+
+from app.services import answer_cache
+
+
+class _FakeSession:
+    def __init__(self):
+        self.added = []
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class TestFreshness(unittest.TestCase):
+    sources = [
+        {"kind": "chunk", "id": "c1", "version": "aaa"},
+        {"kind": "answer_card", "id": "a1", "version": "bbb:ccc:approved"},
+    ]
+
+    def test_unchanged_sources_are_fresh(self):
+        current = {"chunk:c1": "aaa", "answer_card:a1": "bbb:ccc:approved"}
+        with mock.patch.object(answer_cache, "_current_versions", return_value=current):
+            self.assertTrue(answer_cache._is_fresh(None, self.sources, age_hours=1))
+
+    def test_changed_or_deleted_source_is_stale(self):
+        with mock.patch.object(answer_cache, "_current_versions", return_value={"chunk:c1": "aaa"}):
+            self.assertFalse(answer_cache._is_fresh(None, self.sources, age_hours=1))
+        edited = {"chunk:c1": "aaa", "answer_card:a1": "bbb:ddd:approved"}
+        with mock.patch.object(answer_cache, "_current_versions", return_value=edited):
+            self.assertFalse(answer_cache._is_fresh(None, self.sources, age_hours=1))
+
+    def test_vertex_sources_expire_by_ttl(self):
+        sources = [{"kind": "vertex", "id": "v1", "version": None}]
+        with mock.patch.object(answer_cache, "_current_versions", return_value={}):
+            self.assertTrue(answer_cache._is_fresh(None, sources, age_hours=1))
+            self.assertFalse(
+                answer_cache._is_fresh(None, sources, age_hours=answer_cache.ANSWER_CACHE_VERTEX_TTL_HOURS + 1)
+            )
+
+
+class TestStore(unittest.TestCase):
+    results = [{"source_type": "document", "chunk_id": "c1", "text": "보안 점검은 연 1회"}]
+
+    def _store(self, current):
+        db = _FakeSession()
+        with mock.patch.object(answer_cache, "_current_versions", return_value=current):
+            ok = answer_cache.store(db, [0.1] * 4, "q", None, "key", self.results, "a [1]", [], None)
+        return ok, db
+
+    def test_records_source_versions(self):
+        digest = answer_cache._md5(self.results[0]["text"])
+        ok, db = self._store({"chunk:c1": digest})
+        self.assertTrue(ok)
+        self.assertEqual(db.added[0].sources, [{"kind": "chunk", "id": "c1", "version": digest}])
+        self.assertEqual(db.added[0].scope, "global")
+
+    def test_skips_when_passage_changed_after_retrieval(self):
+        ok, db = self._store({"chunk:c1": answer_cache._md5("다른 텍스트")})
+        self.assertFalse(ok)
+        self.assertEqual(db.added, [])
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _CardSession(_FakeSession):
+    """answer_card / answer_chunk 한 쌍을 들고 _current_versions 의 select 에 Postgres md5 로 답한다."""
+
+    def __init__(self, question, answer, chunk_text):
+        super().__init__()
+        self.question, self.answer, self.chunk_text, self.status = question, answer, chunk_text, "approved"
+
+    def execute(self, stmt):
+        md5 = lambda t: hashlib.md5(t.encode("utf-8")).hexdigest()
+        return _Result([("ac1", md5(self.chunk_text), md5(self.question + "\n" + self.answer), self.status)])
+
+
+class TestCardEdit(unittest.TestCase):
+    def test_editing_card_answer_invalidates_entry(self):
+        # answer_chunk text 는 그대로 두고 카드 답변만 고쳐도 (updated_at 미갱신) miss 여야 한다
+        db = _CardSession("백업 주기는?", "매일 1회", "백업 주기는? 매일 1회")
+        results = [{"source_type": "answer_card", "chunk_id": "ac1", "text": db.chunk_text}]
+        self.assertTrue(answer_cache.store(db, [0.1] * 4, "q", None, "key", results, "a [1]", [], None))
+        sources = db.added[0].sources
+        self.assertTrue(answer_cache._is_fresh(db, sources, age_hours=1))
+
+        db.answer = "매주 1회"
+        self.assertFalse(answer_cache._is_fresh(db, sources, age_hours=1))
+
+    def test_corpus_generation_changes_settings_key(self):
+        # 새 문서 / 카드 승인 → generation 증가 → 다른 key (이전 entry 는 조회되지 않는다)
+        before = answer_cache.settings_key(chat_model="m", corpus_generation=3)
+        after = answer_cache.settings_key(chat_model="m", corpus_generation=4)
+        self.assertNotEqual(before, after)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import uuid
+from contextlib import contextmanager
+from unittest import mock
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+
+from app.models.chunk import Chunk
+from app.services import bulk_insert
+
+COLUMNS = [c.name for c in Chunk.__table__.columns]
+
+
+def _rows(n, doc_id):
+    return [
+        {
+            "id": uuid.uuid4(),
+            "document_id": doc_id,
+            "page": 1,
+            "text": f"줄\t{i}\n끝\\",
+            "char_start": None,
+            "char_end": None,
+            "content_hash": "h",
+            "embedding": [0.5, -1.0, 0.25],
+            "embedding_key": None,
+        }
+        for i in range(n)
+    ]
+
+
+def _session(dbapi_connection):
+    db = mock.Mock()
+    db.connection.return_value.connection.dbapi_connection = dbapi_connection
+    return db
+
+
+class FakePsycopg:
+    def __init__(self):
+        self.adapters = mock.Mock()
+        self.adapters.types.get.return_value = object()
+        self.sql, self.types, self.written = None, None, []
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    @contextmanager
+    def copy(self, sql):
+        self.sql = sql
+        yield self
+
+    def set_types(self, types):
+        self.types = types
+
+    def write_row(self, row):
+        self.written.append(row)
+
+
+FakePsycopg.__module__ = "psycopg.connection"
+
+
+class FakePg8000:
+    def __init__(self):
+        self.sql, self.payload = None, None
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, args=(), stream=None):
+        self.sql, self.payload = sql, stream.read()
+
+    def close(self):
+        pass
+
+
+FakePg8000.__module__ = "pg8000.legacy"
+
+
+class TestBulkInsert(unittest.TestCase):
+    def test_psycopg_binary_copy(self):
+        conn = FakePsycopg()
+        stats = bulk_insert.bulk_insert_chunks(_session(conn), _rows(3, str(uuid.uuid4())))
+        self.assertEqual(stats["method"], "copy_binary")
+        self.assertIn("FORMAT BINARY", conn.sql)
+        self.assertEqual(conn.types[:3], ["uuid", "uuid", "int4"])
+        row = conn.written[0]
+        self.assertIsInstance(row[1], uuid.UUID)  # str document_id → UUID
+        self.assertEqual(row[COLUMNS.index("embedding")].dtype, np.float32)
+
+    def test_pg8000_text_copy_escapes(self):
+        conn = FakePg8000()
+        stats = bulk_insert.bulk_insert_chunks(_session(conn), _rows(2, uuid.uuid4()))
+        self.assertEqual(stats["method"], "copy_text")
+        lines = conn.payload.splitlines()
+        self.assertEqual(len(lines), 2)
+        fields = lines[0].split("\t")
+        self.assertEqual(len(fields), 9)
+        self.assertEqual(fields[COLUMNS.index("text")], "줄\\t0\\n끝\\\\")
+        self.assertEqual(fields[COLUMNS.index("char_start")], "\\N")
+        self.assertEqual(fields[COLUMNS.index("embedding")], "[0.5,-1.0,0.25]")
+
+    def test_other_driver_uses_multirow_batches(self):
+        db = _session(object())
+        with mock.patch.object(bulk_insert, "BULK_INSERT_BATCH", 2):
+            stats = bulk_insert.bulk_insert_chunks(db, _rows(5, uuid.uuid4()))
+        self.assertEqual(stats["method"], "multirow")
+        self.assertEqual(db.execute.call_count, 3)
+        sql = str(db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("INSERT INTO chunk", sql)
+        self.assertIn("embedding_m1", sql)  # 한 문장에 여러 row
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            bulk_insert.bulk_insert_chunks(_session(object()), _rows(1, uuid.uuid4()), method="fast")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from app.services.chunker import chunk_pages, iter_chunks
+from app.utils.tokens import count_tokens
+
+PARAGRAPH = (
+    "보안 점검은 연 1회 외부 기관이 수행한다. 점검 결과는 정보보호위원회에 보고한다. "
+    "The backup job runs every night at 2 AM and keeps thirty days of history.\n"
+)
+
+
+class TestChunker(unittest.TestCase):
+    pages = [PARAGRAPH * 40 + "\n\n" + PARAGRAPH * 20, "", "짧은 페이지입니다."]
+
+    def test_offsets_match_page_text(self):
+        chunks = chunk_pages(self.pages, max_tokens=120, overlap_tokens=20)
+        self.assertTrue(chunks)
+        for c in chunks:
+            self.assertEqual(self.pages[c["page"] - 1][c["char_start"]:c["char_end"]], c["text"])
+        self.assertEqual({c["page"] for c in chunks}, {1, 3})
+
+    def test_token_limit(self):
+        for c in iter_chunks(self.pages, max_tokens=120, overlap_tokens=20):
+            self.assertLessEqual(count_tokens(c["text"]), 120)
+
+    def test_sliding_overlap(self):
+        chunks = [c for c in chunk_pages(self.pages, max_tokens=120, overlap_tokens=20) if c["page"] == 1]
+        for a, b in zip(chunks, chunks[1:]):
+            self.assertLess(b["char_start"], a["char_end"])  # 앞 chunk 끝부분을 다시 포함
+            self.assertGreater(b["char_start"], a["char_start"])
+        no_overlap = [c for c in chunk_pages(self.pages, max_tokens=120, overlap_tokens=0) if c["page"] == 1]
+        for a, b in zip(no_overlap, no_overlap[1:]):
+            self.assertGreaterEqual(b["char_start"], a["char_end"])
+
+    def test_prefers_line_boundaries(self):
+        for c in chunk_pages(self.pages, max_tokens=120, overlap_tokens=0)[:-2]:
+            self.assertTrue(c["text"].endswith("history."), c["text"][-30:])
+
+    def test_legacy_char_arguments(self):
+        self.assertEqual(chunk_pages(self.pages, 240, 40), chunk_pages(self.pages, max_tokens=120, overlap_tokens=20))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+import numpy as np
+from rapidfuzz import fuzz
+
+from app.services.cite import (
+    CITE_EMBED_MIN_SIMILARITY,
+    CitationBuilder,
+    attach_citations,
+    attach_citations_detailed,
+    pop_complete_sentences,
+    split_sentences,
+)
+
+
+class TestSplitSentences(unittest.TestCase):
+    def test_korean_endings_without_space(self):
+        self.assertEqual(
+            split_sentences("점검은 연 1회 수행한다.다음은 백업이에요.버전 1.5 기준입니다"),
+            ["점검은 연 1회 수행한다.", "다음은 백업이에요.", "버전 1.5 기준입니다"],
+        )
+
+    def test_newlines_split(self):
+        self.assertEqual(split_sentences("요약\n- 항목 하나\n- 항목 둘"), ["요약", "- 항목 하나", "- 항목 둘"])
+
+    def test_streaming_waits_for_boundary(self):
+        self.assertEqual(pop_complete_sentences("첫 문장이다."), ([], "첫 문장이다."))
+        self.assertEqual(pop_complete_sentences("첫 문장이다.다음"), (["첫 문장이다."], "다음"))
+
+
+class TestBatchedMatcher(unittest.TestCase):
+    passages = [
+        {"document_id": "a", "page": 1, "text": "보안 점검은 연 1회 외부 기관이 수행한다. " * 10},
+        {"document_id": "b", "page": 2, "text": "백업은 매일 새벽 2시에 수행하고 30일 보관한다. " * 10},
+        {"document_id": "a", "page": 3, "text": "접근 권한은 분기마다 검토한다. " * 10},
+    ]
+    answer = "보안 점검은 연 1회 수행합니다. 백업은 매일 새벽에 합니다. 권한은 분기마다 검토해요."
+
+    def test_matches_pairwise_loop(self):
+        # 예전 구현(문장 × passage partial_ratio 이중 loop)과 같은 passage 를 고른다
+        expected = []
+        for s in split_sentences(self.answer):
+            scores = [fuzz.partial_ratio(s, p["text"]) for p in self.passages]
+            expected.append(scores.index(max(scores)))
+        _, citations, details = attach_citations_detailed(self.answer, self.passages)
+        picked = [
+            next(i for i, p in enumerate(self.passages)
+                 if (p["document_id"], p["page"]) == (citations[d["num"] - 1]["document_id"], citations[d["num"] - 1]["page"]))
+            for d in details
+        ]
+        self.assertEqual(picked, expected)
+        for d in details:
+            self.assertTrue(0.0 <= d["confidence"] <= 1.0)
+
+    def test_no_passages_leaves_answer(self):
+        self.assertEqual(attach_citations("문장입니다.", []), ("문장입니다.", []))
+
+
+class TestEmbeddingAttribution(unittest.TestCase):
+    passages = [
+        {"document_id": "a", "page": 1, "text": "보안 점검은 연 1회 외부 기관이 수행한다."},
+        {"document_id": "b", "page": 2, "text": "백업은 매일 새벽 2시에 수행한다."},
+        {"document_id": "v", "page": 1, "text": "Vertex 문서 본문"},
+    ]
+    # 축 하나 = 주제 하나인 가짜 embedding
+    passage_vectors = [np.array([1.0, 0.0, 0.0]), np.array([0.0, 1.0, 0.0]), None]
+
+    def test_paraphrase_uses_embedding(self):
+        # 글자는 passage a 와 더 겹치지만 의미(embedding)는 b
+        sentence = "보안 점검 기관이 새벽마다 사본을 남긴다."
+        builder = CitationBuilder(self.passages, self.passage_vectors)
+        marked, citation, confidence = builder.cite_batch([sentence], [[0.1, 0.9, 0.0]])[0]
+        self.assertEqual(citation["document_id"], "b")
+        self.assertEqual(builder.methods, ["embedding"])
+        self.assertGreaterEqual(confidence, CITE_EMBED_MIN_SIMILARITY)
+
+    def test_low_similarity_falls_back_to_lexical(self):
+        sentence = "Vertex 문서 본문"
+        builder = CitationBuilder(self.passages, self.passage_vectors)
+        _, citation, _ = builder.cite_batch([sentence], [[0.0, 0.0, 1.0]])[0]
+        self.assertEqual(citation["document_id"], "v")
+        self.assertEqual(builder.methods, ["lexical"])
+
+    def test_detailed_reports_method(self):
+        answer = "백업은 새벽에 합니다. Vertex 문서 본문"
+        sentences = split_sentences(answer)
+        _, _, details = attach_citations_detailed(
+            answer, self.passages, sentences, self.passage_vectors, [[0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+        )
+        self.assertEqual([d["method"] for d in details], ["embedding", "lexical"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from app.services.context import pack_context
+
+
+def _row(kind, text, i, status=None, title="T"):
+    return {
+        "source_type": kind,
+        "document_id": f"d{i}" if kind == "document" else None,
+        "answer_id": f"a{i}" if kind == "answer_card" else None,
+        "page": 1,
+        "title": title,
+        "text": text,
+        "final_score": 1.0 - i * 0.1,
+        "metadata": {"status": status} if status else {},
+    }
+
+
+class TestPackContext(unittest.TestCase):
+    def test_approved_answer_cards_come_first(self):
+        rows = [
+            _row("document", "문서 본문입니다. 보안 점검은 분기별로 한다.", 0),
+            _row("answer_card", "보안 점검은 연 1회 외부 기관이 수행한다.", 1, status="approved", title="보안 점검"),
+        ]
+        context, passages, _ = pack_context(rows, "보안 점검 주기")
+        self.assertTrue(context.startswith("[팀 정답 카드] 보안 점검"))
+        self.assertEqual(passages[0]["source_type"], "answer_card")
+
+    def test_overlapping_chunks_are_not_repeated(self):
+        rows = [
+            _row("document", "첫 문장입니다. 겹치는 문장입니다.", 0),
+            _row("document", "겹치는 문장입니다. 새로운 문장입니다.", 1),
+            _row("document", "첫 문장입니다. 겹치는 문장입니다.", 2),
+        ]
+        context, passages, stats = pack_context(rows, "문장")
+        self.assertEqual(context.count("겹치는 문장입니다."), 1)
+        self.assertIn("새로운 문장입니다.", context)
+        self.assertEqual(len(passages), 2)
+        self.assertEqual(stats["deduped"], 1)
+        self.assertGreater(stats["tokens_saved"], 0)
+
+    def test_budget_keeps_relevant_sentences(self):
+        filler = " ".join(f"관련 없는 설명 {i} 입니다." for i in range(60))
+        rows = [_row("document", f"{filler} 백업은 매일 새벽 2시에 수행한다. {filler}", 0)]
+        context, _, stats = pack_context(rows, "백업은 언제 수행하나", max_tokens=120)
+        self.assertIn("백업은 매일 새벽 2시에 수행한다.", context)
+        self.assertLessEqual(stats["tokens_packed"], 120)
+        self.assertEqual(stats["trimmed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
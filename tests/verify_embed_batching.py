@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services import embed
+from app.services.embed_coalescer import EmbeddingCoalescer
+from app.services.embed_providers import LocalHashingEmbeddingProvider
+
+
+class TestPlanBatches(unittest.TestCase):
+    def test_respects_token_and_count_limits(self):
+        batches = embed.plan_batches([10, 10, 10, 50, 5, 5], max_inputs=2, max_tokens=30)
+        self.assertEqual(batches, [[0, 1], [2], [3], [4, 5]])
+
+    def test_oversized_input_gets_own_batch(self):
+        self.assertEqual(embed.plan_batches([100, 1], max_inputs=10, max_tokens=50), [[0], [1]])
+
+
+class TestEmbedTexts(unittest.TestCase):
+    def _fake_embed_batch(self, texts):
+        # 뒤 batch 가 먼저 끝나도 순서가 유지되는지 보기 위해 batch 마다 지연을 다르게 준다
+        time.sleep(0.05 if texts[0] == "t0" else 0.0)
+        with self.lock:
+            self.calls.append(list(texts))
+        return [[float(t[1:])] for t in texts], len(texts)
+
+    def test_order_preserved_across_concurrent_batches(self):
+        self.calls, self.lock = [], threading.Lock()
+        texts = [f"t{i}" for i in range(10)]
+        metrics = {}
+        with mock.patch.object(embed, "EMBED_MAX_BATCH_INPUTS", 3), \
+                mock.patch.object(embed.provider, "embed_batch", side_effect=self._fake_embed_batch):
+            vecs = embed.embed_texts(texts, metrics=metrics)
+        self.assertEqual(vecs, [[float(i)] for i in range(10)])
+        self.assertEqual(len(self.calls), 4)
+        self.assertEqual(metrics["batches"], 4)
+        self.assertEqual(metrics["tokens"], 10)
+        self.assertEqual(len(metrics["batch_stats"]), 4)
+
+
+class TestEmbeddingCoalescer(unittest.TestCase):
+    def test_concurrent_requests_share_one_batch(self):
+        calls = []
+
+        def fake_embed(texts):
+            calls.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        coalescer = EmbeddingCoalescer(fake_embed, window_ms=50, max_batch=64)
+        texts = ["a", "bb", "ccc", "bb", "dddd"]
+        with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+            results = list(pool.map(lambda t: coalescer.embed([t], timeout=5), texts))
+
+        self.assertEqual(results, [[[float(len(t))]] for t in texts])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(calls[0]), ["a", "bb", "ccc", "dddd"])  # 중복 질문은 1번만
+        self.assertEqual(coalescer.stats()["batches"], 1)
+
+    def test_batch_error_reaches_every_waiter(self):
+        def failing(texts):
+            raise RuntimeError("rate limited")
+
+        coalescer = EmbeddingCoalescer(failing, window_ms=1)
+        with self.assertRaises(RuntimeError):
+            coalescer.embed(["q"], timeout=5)
+
+
+class TestLocalHashingProvider(unittest.TestCase):
+    def setUp(self):
+        self.provider = LocalHashingEmbeddingProvider()
+
+    def test_deterministic_unit_vectors(self):
+        a = self.provider.embed_one("보안 요구사항 SR-003 암호화")
+        b = self.provider.embed_one("보안 요구사항 SR-003 암호화")
+        self.assertEqual(a.shape, (1536,))
+        self.assertTrue(np.array_equal(a, b))
+        self.assertAlmostEqual(float(np.linalg.norm(a)), 1.0, places=5)
+
+    def test_overlapping_texts_are_closer(self):
+        q = self.provider.embed_one("개인정보 암호화 저장 방안")
+        near = self.provider.embed_one("개인정보는 암호화하여 저장한다")
+        far = self.provider.embed_one("프로젝트 일정 및 투입 인력 계획")
+        self.assertGreater(float(q @ near), float(q @ far) + 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
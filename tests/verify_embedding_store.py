@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.dml import Delete, Insert, Update
+
+from app.services import embedding_store
+
+
+def _shifts(statements):
+    """실행된 ref_count UPDATE → {key: 증감량}"""
+    shifts = {}
+    for stmt in statements:
+        if not isinstance(stmt, Update):
+            continue
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        assert "ref_count=(chunk_embedding.ref_count + " in str(compiled)
+        amount = next(v for k, v in compiled.params.items() if k.startswith("ref_count"))
+        keys = next(v for k, v in compiled.params.items() if k.startswith("key"))
+        for key in keys:
+            shifts[key] = shifts.get(key, 0) + amount
+    return shifts
+
+
+class _Session:
+    def __init__(self, grouped=()):
+        self.statements = []
+        self.grouped = list(grouped)
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        if isinstance(stmt, Delete):
+            return mock.Mock(rowcount=sum(n for _, n in self.grouped))
+        if isinstance(stmt, Update):
+            return mock.Mock(rowcount=1)
+        return mock.Mock(**{"all.return_value": self.grouped})
+
+
+class TestRefCounts(unittest.TestCase):
+    def test_add_refs_counts_duplicates(self):
+        db = _Session()
+        embedding_store.add_refs(db, ["a", "a", "b", "c", "a"])
+        self.assertEqual(_shifts(db.statements), {"a": 3, "b": 1, "c": 1})
+        # 같은 증감량끼리 UPDATE 1번 (+3: a / +1: b, c)
+        self.assertEqual(len(db.statements), 2)
+
+    def test_release_chunks_decrements_per_referencing_chunk(self):
+        # chunk 3개가 k1 을, 1개가 k2 를 참조, 1개는 key 없음(예전 chunk)
+        db = _Session(grouped=[("k1", 3), ("k2", 1), (None, 1)])
+        deleted = embedding_store.release_chunks(db, ["c1", "c2", "c3", "c4", "c5"])
+        self.assertEqual(_shifts(db.statements), {"k1": -3, "k2": -1})
+        self.assertEqual(deleted, 5)
+        # ref_count 를 내린 뒤 chunk 삭제
+        self.assertIsInstance(db.statements[-1], Delete)
+
+    def test_release_chunks_batches_lookups(self):
+        db = _Session(grouped=[("k1", 1)])
+        with mock.patch.object(embedding_store, "LOOKUP_BATCH", 2):
+            embedding_store.release_chunks(db, ["c1", "c2", "c3"])
+        self.assertEqual(sum(isinstance(s, Delete) for s in db.statements), 2)
+        self.assertEqual(_shifts(db.statements), {"k1": -2})
+
+    def test_add_then_release_is_balanced(self):
+        db = _Session(grouped=[("a", 2), ("b", 1)])
+        embedding_store.add_refs(db, ["a", "b", "a"])
+        embedding_store.release_chunks(db, ["c1", "c2", "c3"])
+        self.assertEqual(_shifts(db.statements), {"a": 0, "b": 0})
+
+
+class TestGetOrEmbed(unittest.TestCase):
+    def test_insert_is_batched(self):
+        db = _Session()
+        texts = [f"chunk {i}" for i in range(1201)]
+        embed_fn = lambda batch: [[0.1, 0.2] for _ in batch]
+        keys, vectors, stats = embedding_store.get_or_embed(db, texts, embed_fn=embed_fn)
+        inserts = [stmt for stmt in db.statements if isinstance(stmt, Insert)]
+        # LOOKUP_BATCH(500) 행씩 → 500 / 500 / 201
+        rows = [
+            sum(1 for k in stmt.compile(dialect=postgresql.dialect()).params if k.startswith("key"))
+            for stmt in inserts
+        ]
+        self.assertEqual(rows, [500, 500, 201])
+        self.assertEqual(stats["embedded"], 1201)
+        self.assertEqual(len(vectors), 1201)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from app.services import fanout, limits
+
+
+class TestHedgedCall(unittest.TestCase):
+    def test_fast_call_ok(self):
+        res = fanout.collect(fanout.submit_with_budget(lambda: [1, 2], 500, 100), 500)
+        self.assertEqual(res["status"], "ok")
+        self.assertEqual(res["value"], [1, 2])
+        self.assertFalse(res["hedged"])
+
+    def test_slow_first_call_is_hedged(self):
+        calls = []
+        lock = threading.Lock()
+
+        def fn():
+            with lock:
+                calls.append(1)
+                n = len(calls)
+            if n == 1:
+                time.sleep(0.5)  # 첫 요청만 느림
+            return n
+
+        res = fanout.collect(fanout.submit_with_budget(fn, 1000, 50), 1000)
+        self.assertEqual(res["status"], "ok")
+        self.assertTrue(res["hedged"])
+        self.assertEqual(res["value"], 2)
+        self.assertLess(res["ms"], 400)
+
+    def test_budget_exceeded_times_out(self):
+        res = fanout.collect(fanout.submit_with_budget(lambda: time.sleep(0.5), 100, 0), 100)
+        self.assertEqual(res["status"], "timeout")
+        self.assertIsNone(res["value"])
+
+    def test_failures_report_error(self):
+        def fn():
+            raise RuntimeError("vertex down")
+
+        res = fanout.collect(fanout.submit_with_budget(fn, 300, 50), 300)
+        self.assertEqual(res["status"], "error")
+        self.assertTrue(res["hedged"])  # 실패 후 1회 재시도
+        self.assertIn("vertex down", res["error"])
+
+
+class TestAsyncHedgedCall(unittest.TestCase):
+    def test_slow_first_call_is_hedged(self):
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(0.5)
+            return len(calls)
+
+        res = asyncio.run(fanout.call_with_budget_async(fn, 1000, 50))
+        self.assertEqual(res["status"], "ok")
+        self.assertTrue(res["hedged"])
+        self.assertLess(res["ms"], 400)
+
+    def test_budget_exceeded_times_out(self):
+        res = asyncio.run(fanout.call_with_budget_async(lambda: asyncio.sleep(0.5), 100, 0))
+        self.assertEqual(res["status"], "timeout")
+        self.assertIsNone(res["value"])
+
+
+class TestLimits(unittest.TestCase):
+    def test_in_flight_is_bounded(self):
+        peak = []
+
+        async def worker():
+            async with limits.limit("vertex"):
+                peak.append(limits._stats["vertex"]["in_flight"])
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*(worker() for _ in range(limits.LIMITS["vertex"] * 3)))
+
+        asyncio.run(main())
+        self.assertEqual(max(peak), limits.LIMITS["vertex"])
+        self.assertEqual(limits._stats["vertex"]["in_flight"], 0)
+
+    def test_wait_timeout_raises(self):
+        async def main():
+            async with limits.limit("chat", timeout=1):
+                sem = limits._semaphore("chat")
+                for _ in range(limits.LIMITS["chat"] - 1):
+                    await sem.acquire()
+                with self.assertRaises(limits.LimitExceeded):
+                    async with limits.limit("chat", timeout=0.01):
+                        pass
+
+        asyncio.run(main())
+
+
+class TestMergeByNormalizedScore(unittest.TestCase):
+    def test_scales_are_normalized_per_backend(self):
+        merged = fanout.merge_by_normalized_score(
+            {
+                "vertex": [{"id": "v1", "final_score": 0.9}, {"id": "v2", "final_score": 0.45}],
+                "local": [{"id": "l1", "final_score": 0.02}, {"id": "l2", "final_score": 0.015}],
+            },
+            top_k=3,
+        )
+        self.assertEqual([m["id"] for m in merged[:2]], ["v1", "l1"])
+        self.assertEqual(merged[2]["id"], "l2")
+        self.assertAlmostEqual(merged[2]["final_score"], 0.75)
+        self.assertAlmostEqual(merged[2]["backend_score"], 0.015)
+
+    def test_empty_backend_is_skipped(self):
+        merged = fanout.merge_by_normalized_score({"vertex": [], "local": [{"final_score": 0.3}]}, top_k=5)
+        self.assertEqual(len(merged), 1)
+        self.assertEqual(merged[0]["backend"], "local")
+
+    def test_calibrated_merge_keeps_absolute_scores(self):
+        merged = fanout.merge_by_calibrated_score(
+            {
+                "vertex": [{"id": "v1", "final_score": 0.4, "calibrated_score": 0.4}],
+                "local": [{"id": "l1", "final_score": 0.02, "calibrated_score": 0.8}],
+            },
+            top_k=2,
+        )
+        self.assertEqual([m["id"] for m in merged], ["l1", "v1"])
+        self.assertAlmostEqual(merged[1]["final_score"], 0.4)  # 정규화로 1.0 이 되지 않는다
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from app.routes import query
+
+
+def _card_row(similarity, status="approved", source_type="answer_card"):
+    return {
+        "source_type": source_type,
+        "chunk_id": "ac1",
+        "document_id": None,
+        "answer_id": str(uuid.uuid4()),
+        "page": 0,
+        "text": "백업은 매일 새벽 2시에 수행한다.",
+        "title": "백업 주기는?",
+        "similarity": similarity,
+        "final_score": similarity,
+        "metadata": {"status": status} if source_type == "answer_card" else {},
+    }
+
+
+class TestFastPathHit(unittest.TestCase):
+    threshold = query.ANSWER_CARD_FAST_PATH_MIN_SIMILARITY
+
+    def test_threshold_is_inclusive(self):
+        row = _card_row(self.threshold)
+        self.assertIs(query._fast_path_hit([row], "direct"), row)
+        self.assertIsNone(query._fast_path_hit([_card_row(self.threshold - 0.001)], "direct"))
+
+    def test_only_top_approved_card_qualifies(self):
+        self.assertIsNone(query._fast_path_hit([_card_row(0.99, status="draft")], "direct"))
+        self.assertIsNone(query._fast_path_hit([_card_row(0.99, source_type="document")], "direct"))
+        # 두 번째 row 가 카드여도 top 이 문서면 일반 경로
+        rows = [_card_row(0.95, source_type="document"), _card_row(0.99)]
+        self.assertIsNone(query._fast_path_hit(rows, "refine"))
+
+    def test_off_mode_and_empty_rows(self):
+        self.assertIsNone(query._fast_path_hit([_card_row(0.99)], "off"))
+        self.assertIsNone(query._fast_path_hit([], "direct"))
+
+
+class TestCardAnswer(unittest.TestCase):
+    def _load(self, card):
+        db = mock.Mock(**{"get.return_value": card})
+        return query._load_card_answer(db, str(uuid.uuid4()))
+
+    def test_load_requires_card_still_approved(self):
+        self.assertIsNone(self._load(None))
+        self.assertIsNone(self._load(SimpleNamespace(status="archived", answer="a", answer_plain=None)))
+        self.assertEqual(self._load(SimpleNamespace(status="approved", answer="<p>a</p>", answer_plain="a")), "a")
+
+    def _card_answer(self, loaded):
+        async def run_db(adb, fn, *args):
+            self.assertIs(fn, query._load_card_answer)
+            return loaded
+
+        with mock.patch.object(query, "_run_db", run_db):
+            return asyncio.run(query._card_answer(None, _card_row(0.97)))
+
+    def test_unapproved_card_falls_back_to_normal_path(self):
+        # 검색 이후 카드가 승인 취소 / 삭제되면 None → /query 는 LLM 경로로 진행
+        self.assertIsNone(self._card_answer(None))
+
+    def test_approved_card_is_answered_with_its_citation(self):
+        card = self._card_answer("백업은 매일 새벽 2시에 수행한다.")
+        self.assertEqual(card["answer"], "백업은 매일 새벽 2시에 수행한다. [1]")
+        self.assertEqual(len(card["citations"]), 1)
+        self.assertEqual(card["debug"]["similarity"], 0.97)
+
+
+if __name__ == "__main__":
+    unittest.main()
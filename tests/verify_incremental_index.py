@@ -0,0 +1,110 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from app.services.chunker import chunk_pages
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.dml import Insert, Update
+
+from app.services import embedding_store
+from app.services.embedding_store import content_hash, diff_document_chunks, embedding_key
+
+
+def _page(i):
+    return " ".join(f"{i}페이지 {j}번째 문장은 보안 점검 절차를 설명한다." for j in range(30))
+
+
+def _stored(chunks, legacy=False):
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            page=c["page"],
+            text=c["text"],
+            content_hash=None if legacy else content_hash(c["page"], c["text"]),
+            embedding_key=None if legacy else embedding_key(c["text"]),
+            char_start=None if legacy else c["char_start"],
+            char_end=None if legacy else c["char_end"],
+        )
+        for c in chunks
+    ]
+
+
+def _db(rows):
+    # 첫 execute: 문서 chunk 목록, 두 번째(예전 chunk 가 있을 때): (id, page, text)
+    results = [rows, [(r.id, r.page, r.text) for r in rows]]
+    db = mock.Mock()
+    db.execute.side_effect = lambda stmt: mock.Mock(all=mock.Mock(return_value=results.pop(0)))
+    return db
+
+
+class TestDiffDocumentChunks(unittest.TestCase):
+    pages = [_page(i) for i in range(300)]
+
+    def test_light_edit_touches_few_chunks(self):
+        old = chunk_pages(self.pages)
+        edited = list(self.pages)
+        edited[120] = edited[120].replace("3번째 문장은", "3번째 문장은 (개정)")
+        new = chunk_pages(edited)
+
+        plan = diff_document_chunks(_db(_stored(old)), uuid.uuid4(), new)
+        self.assertGreater(len(new), 300)
+        self.assertTrue(0 < len(plan["added"]) <= 3, len(plan["added"]))
+        self.assertEqual(len(plan["removed"]), len(plan["added"]))
+        self.assertTrue(all(c["page"] == 121 for c in plan["added"]))
+
+    def test_unchanged_document_is_noop(self):
+        chunks = chunk_pages(self.pages[:5])
+        plan = diff_document_chunks(_db(_stored(chunks)), uuid.uuid4(), chunk_pages(self.pages[:5]))
+        self.assertEqual(plan, {"added": [], "removed": [], "moved": [], "backfill": []})
+
+    def test_legacy_rows_are_backfilled_not_reembedded(self):
+        chunks = chunk_pages(self.pages[:5])
+        plan = diff_document_chunks(_db(_stored(chunks, legacy=True)), uuid.uuid4(), chunk_pages(self.pages[:5]))
+        self.assertEqual(plan["added"], [])
+        self.assertEqual(plan["removed"], [])
+        self.assertEqual(len(plan["moved"]), len(chunks))
+        # embedding_key 가 없던 chunk → 저장된 벡터로 key / ref 를 채운다
+        self.assertEqual(
+            sorted(item["embedding_key"] for item in plan["backfill"]),
+            sorted(embedding_key(c["text"]) for c in chunks),
+        )
+
+    def test_legacy_rows_need_matching_model(self):
+        # 다른 모델로 바뀐 뒤라면 예전 벡터를 쓸 수 없으므로 새로 임베딩
+        chunks = chunk_pages(self.pages[:2])
+        with mock.patch.object(embedding_store, "EMBED_MODEL", "other-model"):
+            plan = diff_document_chunks(_db(_stored(chunks, legacy=True)), uuid.uuid4(), chunk_pages(self.pages[:2]))
+        self.assertEqual(len(plan["added"]), len(chunks))
+        self.assertEqual(len(plan["removed"]), len(chunks))
+        self.assertEqual(plan["backfill"], [])
+
+    def test_page_shift_is_a_change(self):
+        # 같은 텍스트라도 페이지가 바뀌면 citation 이 달라지므로 새 chunk
+        chunks = chunk_pages(self.pages[:2])
+        shifted = chunk_pages([""] + self.pages[:2])
+        plan = diff_document_chunks(_db(_stored(chunks)), uuid.uuid4(), shifted)
+        self.assertEqual(len(plan["added"]), len(shifted))
+        self.assertEqual(len(plan["removed"]), len(chunks))
+
+
+class TestBackfillLegacyRefs(unittest.TestCase):
+    def test_copies_stored_vectors_and_adds_refs(self):
+        db = mock.Mock()
+        items = [{"id": uuid.uuid4(), "embedding_key": k} for k in ("k1", "k2", "k1")]
+        with mock.patch.object(embedding_store, "add_refs") as add_refs:
+            self.assertEqual(embedding_store.backfill_legacy_refs(db, items), 3)
+        stmt, rows = db.execute.call_args_list[0][0]
+        self.assertIsInstance(stmt, Update)
+        self.assertEqual(rows, items)
+        insert = db.execute.call_args_list[1][0][0]
+        self.assertIsInstance(insert, Insert)
+        sql = str(insert.compile(dialect=postgresql.dialect()))
+        # 임베딩 API 없이 chunk.embedding 을 그대로 chunk_embedding 으로
+        self.assertIn("INSERT INTO chunk_embedding (key, model, embedding, ref_count) SELECT chunk.embedding_key", sql)
+        self.assertIn("ON CONFLICT (key) DO NOTHING", sql)
+        add_refs.assert_called_once_with(db, ["k1", "k2", "k1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
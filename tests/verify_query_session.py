@@ -0,0 +1,123 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import query
+
+ROWS = [
+    {
+        "source_type": "document",
+        "chunk_id": "c1",
+        "document_id": "d1",
+        "answer_id": None,
+        "page": 1,
+        "text": "보안 점검은 연 1회 외부 기관이 수행한다.",
+        "title": "점검",
+        "final_score": 0.8,
+        "similarity": 0.8,
+        "metadata": {},
+    }
+]
+
+
+class _Session:
+    def __init__(self):
+        self.events = []
+
+    @property
+    def released(self):
+        return self.events[-2:] == ["commit", "close"]
+
+    async def commit(self):
+        self.events.append("commit")
+
+    async def close(self):
+        self.events.append("close")
+
+    async def __aenter__(self):
+        self.events.append("open")
+        return self
+
+    async def __aexit__(self, *exc):
+        self.events.append("close")
+        return False
+
+
+class _Completions:
+    def __init__(self, session):
+        self.session = session
+        self.released_at_call = None
+
+    async def create(self, **kwargs):
+        # chat 을 기다리기 시작하는 시점에 요청 세션이 이미 반납돼 있어야 한다
+        self.released_at_call = self.session.released
+        if kwargs.get("stream"):
+            async def _chunks():
+                yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content="점검은 연 1회다."))])
+            return _chunks()
+        message = SimpleNamespace(content="점검은 연 1회다.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class TestRequestSessionRelease(unittest.TestCase):
+    def setUp(self):
+        self.session = _Session()
+        self.completions = _Completions(self.session)
+        self.db_sessions = []
+
+        async def prepare(adb, p):
+            self.assertIs(adb, self.session)
+            return {"qvec": [0.0], "system_prompt": "s", "cache_key": None, "cached": None}
+
+        async def search(adb, qvec, p, search_debug):
+            self.assertIs(adb, self.session)
+            return ROWS
+
+        async def run_db(adb, fn, *args):
+            self.db_sessions.append(adb)
+            return [None]
+
+        async def sentence_vectors(sentences):
+            return None
+
+        app = FastAPI()
+        app.include_router(query.router)
+        app.dependency_overrides[query.get_async_db] = lambda: self.session
+        for name, value in {
+            "_prepare": prepare,
+            "_search": search,
+            "_run_db": run_db,
+            "_sentence_vectors": sentence_vectors,
+            "AsyncSessionLocal": _Session,
+            "client": SimpleNamespace(chat=SimpleNamespace(completions=self.completions)),
+        }.items():
+            patcher = mock.patch.object(query, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+
+    def _params(self):
+        return {"q": "점검 주기는?", "fast_path": "off", "cite_mode": "embedding"}
+
+    def test_query_releases_session_before_chat(self):
+        r = self.client.get("/query", params=self._params())
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(self.completions.released_at_call)
+        # 답변 뒤 인용 vector 조회는 짧은 별도 세션
+        self.assertEqual(len(self.db_sessions), 1)
+        self.assertIsNot(self.db_sessions[0], self.session)
+
+    def test_stream_releases_session_before_chat(self):
+        r = self.client.get("/query/stream", params=self._params())
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("event: done", r.text)
+        self.assertTrue(self.completions.released_at_call)
+        self.assertEqual(len(self.db_sessions), 1)
+        self.assertIsNot(self.db_sessions[0], self.session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from app.services.rerank import mmr_select
+
+
+class TestMMRRerank(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        base = rng.normal(size=(1, 32)).astype(np.float32)
+        # 0~3: 거의 같은 passage (같은 페이지 중복), 4~5: 서로 다른 passage
+        dups = base + rng.normal(scale=0.01, size=(4, 32)).astype(np.float32)
+        others = rng.normal(size=(2, 32)).astype(np.float32)
+        self.embeddings = np.vstack([dups, others])
+        self.relevance = [0.95, 0.94, 0.93, 0.92, 0.80, 0.78]
+        self.docs = ["doc-a", "doc-a", "doc-a", "doc-a", "doc-b", "doc-c"]
+
+    def test_pure_relevance_keeps_order(self):
+        picked, stats = mmr_select(self.embeddings, self.relevance, k=3, lambda_mult=1.0)
+        self.assertEqual(picked, [0, 1, 2])
+        self.assertEqual(stats["selected"], 3)
+
+    def test_mmr_promotes_diverse_passages(self):
+        picked, _ = mmr_select(self.embeddings, self.relevance, k=3, lambda_mult=0.5)
+        self.assertEqual(picked[0], 0)
+        self.assertIn(4, picked)
+        self.assertIn(5, picked)
+
+    def test_per_doc_limit(self):
+        picked, stats = mmr_select(
+            self.embeddings, self.relevance, k=4, lambda_mult=1.0,
+            group_keys=self.docs, per_group_limit=2,
+        )
+        self.assertEqual(picked, [0, 1, 4, 5])
+        self.assertEqual(stats["dropped_by_doc_cap"], 2)
+
+    def test_empty_candidates(self):
+        picked, stats = mmr_select(np.empty((0, 32)), [], k=3)
+        self.assertEqual(picked, [])
+        self.assertEqual(stats["candidates"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
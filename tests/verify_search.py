@@ -0,0 +1,121 @@
+import re
+import unittest
+import uuid
+from unittest import mock
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import search
+
+
+def _compile(stmt):
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    return str(compiled), compiled.params
+
+
+class TestHybridSearchStatement(unittest.TestCase):
+    qvec = [0.0] * 1535 + [1.0]
+
+    def _sql(self, **kwargs):
+        stmt = search._project_search_stmt(self.qvec, "personal", uuid.uuid4(), 5, **kwargs)
+        return _compile(stmt)
+
+    def test_union_of_vector_and_lexical_branches(self):
+        sql, params = self._sql(qtext="F-01 요구사항")
+        # chunk / answer_chunk × vector / lexical = 4 후보 쿼리, UNION(중복 제거)
+        self.assertEqual(sql.count(" UNION "), 3)
+        self.assertNotIn("UNION ALL", sql)
+        self.assertEqual(sql.count("ORDER BY distance"), 2)
+        self.assertEqual(sql.count("<%% chunk.text"), 1)
+        self.assertEqual(sql.count("<%% answer_chunk.text"), 1)
+        # 식별자형 키워드는 ILIKE (LIKE 특수문자 escape)
+        self.assertIn("%F-01%", params.values())
+        # 후보 수 = top_k × multiplier, 최종 LIMIT = top_k
+        candidate_limits = re.findall(r"ORDER BY (?:distance|lex_score DESC)\s+LIMIT %\((\w+)\)s", sql)
+        self.assertEqual(len(candidate_limits), 4)
+        for name in candidate_limits:
+            self.assertEqual(params[name], 5 * search.HYBRID_CANDIDATE_MULTIPLIER)
+        limit_param = re.search(r"LIMIT %\((\w+)\)s(?:::INTEGER)?\s*$", sql).group(1)
+        self.assertEqual(params[limit_param], 5)
+
+    def test_vector_only_without_query_text(self):
+        sql, _ = self._sql(qtext="")
+        self.assertEqual(sql.count(" UNION "), 1)
+        self.assertNotIn("<%%", sql)
+
+    def test_threshold_and_weights_are_bound(self):
+        sql, params = self._sql(qtext="백업 정책", min_similarity=0.4, w_vec=0.7, w_lex=0.3)
+        # vector 후보 LIMIT 전 distance 조건 = 1 - min_similarity
+        self.assertEqual(sum(1 for v in params.values() if v == 0.6), 2)
+        self.assertIn(0.4, params.values())
+        self.assertIn(search.LEX_MIN_SCORE, params.values())
+        self.assertIn(0.7, params.values())
+        self.assertIn(0.3, params.values())
+
+    def test_rrf_fusion_ranks_each_signal(self):
+        sql, params = self._sql(qtext="백업 정책", fusion="rrf")
+        self.assertIn("row_number() OVER (ORDER BY hits.distance)", sql)
+        self.assertIn("row_number() OVER (ORDER BY hits.lex_score DESC)", sql)
+        self.assertIn(search.RRF_K, params.values())
+
+
+class TestLexicalTerms(unittest.TestCase):
+    def test_identifier_terms_are_deduplicated_and_capped(self):
+        terms = search.extract_lexical_terms("F-01 과 SR-003, f-01 그리고 REQ.12 A1 H-01 X-1 Y-2 Z-3")
+        # 대소문자만 다른 중복 / 3글자 미만(trigram 불가) 제외, 최대 LEX_MAX_TERMS 개
+        self.assertEqual(terms, ["F-01", "SR-003", "REQ.12", "H-01", "X-1"])
+        self.assertEqual(len(terms), search.LEX_MAX_TERMS)
+
+    def test_like_pattern_is_escaped(self):
+        self.assertEqual(search._escape_like("50%_a\\"), "50\\%\\_a\\\\")
+        sql, params = _compile(
+            search._project_search_stmt([0.0] * 1536, "personal", None, 5, qtext="SR_01 점검")
+        )
+        self.assertIn("%SR\\_01%", params.values())
+        self.assertIn("ESCAPE '\\'", sql)
+
+    def test_exact_identifier_hit_scores_one(self):
+        # ILIKE 키워드 hit → lex_score 1.0, 아니면 word_similarity
+        sql, _ = _compile(search._project_search_stmt([0.0] * 1536, "personal", None, 5, qtext="F-01 요구사항"))
+        self.assertIn("CASE WHEN (chunk.text ILIKE", sql)
+        self.assertIn("ELSE word_similarity(", sql)
+
+
+class TestBatchSearchStatement(unittest.TestCase):
+    def setUp(self):
+        qvecs = [[0.1] * search.EMBED_DIM, [0.2] * search.EMBED_DIM]
+        stmt = search._batch_search_stmt(qvecs, "personal", uuid.uuid4(), 4, offset=100, min_similarity=0.7)
+        self.sql, self.params = _compile(stmt)
+
+    def test_each_lateral_branch_applies_threshold_and_top_k(self):
+        # branch(chunk / answer_chunk)마다 distance 조건 → ORDER BY distance LIMIT top_k
+        branches = re.findall(
+            r"<=> CAST\(q\.qvec AS VECTOR\(1536\)\)\) <= %\((\w+)\)s ORDER BY distance\s+LIMIT %\((\w+)\)s",
+            self.sql,
+        )
+        self.assertEqual(len(branches), 2)
+        for threshold, limit in branches:
+            self.assertAlmostEqual(self.params[threshold], 0.3)
+            self.assertEqual(self.params[limit], 4)
+
+    def test_rank_is_per_query(self):
+        self.assertIn("PARTITION BY q.qidx ORDER BY hits.distance", self.sql)
+        rank_param = re.search(r"ranked\.rank <= %\((\w+)\)s", self.sql).group(1)
+        self.assertEqual(self.params[rank_param], 4)
+        # qidx 는 offset 부터 (batch 를 나눠 실행해도 입력 순서로 모은다)
+        qidx = [v for k, v in self.params.items() if isinstance(v, int) and v >= 100]
+        self.assertEqual(qidx, [100, 101])
+
+
+class TestBatchSearchErrors(unittest.TestCase):
+    def test_database_error_is_raised(self):
+        db = mock.Mock()
+        db.execute.side_effect = RuntimeError("connection lost")
+        with mock.patch.object(search.vector_index, "prepare_filtered_search"):
+            with self.assertRaises(RuntimeError):
+                search.search_chunks_batch(db, [[0.1] * search.EMBED_DIM])
+        db.rollback.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from unittest import mock
+
+from app.services import search_cache
+
+
+class TestIsolation(unittest.TestCase):
+    def setUp(self):
+        search_cache._entries.clear()
+        patcher = mock.patch.object(search_cache, "current_generation", return_value=7)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_nested_results_are_not_shared(self):
+        results = [{"chunk_id": "c1", "metadata": {"status": "approved"}}]
+        search_cache.store(None, 7, "fp", results)
+        # 저장 후 호출한 쪽이 고쳐도
+        results[0]["metadata"]["status"] = "archived"
+
+        _, first = search_cache.lookup(None, None, "fp")
+        self.assertEqual(first[0]["metadata"], {"status": "approved"})
+        # 조회한 쪽이 고쳐도
+        first[0]["metadata"]["status"] = "draft"
+        _, second = search_cache.lookup(None, None, "fp")
+        self.assertEqual(second[0]["metadata"], {"status": "approved"})
+
+
+if __name__ == "__main__":
+    unittest.main()
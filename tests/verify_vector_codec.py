@@ -0,0 +1,86 @@
+import importlib
+import struct
+import unittest
+import uuid
+from unittest import mock
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models.chunk import Chunk
+from app.utils import vector_codec
+
+
+def _vector_send(values):
+    # Postgres vector_send: int16 dim, int16 unused, float4[dim] (network byte order)
+    return struct.pack(f">hh{len(values)}f", len(values), 0, *values)
+
+
+class TestDecode(unittest.TestCase):
+    def test_round_trip_skips_header_and_reads_big_endian(self):
+        values = [0.5, -1.25, 3.0, 1e-3]
+        vec = vector_codec.decode_vector(memoryview(_vector_send(values)))
+        self.assertEqual(vec.dtype, np.float32)
+        self.assertEqual(vec.shape, (4,))
+        np.testing.assert_allclose(vec, values, rtol=1e-6)
+
+    def test_decode_vectors_stacks_rows(self):
+        mat = vector_codec.decode_vectors([_vector_send([1.0, 2.0]), _vector_send([3.0, 4.0])], dim=2)
+        np.testing.assert_array_equal(mat, np.array([[1.0, 2.0], [3.0, 4.0]], dtype=np.float32))
+        self.assertEqual(vector_codec.decode_vectors([], dim=3).shape, (0, 3))
+
+    def test_vector_bytes_selects_binary(self):
+        sql = str(select(vector_codec.vector_bytes(Chunk.embedding)).compile(dialect=postgresql.dialect()))
+        self.assertIn("vector_send(chunk.embedding)", sql)
+
+
+class TestLoadEmbeddings(unittest.TestCase):
+    def test_vectors_by_id(self):
+        a, b = uuid.uuid4(), uuid.uuid4()
+        db = mock.Mock()
+        db.execute.return_value.all.return_value = [(a, _vector_send([1.0, 0.0])), (b, _vector_send([0.0, 2.0]))]
+        vectors = vector_codec.load_embeddings(db, Chunk, [a, b])
+        self.assertEqual(set(vectors), {str(a), str(b)})
+        np.testing.assert_array_equal(vectors[str(b)], [0.0, 2.0])
+        self.assertEqual(vector_codec.load_embeddings(db, Chunk, []), {})
+
+    def test_embedding_is_deferred(self):
+        # ORM 로드 / select(Chunk) 에 1536-float 벡터가 끌려오지 않는다
+        self.assertTrue(Chunk.__mapper__.column_attrs["embedding"].deferred)
+        sql = str(select(Chunk).compile(dialect=postgresql.dialect()))
+        self.assertNotRegex(sql, r"chunk\.embedding(?!_key)")
+
+
+class TestCodecListeners(unittest.TestCase):
+    def test_registered_on_sync_and_async_engines(self):
+        import app.db
+        import app.models.db as models_db
+
+        async_engine = create_async_engine("postgresql+psycopg://user@localhost/db")
+        with mock.patch.object(app.db, "async_engine", async_engine):
+            reloaded = importlib.reload(models_db)
+        self.addCleanup(importlib.reload, models_db)
+        self.addCleanup(event.remove, app.db.engine, "connect", reloaded.register_pgvector_codecs)
+        self.addCleanup(event.remove, app.db.engine, "connect", reloaded.set_vector_search_tunables)
+
+        self.assertTrue(event.contains(app.db.engine, "connect", reloaded.register_pgvector_codecs))
+        self.assertTrue(event.contains(async_engine.sync_engine, "connect", reloaded.register_pgvector_codecs))
+        self.assertTrue(event.contains(async_engine.sync_engine, "connect", reloaded.set_vector_search_tunables))
+
+    def test_psycopg_connections_only(self):
+        sync_conn = type("Connection", (), {"__module__": "psycopg.connection"})()
+        with mock.patch("pgvector.psycopg.register_vector") as register:
+            self.assertTrue(vector_codec.register_vector_codecs(sync_conn))
+        register.assert_called_once_with(sync_conn)
+        self.assertFalse(vector_codec.register_vector_codecs(object()))
+
+        driver = type("AsyncConnection", (), {"__module__": "psycopg.connection_async"})()
+        adapted = mock.Mock(driver_connection=driver)
+        self.assertTrue(vector_codec.register_vector_codecs(adapted))
+        adapted.run_async.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+import uuid
+from unittest import mock
+
+from sqlalchemy.dialects.postgresql import psycopg
+
+from app.services import vector_index
+from app.services.search import _project_search_stmt
+
+
+class _FakeConn:
+    def __init__(self, lock_free=True, valid=None):
+        self.executed = []
+        self.lock_free = lock_free
+        self.valid = valid  # trigram 인덱스 indisvalid (None = 없음)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execution_options(self, **kwargs):
+        return self
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.executed.append(sql)
+        if "pg_try_advisory_lock" in sql:
+            return mock.Mock(**{"scalar.return_value": self.lock_free})
+        if "indisvalid" in sql:
+            return mock.Mock(**{"scalar.return_value": self.valid})
+        return mock.Mock(**{"scalar.return_value": "exists"})
+
+
+class TestEnsureVectorIndexes(unittest.TestCase):
+    def _ensure(self, existing, conn=None, **kwargs):
+        conn = conn or _FakeConn()
+        engine = mock.Mock(**{"connect.return_value": conn})
+        with mock.patch.object(vector_index, "list_vector_indexes", side_effect=lambda c, t, col: existing.get(t, [])):
+            report = vector_index.ensure_vector_indexes(engine, method="hnsw", distance="cosine", **kwargs)
+        ddl = [sql for sql in conn.executed if "INDEX" in sql]
+        return report, ddl
+
+    def test_mismatched_opclass_is_dropped_and_recreated(self):
+        existing = {"chunk": [{"index_name": "chunk_embedding_l2", "method": "hnsw", "opclass": "vector_l2_ops"}]}
+        report, ddl = self._ensure(existing)
+        self.assertEqual(report["dropped"], ["chunk_embedding_l2"])
+        self.assertIn("DROP INDEX CONCURRENTLY IF EXISTS chunk_embedding_l2", ddl)
+        create = [sql for sql in ddl if sql.startswith("CREATE") and " ON chunk " in sql]
+        self.assertEqual(len(create), 1)
+        self.assertIn("USING hnsw (embedding vector_cosine_ops)", create[0])
+
+    def test_matching_index_under_other_name_is_kept(self):
+        existing = {
+            table: [{"index_name": f"{table}_emb", "method": "hnsw", "opclass": "vector_cosine_ops"}]
+            for table, _ in vector_index.VECTOR_COLUMNS
+        }
+        report, ddl = self._ensure(existing)
+        self.assertEqual(report["created"], [])
+        self.assertEqual(report["dropped"], [])
+        self.assertEqual(len(report["kept"]), len(vector_index.VECTOR_COLUMNS))
+        self.assertEqual(ddl, [])
+
+    def test_keep_mismatched_when_drop_disabled(self):
+        existing = {"chunk": [{"index_name": "chunk_embedding_ivf", "method": "ivfflat", "opclass": "vector_cosine_ops"}]}
+        report, ddl = self._ensure(existing, drop_mismatched=False)
+        self.assertEqual(report["dropped"], [])
+        self.assertIn(vector_index.index_name("chunk", "embedding", "hnsw", "cosine"), report["created"])
+        self.assertFalse(any(sql.startswith("DROP") for sql in ddl))
+
+
+    def test_invalid_index_is_rebuilt_even_with_target_name(self):
+        target = vector_index.index_name("chunk", "embedding", "hnsw", "cosine")
+        existing = {"chunk": [{"index_name": target, "method": "hnsw", "opclass": "vector_cosine_ops", "valid": False}]}
+        report, ddl = self._ensure(existing)
+        self.assertEqual(report["invalid"], [target])
+        self.assertNotIn(target, report["kept"])
+        self.assertEqual(ddl[0], f"DROP INDEX CONCURRENTLY IF EXISTS {target}")
+        self.assertTrue(ddl[1].startswith(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {target} ON chunk"))
+
+    def test_ddl_runs_only_under_advisory_lock(self):
+        existing = {"chunk": [{"index_name": "chunk_embedding_l2", "method": "hnsw", "opclass": "vector_l2_ops"}]}
+        conn = _FakeConn(lock_free=False)
+        report, ddl = self._ensure(existing, conn=conn)
+        self.assertTrue(report["skipped"])
+        self.assertEqual(ddl, [])
+        self.assertNotIn("pg_advisory_unlock", " ".join(conn.executed))
+
+        conn = _FakeConn()
+        self._ensure(existing, conn=conn)
+        sql = [q for q in conn.executed if "advisory" in q or "INDEX" in q]
+        self.assertIn("pg_try_advisory_lock", sql[0])
+        self.assertIn("pg_advisory_unlock", sql[-1])
+
+    def test_report_only_mode_runs_no_ddl(self):
+        existing = {"chunk": [{"index_name": "chunk_embedding_l2", "method": "hnsw", "opclass": "vector_l2_ops"}]}
+        conn = _FakeConn()
+        report, ddl = self._ensure(existing, conn=conn, apply=False)
+        self.assertEqual(report["dropped"], ["chunk_embedding_l2"])
+        self.assertEqual(len(report["created"]), len(vector_index.VECTOR_COLUMNS))
+        self.assertEqual(ddl, [])
+        self.assertFalse(any("advisory" in q for q in conn.executed))
+
+
+class TestEnsureTextIndexes(unittest.TestCase):
+    def _ensure(self, conn, **kwargs):
+        engine = mock.Mock(**{"connect.return_value": conn})
+        report = vector_index.ensure_text_indexes(engine, **kwargs)
+        return report, [q for q in conn.executed if q.startswith(("CREATE INDEX", "DROP INDEX"))]
+
+    def test_valid_indexes_are_left_alone(self):
+        report, ddl = self._ensure(_FakeConn(valid=True))
+        self.assertEqual(len(report["ok"]), len(vector_index.TEXT_COLUMNS))
+        self.assertEqual(ddl, [])
+
+    def test_invalid_index_is_dropped_and_recreated(self):
+        report, ddl = self._ensure(_FakeConn(valid=False))
+        self.assertEqual(len(report["invalid"]), len(vector_index.TEXT_COLUMNS))
+        self.assertTrue(ddl[0].startswith("DROP INDEX CONCURRENTLY IF EXISTS idx_chunk_text_trgm"))
+        self.assertTrue(ddl[1].startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chunk_text_trgm"))
+
+    def test_report_only_mode_runs_no_ddl(self):
+        report, ddl = self._ensure(_FakeConn(valid=None), apply=False)
+        self.assertEqual(len(report["created"]), len(vector_index.TEXT_COLUMNS))
+        self.assertEqual(ddl, [])
+
+
+class TestExplain(unittest.TestCase):
+    def _stmt(self):
+        return _project_search_stmt([0.0] * 1535 + [1.0], "personal", uuid.uuid4(), 6, qtext="F-01 100% 요구사항")
+
+    def test_explain_keeps_bind_parameters(self):
+        compiled = vector_index._Explain(self._stmt()).compile(dialect=psycopg.dialect())
+        sql = str(compiled)
+        self.assertTrue(sql.startswith("EXPLAIN (FORMAT JSON) SELECT"))
+        # literal 로 박지 않고 bind 로 넘긴다 → 드라이버가 '%%' 를 '%' 로 되돌린다
+        self.assertNotIn("100%", sql)
+        self.assertIn("%(", sql)
+        self.assertTrue(any("100%" in str(v) for v in compiled.params.values()))
+
+    def test_explain_statement_returns_plan(self):
+        db = mock.Mock()
+        db.execute.return_value.scalar.return_value = [{"Plan": {"Node Type": "Limit"}}]
+        plan = vector_index.explain_statement(db, self._stmt())
+        self.assertEqual(plan, {"Node Type": "Limit"})
+        self.assertIsInstance(db.execute.call_args[0][0], vector_index._Explain)
+
+
+if __name__ == "__main__":
+    unittest.main()
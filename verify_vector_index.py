@@ -0,0 +1,48 @@
+"""
+ANN 인덱스 검증 스크립트.
+
+1) chunk / answer_chunk 벡터 인덱스를 검색 distance(cosine)와 같은 opclass 로 보장하고
+   (앱 기동 시에는 점검만 하므로 인덱스 생성 / INVALID 인덱스 재생성은 이 스크립트로 한다)
+2) 실제 project 검색 쿼리를 EXPLAIN 해서 인덱스 스캔이 아니면 실패(exit 1)한다.
+
+Usage:
+    python verify_vector_index.py            # enable_seqscan=off 로 인덱스 사용 가능 여부 확인
+    python verify_vector_index.py --natural  # planner 기본 선택 그대로 확인 (운영 데이터 규모)
+"""
+import json
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.models.db import engine, SessionLocal
+from app.services.vector_index import ensure_vector_indexes, ensure_text_indexes, verify_search_plan
+
+
+def main():
+    natural = "--natural" in sys.argv
+
+    report = ensure_vector_indexes(engine)
+    report["text"] = ensure_text_indexes(engine)
+    print(f"Search indexes: {json.dumps(report)}")
+    if report["skipped"] or report["text"]["skipped"]:
+        print("⚠️  another instance is running index DDL; re-run after it finishes")
+
+    db = SessionLocal()
+    try:
+        result = verify_search_plan(db, force_index=not natural)
+    finally:
+        db.close()
+
+    if result["ok"]:
+        print(f"✅ PASS: search plan uses ANN index scans {result['index_scans']}")
+        return
+
+    print(f"❌ FAIL: no ANN index scan on {result['missing']}")
+    print(json.dumps(result["plan"], indent=2))
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()